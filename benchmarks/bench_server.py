@@ -0,0 +1,448 @@
+"""Load test of the iframe and plan routes against a stand-in ChurchTools server.
+
+Usage: python -m benchmarks.bench_server [duration_seconds] [latency_seconds]
+
+A local HTTP server answers ChurchTools and Communi requests with synthetic data
+after a fixed delay which simulates the round trip to the hosted systems.
+gunicorn is started twice - once with the former default settings of the
+Dockerfile (one sync worker) and once with church_web_helper.gunicorn_config.
+For each server profile public iframe clients and logged in plan clients
+request their routes at the same time, so slow plan requests and
+iframe requests compete for the same workers like in production.
+Plan clients submit the plan form with a date range and calendars,
+iframe latency is additionally reported for requests started while
+at least one plan was being built.
+
+Requests which the stand-in doesn't know are answered with an empty list
+and reported at the end - extend STAND_IN_ROUTES in case they are relevant.
+"""
+
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+REPO_DIRECTORY = Path(__file__).parents[1]
+SNAPSHOT_VARIANTS = {"gottesdienste": {"calendar_id": "2", "days": "14"}}
+CLIENTS = {"iframe": 16, "plan": 4}
+PLAN_WEEKS = 8
+SERVER_PROFILES = {
+    "default": ["--workers", "1", "--worker-class", "sync"],
+    "gunicorn_config": ["--config", "python:church_web_helper.gunicorn_config"],
+}
+UNHANDLED_REQUESTS = Counter()
+
+
+def format_ct_date(value: datetime) -> str:
+    """Date format used by the ChurchTools REST API."""
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def get_appointments(_: dict) -> list[dict]:
+    """Weekly services starting today."""
+    start = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)  # noqa: DTZ005
+    appointments = []
+    for week in range(8):
+        appointment = {
+            "id": 1000 + week,
+            "caption": f"Gottesdienst {week}",
+            "subtitle": None,
+            "calendar": {"id": 2},
+            "startDate": format_ct_date(start + timedelta(weeks=week)),
+            "endDate": format_ct_date(start + timedelta(weeks=week, hours=1)),
+        }
+        appointments.append(
+            {
+                **appointment,
+                "base": appointment,
+                "calculated": {
+                    "startDate": appointment["startDate"],
+                    "endDate": appointment["endDate"],
+                },
+            }
+        )
+    return appointments
+
+
+def get_events(_: dict) -> list[dict]:
+    """Events of the weekly services including two services each."""
+    return [
+        {
+            "id": 2000 + number,
+            "name": appointment["caption"],
+            "startDate": appointment["startDate"],
+            "appointmentId": appointment["id"],
+            "calendar": {"domainIdentifier": "2"},
+            "eventServices": [
+                {"serviceId": 1, "name": f"Pfarrer {number}", "personId": number},
+                {"serviceId": 2, "name": "Organist", "personId": 100},
+            ],
+        }
+        for number, appointment in enumerate(get_appointments({}))
+    ]
+
+
+STAND_IN_ROUTES: list[tuple[str, re.Pattern, Callable[[dict], object]]] = [
+    ("POST", re.compile(r"^/api/login$"), lambda _: {"personId": 1}),
+    ("GET", re.compile(r"^/api/persons/\d+/logintoken$"), lambda _: "token"),
+    ("GET", re.compile(r"^/api/csrftoken$"), lambda _: "token"),
+    (
+        "GET",
+        re.compile(r"^/api/whoami$"),
+        lambda _: {"id": 1, "firstName": "Last", "lastName": "Test"},
+    ),
+    (
+        "GET",
+        re.compile(r"^/api/calendars$"),
+        lambda _: [
+            {"id": 2, "name": "Gottesdienste"},
+            {"id": 52, "name": "Feiertage"},
+        ],
+    ),
+    ("GET", re.compile(r"^/api/calendars/appointments$"), get_appointments),
+    ("GET", re.compile(r"^/api/calendars/\d+/appointments$"), get_appointments),
+    (
+        "GET",
+        re.compile(r"^/api/resource/masterdata$"),
+        lambda _: {
+            "resourceTypes": [{"id": 4, "name": "Räume"}],
+            "resources": [{"id": 8, "name": "Kirche", "resourceTypeId": 4}],
+        },
+    ),
+    (
+        "GET",
+        re.compile(r"^/api/event/masterdata$"),
+        lambda _: {
+            "serviceGroups": [
+                {"id": 1, "name": "Programm"},
+                {"id": 4, "name": "Musik"},
+            ],
+            "services": [
+                {"id": 1, "name": "Predigt", "serviceGroupId": 1},
+                {"id": 2, "name": "Orgel", "serviceGroupId": 4},
+            ],
+            "absenceReasons": [],
+            "songCategories": [],
+        },
+    ),
+    ("GET", re.compile(r"^/api/events$"), get_events),
+    # Communi is served below /communi and only needs to confirm the login
+    (
+        "GET",
+        re.compile(r"^/communi/"),
+        lambda _: {"id": 1, "firstname": "Load", "lastname": "Test"},
+    ),
+]
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers ChurchTools REST requests with synthetic data after a delay."""
+
+    latency = 0.1
+
+    def respond(self, method: str) -> None:
+        """Send the response of the first matching route."""
+        time.sleep(self.latency)
+        url = urlparse(self.path)
+        for route_method, pattern, func in STAND_IN_ROUTES:
+            if route_method == method and pattern.match(url.path):
+                content = func({"path": url.path, "query": url.query})
+                break
+        else:
+            UNHANDLED_REQUESTS[f"{method} {url.path}"] += 1
+            content = []
+
+        body = json.dumps(
+            content
+            if url.path.startswith("/communi/")
+            else {
+                "data": content,
+                "meta": {
+                    "pagination": {"total": 0, "current": 1, "limit": 0, "lastPage": 1}
+                },
+            }
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        """Respond to GET requests."""
+        self.respond("GET")
+
+    def do_POST(self) -> None:
+        """Respond to POST requests - the body is not used."""
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.respond("POST")
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        """Don't log each request."""
+
+
+def get_free_port() -> int:
+    """Port which is currently not used on localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_stand_in(latency: float) -> ThreadingHTTPServer:
+    """Start the stand-in server in a background thread."""
+    StandInHandler.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_app(
+    profile_args: list[str], port: int, env: dict[str, str]
+) -> subprocess.Popen:
+    """Start gunicorn and wait until the first snapshot was published."""
+    process = subprocess.Popen(  # noqa: S603
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            *profile_args,
+            "--bind",
+            f"127.0.0.1:{port}",
+            "church_web_helper.app:app",
+        ],
+        cwd=REPO_DIRECTORY,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}/public/calendar_appointments/gottesdienste"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=5).status_code == HTTPStatus.OK:
+                return process
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.5)
+    process.kill()
+    msg = "gunicorn did not publish the snapshot within 60 seconds"
+    raise RuntimeError(msg)
+
+
+def login(session: requests.Session, app_url: str, stand_in_url: str) -> None:
+    """Login to ChurchTools and Communi using the stand-in server."""
+    session.post(
+        f"{app_url}/ct/login",
+        data={"ct_user": "user", "ct_password": "secret", "ct_domain": stand_in_url},
+        timeout=60,
+    )
+    session.post(
+        f"{app_url}/communi/login",
+        data={
+            "communi_server": f"{stand_in_url}/communi",
+            "communi_token": "token",
+            "communi_appid": "1",
+        },
+        timeout=60,
+    )
+
+
+def get_plan_form() -> dict[str, object]:
+    """Form data of a plan build like submitted by the plan page."""
+    from_date = datetime.now().date()  # noqa: DTZ005
+    return {
+        "from_date": from_date.isoformat(),
+        "to_date": (from_date + timedelta(weeks=PLAN_WEEKS)).isoformat(),
+        "selected_calendars": [2, 52],
+        "selected_resources": [8],
+        "selected_program_services": [1],
+        "selected_music_services": [2],
+        "action": "Auswahl anpassen",
+    }
+
+
+def run_client(
+    send: Callable[[requests.Session], requests.Response],
+    deadline: float,
+    session: requests.Session,
+) -> tuple[list[tuple[float, float]], int]:
+    """Send requests until deadline.
+
+    Returns:
+        start and end of successful requests, number of failed requests
+    """
+    samples = []
+    errors = 0
+    while time.monotonic() < deadline:
+        start = time.monotonic()
+        try:
+            response = send(session)
+        except requests.RequestException:
+            errors += 1
+            continue
+        if response.status_code == HTTPStatus.OK:
+            samples.append((start, time.monotonic()))
+        else:
+            errors += 1
+    return samples, errors
+
+
+def get_statistics(
+    samples: list[tuple[float, float]], errors: int, duration: float
+) -> dict[str, float | None]:
+    """Throughput and latency of successful requests."""
+    latencies = [end - start for start, end in samples]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / duration,
+        "median": statistics.median(latencies) if latencies else None,
+        "p95": statistics.quantiles(latencies, n=20)[-1]
+        if len(latencies) > 1
+        else None,
+    }
+
+
+def run_load(app_url: str, stand_in_url: str, duration: float) -> dict[str, dict]:
+    """Request iframe and plan routes concurrently.
+
+    Returns:
+        dict of route name and statistics - iframe_during_plan only includes
+        iframe requests started while a plan was being built
+    """
+    iframe_url = f"{app_url}/public/calendar_appointments/gottesdienste"
+    plan_url = f"{app_url}/download/plan_months"
+    plan_form = get_plan_form()
+    senders = {
+        "iframe": lambda session: session.get(
+            iframe_url, timeout=120, allow_redirects=False
+        ),
+        "plan": lambda session: session.post(
+            plan_url, data=plan_form, timeout=120, allow_redirects=False
+        ),
+    }
+    sessions = {name: [] for name in CLIENTS}
+    for name, number_of_clients in CLIENTS.items():
+        for _ in range(number_of_clients):
+            session = requests.Session()
+            # retry like browsers if a recycled worker closed a kept-alive connection
+            session.mount(
+                "http://",
+                HTTPAdapter(max_retries=Retry(total=1, allowed_methods=["GET"])),
+            )
+            if name == "plan":
+                login(session, app_url, stand_in_url)
+            sessions[name].append(session)
+
+    deadline = time.monotonic() + duration
+    with ThreadPoolExecutor(max_workers=sum(CLIENTS.values())) as executor:
+        futures = {
+            name: [
+                executor.submit(run_client, senders[name], deadline, session)
+                for session in sessions[name]
+            ]
+            for name in CLIENTS
+        }
+        samples = {}
+        errors = {}
+        for name, route_futures in futures.items():
+            samples[name] = []
+            errors[name] = 0
+            for future in route_futures:
+                client_samples, client_errors = future.result()
+                samples[name] += client_samples
+                errors[name] += client_errors
+
+    results = {
+        name: get_statistics(samples[name], errors[name], duration) for name in CLIENTS
+    }
+    results["iframe_during_plan"] = get_statistics(
+        [
+            (start, end)
+            for start, end in samples["iframe"]
+            if any(
+                plan_start <= start < plan_end
+                for plan_start, plan_end in samples["plan"]
+            )
+        ],
+        errors=0,
+        duration=duration,
+    )
+    return results
+
+
+def format_seconds(value: float | None) -> str:
+    """Milliseconds as text - n/a if no value exists."""
+    return "n/a" if value is None else f"{value * 1000:.0f}ms"
+
+
+def main(duration: float, latency: float) -> None:
+    """Print throughput and latency of each route for each server profile."""
+    stand_in = start_stand_in(latency)
+    stand_in_url = f"http://127.0.0.1:{stand_in.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot_config = Path(directory) / "snapshots.json"
+        snapshot_config.write_text(json.dumps(SNAPSHOT_VARIANTS), encoding="utf-8")
+        env = {
+            **os.environ,
+            "CT_DOMAIN": stand_in_url,
+            "CT_TOKEN": "token",
+            "SNAPSHOT_CONFIG": str(snapshot_config),
+            "SNAPSHOT_DIRECTORY": str(Path(directory) / "snapshots"),
+            "GUNICORN_ACCESSLOG": "",
+        }
+
+        for profile, profile_args in SERVER_PROFILES.items():
+            port = get_free_port()
+            process = start_app(profile_args, port=port, env=env)
+            try:
+                results = run_load(
+                    app_url=f"http://127.0.0.1:{port}",
+                    stand_in_url=stand_in_url,
+                    duration=duration,
+                )
+            finally:
+                process.terminate()
+                process.wait(timeout=60)
+
+            for name, result in results.items():
+                # iframe_during_plan is a subset of the iframe requests
+                number_of_clients = CLIENTS.get(name, CLIENTS["iframe"])
+                print(  # noqa: T201
+                    f"{profile:16} {name:18} {number_of_clients:3} clients"
+                    f" {result['throughput']:8.1f} requests/s"
+                    f" median {format_seconds(result['median']):>7}"
+                    f" p95 {format_seconds(result['p95']):>7}"
+                    f" {result['errors']:5} errors"
+                )
+
+    stand_in.shutdown()
+    for request, count in UNHANDLED_REQUESTS.most_common():
+        print(f"unhandled stand-in request {request} ({count}x)")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main(
+        duration=float(sys.argv[1]) if len(sys.argv) > 1 else 20,
+        latency=float(sys.argv[2]) if len(sys.argv) > 2 else 0.1,  # noqa: PLR2004
+    )
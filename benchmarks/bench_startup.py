@@ -0,0 +1,62 @@
+"""Measure the import time each started gunicorn worker pays for the app.
+
+Usage: python -m benchmarks.bench_startup [module] [number_of_modules]
+
+The module is imported in a fresh interpreter using python -X importtime
+and the slowest imports are printed with their cumulative time.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_DIRECTORY = Path(__file__).parents[1]
+APP_MODULE = "church_web_helper.app"
+
+
+def get_import_times(module: str = APP_MODULE) -> dict[str, int]:
+    """Cumulative import time of all modules imported by a fresh interpreter.
+
+    Args:
+        module: name of the module which should be imported
+
+    Returns:
+        dict of module name and cumulative import time in microseconds
+    """
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=REPO_DIRECTORY,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if cumulative.strip().isdigit():
+            import_times[name.strip()] = int(cumulative)
+    return import_times
+
+
+def main(module: str, number_of_modules: int) -> None:
+    """Print total import time and the slowest imports."""
+    import_times = get_import_times(module)
+    print(  # noqa: T201
+        f"{module} {import_times[module] / 1000:.0f}ms"
+        f" {len(import_times)} modules imported"
+    )
+    for name, cumulative in sorted(
+        import_times.items(), key=lambda item: item[1], reverse=True
+    )[1 : number_of_modules + 1]:
+        print(f"{cumulative / 1000:8.1f}ms {name}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main(
+        module=sys.argv[1] if len(sys.argv) > 1 else APP_MODULE,
+        number_of_modules=int(sys.argv[2]) if len(sys.argv) > 2 else 15,  # noqa: PLR2004
+    )
@@ -0,0 +1,66 @@
+"""Compare vCard serialization throughput of vobject and the fast writer.
+
+Usage: python -m benchmarks.bench_vcard [number_of_persons]
+"""
+
+import random
+import sys
+import time
+
+import vobject
+
+from church_web_helper.export_vcard import VCARD_PHONE_FIELDS, format_person_vcard
+
+
+def generate_persons(number_of_persons: int, seed: int = 1) -> list[dict]:
+    """Synthetic persons with randomly missing phone numbers."""
+    randomizer = random.Random(seed)  # noqa: S311
+    return [
+        {
+            "id": person_id,
+            "firstName": f"Vorname{person_id}",
+            "lastName": randomizer.choice(["Müller", "Schmidt, Dr.", "Weiß"]),
+            **{
+                field: f"07442 {randomizer.randint(1000, 9999)}"
+                for field in VCARD_PHONE_FIELDS
+                if randomizer.random() > 0.4  # noqa: PLR2004
+            },
+        }
+        for person_id in range(number_of_persons)
+    ]
+
+
+def serialize_vobject(person: dict) -> str:
+    """Serialization like used by ct_contacts before the fast writer."""
+    vcard = vobject.vCard()
+    vcard.add("fn")
+    vcard.fn.value = f"{person['firstName']} {person['lastName']}"
+    for field, tel_type in VCARD_PHONE_FIELDS.items():
+        tel = vcard.add("tel")
+        tel.value = person.get(field) or ""
+        tel.type_param = tel_type
+    return vcard.serialize()
+
+
+def main(number_of_persons: int) -> None:
+    """Print persons per second of both serializers."""
+    persons = generate_persons(number_of_persons)
+
+    results = {}
+    for name, serialize in [
+        ("vobject", serialize_vobject),
+        ("format_person_vcard", format_person_vcard),
+    ]:
+        start = time.perf_counter()
+        size = sum(len(serialize(person)) for person in persons)
+        duration = time.perf_counter() - start
+        results[name] = duration
+        print(  # noqa: T201
+            f"{name:20} {duration:7.3f}s {number_of_persons / duration:10.0f} persons/s"
+            f" {size / 1024:8.0f} KiB"
+        )
+    print(f"speedup {results['vobject'] / results['format_person_vcard']:.1f}x")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -2,33 +2,34 @@
 
 import ast
 import base64
+import functools
 import io
+import itertools
 import json
-import locale
 import logging
 import logging.config
 import os
-import re
 import urllib
+from collections.abc import Hashable, Iterator
 from datetime import datetime, time
+from http import HTTPStatus
 from pathlib import Path
 
-import pandas as pd
 import pytz
+import requests
 import toml
-import vobject
 from churchtools_api.churchtools_api import ChurchToolsApi as CTAPI
 from communi_api.churchToolsActions import (
     create_event_chats,
     delete_event_chats,
-    generate_group_name_for_event,
-    get_x_day_event_ids,
 )
 from communi_api.communi_api import CommuniApi
 from dateutil.relativedelta import relativedelta
 from flask import (
     Flask,
     Response,
+    abort,
+    jsonify,
     redirect,
     render_template,
     request,
@@ -36,22 +37,70 @@ from flask import (
     session,
     url_for,
 )
-from matplotlib import pyplot as plt
 
-from church_web_helper.export_docx import get_plan_months_docx
-from church_web_helper.export_xlsx import get_plan_months_xlsx
+from church_web_helper.cache import (
+    SQLiteCache,
+    TieredCache,
+    TTLCache,
+    make_cache_key,
+)
+from church_web_helper.cached_api import API_CACHE, CACHE_STATISTICS, CachedApi
+from church_web_helper.communi_posts import (
+    get_communi_groups,
+    get_post,
+    get_posts_page,
+    repost_posts_to_communi,
+    repost_to_communi,
+)
+from church_web_helper.communi_sync import (
+    EVENT_CHAT_ACTIONS,
+    PrefetchedEventsApi,
+    get_event_chat_sync_candidates,
+    get_events_in_window,
+    get_group_index,
+    get_group_names_for_events,
+    sync_event_chats,
+)
+from church_web_helper.ct_mirror import ChurchToolsMirror, MirroredApi
+from church_web_helper.date_formatting import format_date
+from church_web_helper.export_feeds import (
+    ICS_MIMETYPE,
+    JSON_MIMETYPE,
+    iter_calendar_ics,
+    iter_calendar_json,
+)
+from church_web_helper.export_vcard import (
+    VCARD_MIMETYPE,
+    ContactSyncStore,
+    get_contact_changes,
+    iter_persons,
+    iter_vcards,
+)
 from church_web_helper.helper import (
     deduplicate_df_index_with_lists,
     extract_relevant_calendar_appointment_shortname,
+    get_calendar_appointments_entries,
+    get_event_agenda,
+    get_event_agendas,
     get_primary_resource,
     get_special_day_name,
 )
+from church_web_helper.masterdata import (
+    get_calendars,
+    get_event_masterdata,
+    get_resource_masterdata,
+)
 from church_web_helper.service_information_transformation import (
     get_group_name_services,
     get_service_assignment_lastnames_or_unknown,
     get_title_name_services,
     replace_special_services_with_service_shortnames,
 )
+from church_web_helper.snapshots import (
+    SnapshotPublisher,
+    get_service_ct_api,
+    load_snapshot_variants,
+)
 from flask_session import Session
 
 config_file = Path("logging_config.json")
@@ -72,18 +121,38 @@ config["CT_DOMAIN"] = os.environ.get("CT_DOMAIN", "")
 
 app.config["COMMUNI_SERVER"] = os.environ.get("COMMUNI_SERVER", "")
 
-if "VERSION" in os.environ:
-    config["VERSION"] = os.environ["VERSION"]
-else:
-    with open("pyproject.toml") as f:
-        pyproject_data = toml.load(f)
-    config["VERSION"] = pyproject_data["tool"]["poetry"]["version"]
-
 app.config.update(config)
-locale.setlocale(locale.LC_TIME, "de_DE.UTF-8")
 
 Session(app)
 
+# masterdata rarely changes - the SQLite tier is shared by all gunicorn workers
+MASTERDATA_CACHE_PATH = Path(
+    os.environ.get("MASTERDATA_CACHE_PATH", "cache/masterdata.sqlite")
+)
+MASTERDATA_CACHE = TieredCache(
+    [
+        TTLCache(maxsize=64, ttl=60),
+        SQLiteCache(
+            MASTERDATA_CACHE_PATH,
+            maxsize=1024,
+            ttl=int(os.environ.get("MASTERDATA_CACHE_TTL", str(6 * 60 * 60))),
+        ),
+    ]
+)
+
+
+def get_session_user_id() -> Hashable:
+    """ChurchTools user of the current session used to key cached responses.
+
+    Sessions created before the user id was stored fall back to the session id
+    """
+    return session.get("ct_user_id", session.sid)
+
+
+def get_masterdata_cache_key() -> tuple:
+    """Domain and user of the current session used to key cached masterdata."""
+    return (session["ct_api"].domain, get_session_user_id())
+
 
 @app.route("/")
 def index():
@@ -96,7 +165,13 @@ def check_session() -> Response | None:
 
     If not a redirect to respective login pages should be executed
     """
-    if request.endpoint not in ("login_ct", "login_communi"):
+    if request.endpoint not in (
+        "login_ct",
+        "login_communi",
+        "public_calendar_appointments",
+        "public_calendar_feed",
+        "static",
+    ):
         # Check CT Login
         if not session.get("ct_api") or not session["ct_api"].who_am_i():
             return redirect(url_for("login_ct"))
@@ -115,8 +190,13 @@ def login_ct() -> str:
         password = request.form["ct_password"]
         ct_domain = request.form["ct_domain"]
 
-        session["ct_api"] = CTAPI(ct_domain, ct_user=user, ct_password=password)
-        if session["ct_api"].who_am_i() is not False:
+        ct_api = CTAPI(ct_domain, ct_user=user, ct_password=password)
+        ct_user = ct_api.who_am_i()
+        session["ct_api"] = CachedApi(
+            ct_api, user_id=ct_user["id"] if ct_user else None
+        )
+        if ct_user is not False:
+            session["ct_user_id"] = ct_user["id"]
             app.config["CT_DOMAIN"] = ct_domain
             return redirect("/main")
 
@@ -157,9 +237,41 @@ def login_communi() -> str:
     )
 
 
+@functools.cache
+def get_version() -> str:
+    """Version of the app - read from pyproject.toml on first use if not set in env."""
+    if "VERSION" in os.environ:
+        return os.environ["VERSION"]
+    with Path("pyproject.toml").open(encoding="utf-8") as f_in:
+        pyproject_data = toml.load(f_in)
+    return pyproject_data["tool"]["poetry"]["version"]
+
+
+@app.route("/ct/masterdata/refresh", methods=["POST"])
+def refresh_masterdata() -> Response:
+    """Remove cached masterdata e.g. after calendars or services were changed.
+
+    Cached responses of CachedApi are removed as well.
+    Other workers might keep their in-process copy for up to a minute
+    """
+    MASTERDATA_CACHE.clear()
+    API_CACHE.clear()
+    logger.info("masterdata cache cleared")
+    return redirect(request.referrer or url_for("main"))
+
+
+@app.route("/ct/cache_statistics")
+def ct_cache_statistics() -> Response:
+    """JSON endpoint with cache hits and misses of CachedApi by method.
+
+    Counts are kept per worker process since it was started
+    """
+    return jsonify(CACHE_STATISTICS.as_dict())
+
+
 @app.route("/main")
 def main() -> str:
-    return render_template("main.html", version=app.config["VERSION"])
+    return render_template("main.html", version=get_version())
 
 
 @app.route("/test")
@@ -168,12 +280,15 @@ def test() -> str:
     return render_template("test.html", message=test)
 
 
-@app.route("/communi/events")
+@app.route("/communi/events", methods=["GET", "POST"])
 def communi_events() -> Response | str:
     """This page is used to admin communi groups based on churchtools planning information.
 
-    It will list all events from past 14 and future 15 days and show their link if they exist
+    It will list all events from past 7 and future 25 days and show their link if they exist
+    events and communi groups are retrieved once and matched by group name
     if event_id and action exist as GET param respective delete or update action will be executed
+    if bulk_action (create or delete) and event_ids exist as POST param
+    all selected events which (don't) have a group will be changed concurrently
     """
     event_id = request.args.get("event_id")
     action = request.args.get("action")
@@ -186,67 +301,88 @@ def communi_events() -> Response | str:
         delete_event_chats(session["ct_api"], session["communi_api"], [event_id])
 
     reference_day = datetime.today()
-    event_ids_past = get_x_day_event_ids(session["ct_api"], reference_day, -7)
-    event_ids_future = get_x_day_event_ids(session["ct_api"], reference_day, 25)
-
-    event_ids = event_ids_past + event_ids_future
+    ct_events = get_events_in_window(
+        ct_api=session["ct_api"], reference_day=reference_day
+    )
     # TODO unfinished code! #3 - keep relevant only ...
 
+    group_names = get_group_names_for_events(ct_api=session["ct_api"], events=ct_events)
+    group_index = get_group_index(communi_api=session["communi_api"])
+
+    results = {}
+    message = None
+    error = None
+    bulk_action = request.form.get("bulk_action") if request.method == "POST" else None
+    if bulk_action and bulk_action not in EVENT_CHAT_ACTIONS:
+        error = f"Unknown bulk action {bulk_action}"
+    elif bulk_action:
+        selected_event_ids = [
+            int(event_id) for event_id in request.form.getlist("event_ids")
+        ]
+        candidate_event_ids = get_event_chat_sync_candidates(
+            event_ids=selected_event_ids,
+            group_names=group_names,
+            group_index=group_index,
+            action=bulk_action,
+        )
+        results = dict.fromkeys(selected_event_ids, "unchanged")
+        results.update(
+            sync_event_chats(
+                ct_api=PrefetchedEventsApi(ct_api=session["ct_api"], events=ct_events),
+                communi_api=session["communi_api"],
+                event_ids=candidate_event_ids,
+                action=bulk_action,
+            )
+        )
+        message = f"{bulk_action} executed for {len(candidate_event_ids)} events"
+        group_index = get_group_index(communi_api=session["communi_api"])
+
     events = []
-    for id in event_ids:
-        event = session["ct_api"].get_events(eventId=id)[0]
+    for event in ct_events:
         startdate = datetime.strptime(event["startDate"], "%Y-%m-%dT%H:%M:%S%z")
-        datetext = startdate.astimezone().strftime("%a %b %d\t%H:%M")
-
-        group_name = generate_group_name_for_event(session["ct_api"], id)
-        group = session["communi_api"].getGroups(name=group_name)
-        group_id = None if len(group) == 0 else group["id"]
+        datetext = format_date(startdate.astimezone(), "%a %b %d\t%H:%M")
 
         event_short = {
-            "id": id,
+            "id": event["id"],
             "date": datetext,
             "caption": event["name"],
-            "group_id": group_id,
+            "group_id": group_index.get(group_names[event["id"]]),
+            "upcoming": startdate >= reference_day.astimezone(),
+            "result": results.get(event["id"]),
         }
         events.append(event_short)
 
-    if request.method == "GET":
-        return render_template("communi_events.html", events=events, test=None)
-
-    if request.method == "POST" and "event_id" not in request.form:
-        redirect("/communi/events")
-        return None
-    return None
+    return render_template(
+        "communi_events.html", events=events, test=None, message=message, error=error
+    )
 
 
 @app.route("/download/events", methods=["GET", "POST"])
 def download_events() -> str:
+    """Page which is used to download the agenda of an event.
+
+    All upcoming events are listed with a single request.
+    Availability of agendas is checked lazily using download_events_agendas
+    """
     if request.method == "GET":
-        session["serviceGroups"] = session["ct_api"].get_event_masterdata(
-            resultClass="serviceGroups", returnAsDict=True
+        session["serviceGroups"] = get_event_masterdata(
+            ct_api=session["ct_api"],
+            cache=MASTERDATA_CACHE,
+            cache_key=get_masterdata_cache_key(),
+            result_class="serviceGroups",
+            return_as_dict=True,
         )
 
         events_temp = session["ct_api"].get_events()
-        # events_temp.extend(session['ct_api'].get_events(eventId=2147))  # debugging
-        # events_temp.extend(session['ct_api'].get_events(eventId=2129))  #
-        # debugging
         logger.debug(f"{len(events_temp)} Events loaded")
 
         event_choices = []
-        session["event_agendas"] = {}
-        session["events"] = {}
-
         for event in events_temp:
-            agenda = session["ct_api"].get_event_agenda(event["id"])
-            if agenda is not None:
-                session["event_agendas"][event["id"]] = agenda
-                session["events"][event["id"]] = event
-                startdate = datetime.strptime(event["startDate"], "%Y-%m-%dT%H:%M:%S%z")
-                datetext = startdate.astimezone().strftime("%a %b %d\t%H:%M")
-                event = {"id": event["id"], "label": datetext + "\t" + event["name"]}
-                event_choices.append(event)
-
-        logger.debug(f"{len(events_temp)} Events kept because schedule exists")
+            startdate = datetime.strptime(event["startDate"], "%Y-%m-%dT%H:%M:%S%z")
+            datetext = format_date(startdate.astimezone(), "%a %b %d\t%H:%M")
+            event_choices.append(
+                {"id": event["id"], "label": datetext + "\t" + event["name"]}
+            )
 
         return render_template(
             "download_events.html",
@@ -259,8 +395,15 @@ def download_events() -> str:
             return redirect(url_for("download_events"))
         event_id = int(request.form["event_id"])
         if "submit_docx" in request.form:
-            event = session["events"][event_id]
-            agenda = session["event_agendas"][event_id]
+            agenda = get_event_agenda(
+                ct_api=session["ct_api"],
+                event_id=event_id,
+                user_id=get_session_user_id(),
+            )
+            if agenda is None:
+                return render_template(
+                    "main.html", error=f"No agenda available for event {event_id}"
+                )
 
             selectedServiceGroups = {
                 key: value
@@ -268,19 +411,25 @@ def download_events() -> str:
                 if f"service_group {key}" in request.form
             }
 
-            document = session["ct_api"].get_event_agenda_docx(
+            from church_web_helper.export_docx import (  # noqa: PLC0415
+                DOCX_MIMETYPE,
+                get_event_agenda_docx_bytes,
+            )
+
+            document = get_event_agenda_docx_bytes(
                 # TODO@bensteUEM: https://github.com/bensteUEM/ChurchWebHelper/issues/47 .
-                agenda,
-                serviceGroups=selectedServiceGroups,
-                excludeBeforeEvent=False,
+                ct_api=session["ct_api"],
+                agenda=agenda,
+                service_groups=selectedServiceGroups,
+                user_id=get_session_user_id(),
+                exclude_before_event=False,
             )
-            filename = agenda["name"] + ".docx"
-            document.save(filename)
-            response = send_file(
-                path_or_file=os.getcwd() + "/" + filename, as_attachment=True
+            return send_file(
+                io.BytesIO(document),
+                as_attachment=True,
+                download_name=agenda["name"] + ".docx",
+                mimetype=DOCX_MIMETYPE,
             )
-            os.remove(filename)
-            return response
 
         if "submit_communi" in request.form:
             error = "Communi Group update not yet implemented"
@@ -290,6 +439,31 @@ def download_events() -> str:
     return None
 
 
+@app.route("/download/events/agendas")
+def download_events_agendas() -> Response:
+    """JSON endpoint which checks which events have an agenda.
+
+    Use get param event_ids to specify a , separated list of event IDs
+    Agendas are requested concurrently and cached for subsequent downloads
+    """
+    event_ids = [
+        int(event_id)
+        for event_id in request.args.get("event_ids", "").split(",")
+        if event_id
+    ]
+    agendas = get_event_agendas(
+        ct_api=session["ct_api"], event_ids=event_ids, user_id=get_session_user_id()
+    )
+    logger.debug(
+        "%s/%s Events have an agenda",
+        len([agenda for agenda in agendas.values() if agenda is not None]),
+        len(event_ids),
+    )
+    return jsonify(
+        {str(event_id): agenda is not None for event_id, agenda in agendas.items()}
+    )
+
+
 @app.route("/download/plan_months", methods=["GET", "POST"])
 def download_plan_months() -> str:
     # default params are set ELKW1610.krz.tools specific and must be adjusted in case a different CT instance is used
@@ -316,11 +490,20 @@ def download_plan_months() -> str:
     }
     logger.debug("defaults defined")
 
+    cache_key = get_masterdata_cache_key()
     available_calendars = {
-        cal["id"]: cal["name"] for cal in session["ct_api"].get_calendars()
+        cal["id"]: cal["name"]
+        for cal in get_calendars(
+            ct_api=session["ct_api"], cache=MASTERDATA_CACHE, cache_key=cache_key
+        )
     }
     logger.debug("retrieved available calendars len=%s", len(available_calendars))
-    resources = session["ct_api"].get_resource_masterdata(resultClass="resources")
+    resources = get_resource_masterdata(
+        ct_api=session["ct_api"],
+        result_class="resources",
+        cache=MASTERDATA_CACHE,
+        cache_key=cache_key,
+    )
     logger.debug("retrieved available resources len=%s", len(resources))
 
     # resource_types = session["ct_api"].get_resource_masterdata(result_type="resourceTypes") # Check your Resource Types IDs here for customization
@@ -336,7 +519,9 @@ def download_plan_months() -> str:
         "selected available resources %s/%s", len(available_resources), len(resources)
     )
 
-    event_masterdata = session["ct_api"].get_event_masterdata()
+    event_masterdata = get_event_masterdata(
+        ct_api=session["ct_api"], cache=MASTERDATA_CACHE, cache_key=cache_key
+    )
     # service_groups = event_masterdata["serviceGroups"] # Check your Service Group IDs here for customization
     available_program_services = {
         service["id"]: service["name"]
@@ -450,7 +635,8 @@ def download_plan_months() -> str:
         to_date = datetime.strptime(request.form["to_date"], "%Y-%m-%d")
         logger.debug("defined time range %s - %s", from_date, to_date)
 
-        calendar_appointments = session["ct_api"].get_calendar_appointments(
+        ct_api = get_mirrored_api(session["ct_api"], user_id=get_session_user_id())
+        calendar_appointments = ct_api.get_calendar_appointments(
             calendar_ids=selected_calendars, from_=from_date, to_=to_date
         )
 
@@ -474,7 +660,7 @@ def download_plan_months() -> str:
                 ).astimezone()
             logger.debug("converted start date as %s", item["startDate"])
 
-            event = session["ct_api"].get_event_by_calendar_appointment(
+            event = ct_api.get_event_by_calendar_appointment(
                 appointment_id=item["id"], start_date=item["startDate"]
             )
 
@@ -485,9 +671,9 @@ def download_plan_months() -> str:
                 "shortName": extract_relevant_calendar_appointment_shortname(
                     item["caption"] + (item["subtitle"] if item["subtitle"] else "")
                 ),
-                "shortDay": item["startDate"].strftime("%a %d.%m"),
+                "shortDay": format_date(item["startDate"], "%a %d.%m"),
                 "specialDayName": get_special_day_name(
-                    ct_api=session["ct_api"],
+                    ct_api=ct_api,
                     special_name_calendar_ids=DEFAULTS.get("special_day_calendar_ids"),
                     date=item["startDate"],
                 ),
@@ -502,7 +688,7 @@ def download_plan_months() -> str:
                 calendar_ids=selected_calendars,
                 appointment_id=item["id"],
                 relevant_date=item["startDate"],
-                api=session["ct_api"],
+                api=ct_api,
                 considered_program_services=selected_program_services,
                 considered_groups=DEFAULTS.get("selected_title_prefix_groups"),
             )
@@ -513,7 +699,7 @@ def download_plan_months() -> str:
                 calendar_ids=selected_calendars,
                 appointment_id=item["id"],
                 relevant_date=item["startDate"],
-                api=session["ct_api"],
+                api=ct_api,
                 considered_music_services=selected_music_services,
                 considered_grouptype_role_ids=DEFAULTS.get("grouptype_role_id_leads"),
             )
@@ -524,7 +710,7 @@ def download_plan_months() -> str:
                 get_primary_resource(
                     appointment_id=item["id"],
                     relevant_date=item["startDate"],
-                    ct_api=session["ct_api"],
+                    ct_api=ct_api,
                     considered_resource_ids=selected_resources,
                 )
             )
@@ -552,7 +738,7 @@ def download_plan_months() -> str:
             for service_name in ["predigt", "organist", "musikteam", "taufe"]:
                 data[f"{service_name}_lastname"] = (
                     get_service_assignment_lastnames_or_unknown(
-                        ct_api=session["ct_api"],
+                        ct_api=ct_api,
                         service_name=service_name,
                         event_id=event["id"],
                         config=DEFAULTS,
@@ -584,7 +770,7 @@ def download_plan_months() -> str:
             abendmahl = []
             for service_id in DEFAULTS.get("abendmahl_service_ids", []):
                 abendmahl.extend(
-                    session["ct_api"].get_persons_with_service(
+                    ct_api.get_persons_with_service(
                         eventId=event["id"], serviceId=service_id
                     )
                 )
@@ -593,6 +779,8 @@ def download_plan_months() -> str:
 
             entries.append(data)
 
+        import pandas as pd  # noqa: PLC0415
+
         df_raw: pd.DataFrame = pd.DataFrame(entries)
         df_data_pivot = (
             df_raw.pivot_table(
@@ -643,8 +831,12 @@ def download_plan_months() -> str:
 
         if action == "DOCx Document Download":
             logger.debug("Preparing Download as DOCx")
+            from church_web_helper.export_docx import (  # noqa: PLC0415
+                get_plan_months_docx,
+            )
+
             document = get_plan_months_docx(df_data, from_date=from_date)
-            filename = f"Monatsplan_{from_date.strftime('%Y_%B')}.docx"
+            filename = f"Monatsplan_{format_date(from_date, '%Y_%B')}.docx"
             document.save(filename)
             response = send_file(
                 path_or_file=os.getcwd() + "/" + filename, as_attachment=True
@@ -654,7 +846,11 @@ def download_plan_months() -> str:
 
         if action == "Excel Download":
             logger.debug("Preparing Download as Excel")
-            filename = f"Monatsplan_{from_date.strftime('%Y_%B')}.xlsx"
+            from church_web_helper.export_xlsx import (  # noqa: PLC0415
+                get_plan_months_xlsx,
+            )
+
+            filename = f"Monatsplan_{format_date(from_date, '%Y_%B')}.xlsx"
             workbook = get_plan_months_xlsx(
                 df_data, from_date=from_date, filename=filename
             )
@@ -667,33 +863,44 @@ def download_plan_months() -> str:
     return None
 
 
-@app.route("/ct/calendar_appointments")
-def ct_calendar_appointments() -> str:
-    """Page which can be used to display ChurchTools calendar appointments for IFrame use.
+# rendered calendar appointments keyed by ct domain, user and normalized GET params
+CALENDAR_APPOINTMENTS_CACHE = TTLCache(maxsize=64, ttl=5 * 60)
+CALENDAR_APPOINTMENTS_MAX_AGE = 60
 
-    Use get param calendar_id=2 or similar to define a calendar
-    Use get param days to specify the number of days
-    Use optional get param services to specify a , separated list of service IDs to include
-    use optional get param special_name to specify calendar id for special day names - using first event on that day multiple calendars can be specified using
+
+def get_calendar_appointments_params(args: dict) -> dict:
+    """Normalize GET params used for ct_calendar_appointments.
+
+    Missing params are replaced by defaults.
+    The result can be used as cache key because equal requests result in equal dicts
+
+    Args:
+        args: GET params of the request
+
+    Returns:
+        dict with calendar_id, days, services, special_name_calendar_ids and hide_menu
     """
     # default params if not specified
-    DEFAULT_CALENDAR_ID = 2
-    DEFAULT_DAYS = 14
-    DEFAULT_SERVICE_ID = [1]
-    DEFAULT_HIDE_MENU = False
-
-    calendar_id = request.args.get("calendar_id")
-    days = request.args.get("days")
-    if "hide_menu" in request.args:
-        hide_menu = ast.literal_eval(request.args.get("hide_menu"))
-
-    if services := request.args.get("services"):
-        services = request.args.get("services").split(",")
-        services = [int(num) for num in services]
-
-    if special_name_calendar_ids := request.args.get("special_names"):
-        special_name_calendar_ids = request.args.get("special_names").split(",")
-        special_name_calendar_ids = [int(num) for num in special_name_calendar_ids]
+    DEFAULT_CALENDAR_ID = 2  # noqa: N806
+    DEFAULT_DAYS = 14  # noqa: N806
+    DEFAULT_SERVICE_ID = [1]  # noqa: N806
+    DEFAULT_HIDE_MENU = False  # noqa: N806
+
+    calendar_id = args.get("calendar_id")
+    days = args.get("days")
+    hide_menu = (
+        bool(ast.literal_eval(args.get("hide_menu")))
+        if "hide_menu" in args
+        else DEFAULT_HIDE_MENU
+    )
+
+    if services := args.get("services"):
+        services = sorted({int(num) for num in services.split(",")})
+
+    if special_name_calendar_ids := args.get("special_names"):
+        special_name_calendar_ids = sorted(
+            {int(num) for num in special_name_calendar_ids.split(",")}
+        )
     else:
         special_name_calendar_ids = []
 
@@ -703,6 +910,116 @@ def ct_calendar_appointments() -> str:
         services = DEFAULT_SERVICE_ID
         hide_menu = DEFAULT_HIDE_MENU
 
+    return {
+        "calendar_id": int(calendar_id),
+        "days": int(days),
+        "services": services,
+        "special_name_calendar_ids": special_name_calendar_ids,
+        "hide_menu": hide_menu,
+    }
+
+
+def conditional_response(
+    body: str,
+    last_modified: datetime,
+    max_age: int,
+    mimetype: str = "text/html",
+    stale_while_revalidate: int | None = None,
+    etag: str | None = None,
+    *,
+    private: bool = False,
+) -> Response:
+    """Create a response which supports ETag and Last-Modified revalidation.
+
+    Args:
+        body: content of the response
+        last_modified: time the content was generated
+        max_age: seconds browsers and proxies may use the response without revalidation
+        mimetype: mimetype of the response
+        stale_while_revalidate: optional seconds an outdated response may be used
+            while it is revalidated in the background
+        etag: optional precomputed etag - defaults to hash of body
+        private: content of a user session which must not be stored by proxies
+
+    Returns:
+        response - with status 304 if the request already has the current version
+    """
+    response = Response(body, mimetype=mimetype)
+    response.set_etag(etag or make_cache_key(body))
+    response.last_modified = last_modified
+    if private:
+        response.cache_control.private = True
+    else:
+        response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    if stale_while_revalidate is not None:
+        response.cache_control["stale-while-revalidate"] = stale_while_revalidate
+    return response.make_conditional(request)
+
+
+@app.route("/ct/calendar_appointments")
+def ct_calendar_appointments() -> Response:
+    """Page which can be used to display ChurchTools calendar appointments for IFrame use.
+
+    Use get param calendar_id=2 or similar to define a calendar
+    Use get param days to specify the number of days
+    Use optional get param services to specify a , separated list of service IDs to include
+    use optional get param special_name to specify calendar id for special day names - using first event on that day multiple calendars can be specified using
+
+    Rendered pages are cached by user and normalized params
+    and can be revalidated by browsers using ETag or Last-Modified
+    """
+    params = get_calendar_appointments_params(request.args)
+    cache_key = (
+        session["ct_api"].domain,
+        get_session_user_id(),
+        make_cache_key(params),
+    )
+
+    cached = CALENDAR_APPOINTMENTS_CACHE.get(cache_key)
+    if cached is None:
+        logger.debug("rendering calendar appointments for %s", params)
+        cached = (
+            render_calendar_appointments(
+                ct_api=get_mirrored_api(
+                    session["ct_api"], user_id=get_session_user_id()
+                ),
+                **params,
+            ),
+            datetime.now(pytz.UTC).replace(microsecond=0),
+        )
+        CALENDAR_APPOINTMENTS_CACHE.set(cache_key, cached)
+
+    body, last_modified = cached
+    return conditional_response(
+        body=body,
+        last_modified=last_modified,
+        max_age=CALENDAR_APPOINTMENTS_MAX_AGE,
+        private=True,
+    )
+
+
+def render_calendar_appointments(  # noqa: PLR0913
+    ct_api: CTAPI,
+    calendar_id: int,
+    days: int,
+    services: list[int],
+    special_name_calendar_ids: list[int],
+    hide_menu: bool,  # noqa: FBT001
+) -> str:
+    """Render the calendar appointments page.
+
+    Args:
+        ct_api: initialized churchtools api connection used as datasource
+        calendar_id: calendar to display
+        days: number of days to display starting today
+        services: service IDs of persons which should be added to each appointment
+        special_name_calendar_ids: calendar IDs used for special day names
+        hide_menu: if navbar and param help should be hidden
+
+    Returns:
+        rendered html
+    """
     calendar_appointments_params = urllib.parse.urlencode(
         {
             "calendar_id": calendar_id,
@@ -720,19 +1037,19 @@ def ct_calendar_appointments() -> str:
         ]
     )
 
-    calendar_ids = [int(calendar_id)]
     from_ = datetime.today()
     to_ = from_ + relativedelta(days=int(days))
 
-    appointments = session["ct_api"].get_calendar_appointments(
-        calendar_ids=calendar_ids, from_=from_, to_=to_
+    entries = get_calendar_appointments_entries(
+        ct_api=ct_api,
+        calendar_ids=[int(calendar_id)],
+        from_=from_,
+        to_=to_,
+        services=services,
+        special_name_calendar_ids=special_name_calendar_ids,
     )
 
-    # building a dict with day as key
-    data = {}
-    format_code = "%Y-%m-%dT%H:%M:%S%z"
-
-    if not appointments:
+    if not entries:
         error = "please specify different calendar_id and days as get param"
         return render_template(
             "ct_calendar_appointments.html",
@@ -741,51 +1058,23 @@ def ct_calendar_appointments() -> str:
             calendar_appointments_default_params=calendar_appointments_params,
         )
 
-    for appointment in appointments:
-        caption = appointment["caption"]
-        date = datetime.strptime(appointment["startDate"], format_code)
-
-        day = date.astimezone().strftime("%A %e.%m.%Y")
-
-        # Check if special name is requested with calendar IDs
-        if (
-            isinstance(special_name_calendar_ids, list)
-            and len(special_name_calendar_ids) > 0
-        ):
-            special_name = get_special_day_name(
-                ct_api=session["ct_api"],
-                special_name_calendar_ids=special_name_calendar_ids,
-                date=date,
-            )
-            session["ct_api"].get_calendar_appointments(
-                calendar_ids=special_name_calendar_ids,
-                from_=date,
-                to_=date + relativedelta(days=1),
-            )
-            if special_name is not None and len(special_name) > 0:
-                day = f"{day} ({special_name})"
-
-        time = date.astimezone().strftime("%H:%M")
-
-        if services is not None:
-            event = session["ct_api"].get_event_by_calendar_appointment(
-                appointment["id"], date
-            )
-            available_services = event["eventServices"]
-            persons = [
-                service["name"]
-                for service in available_services
-                if service["serviceId"] in services
-            ]
-            persons = [person for person in persons if person is not None]
-            persons = ", ".join(persons) if len(persons) > 0 else None
-        else:
-            persons = None
+    # building a dict with day as key
+    data = {}
+    for entry in entries:
+        day = format_date(entry["start_date"], "%A %e.%m.%Y")
+        if len(entry["special_day_name"]) > 0:
+            day = f"{day} ({entry['special_day_name']})"
 
         if day not in data:
             data[day] = []
 
-        data[day].append({"time": time, "caption": caption, "persons": persons})
+        data[day].append(
+            {
+                "time": entry["start_date"].strftime("%H:%M"),
+                "caption": entry["caption"],
+                "persons": entry["persons"],
+            }
+        )
 
     return render_template(
         "ct_calendar_appointments.html",
@@ -795,25 +1084,291 @@ def ct_calendar_appointments() -> str:
     )
 
 
-@app.route("/ct/service_workload", methods=["GET", "POST"])
-def ct_service_workload() -> str:
-    available_calendars = {
-        cal["id"]: cal["name"] for cal in session["ct_api"].get_calendars()
-    }
+@app.route("/public/calendar_appointments/<name>")
+def public_calendar_appointments(name: str) -> Response:
+    """Pre-rendered calendar appointments page which can be used for public IFrames.
+
+    Does not require a login because it only serves snapshots
+    which are refreshed in the background by SNAPSHOT_PUBLISHER
+    Use name of a variant configured in SNAPSHOT_CONFIG
+    """
+    path = SNAPSHOT_PUBLISHER.get_path(name) if SNAPSHOT_PUBLISHER else None
+    if path is None or not path.exists():
+        abort(404)
+
+    return conditional_response(
+        body=path.read_text(encoding="utf-8"),
+        last_modified=datetime.fromtimestamp(int(path.stat().st_mtime), tz=pytz.UTC),
+        max_age=SNAPSHOT_PUBLISHER.interval,
+        stale_while_revalidate=SNAPSHOT_STALE_WHILE_REVALIDATE,
+    )
+
+
+def get_mirrored_api(
+    ct_api: CTAPI | None, user_id: Hashable | None
+) -> CTAPI | MirroredApi | None:
+    """Wrap an api connection to read from the local mirror if configured.
+
+    The mirror is synced with the service login and contains everything visible
+    to it, therefore other users are answered by ChurchTools with their own
+    permissions.
+
+    Args:
+        ct_api: api connection which should be wrapped
+        user_id: ChurchTools user of ct_api - None for the service login itself
+
+    Returns:
+        ct_api or wrapper which reads from the mirror
+    """
+    if ct_api is None or CT_MIRROR is None:
+        return ct_api
+    if user_id is not None and user_id != get_service_user_id():
+        return ct_api
+    return MirroredApi(ct_api=ct_api, mirror=CT_MIRROR)
+
+
+def get_service_api() -> CTAPI | None:
+    """Lazy login with CT_DOMAIN and CT_TOKEN used for requests without user session."""
+    global SERVICE_CT_API  # noqa: PLW0603
+    if SERVICE_CT_API is None:
+        SERVICE_CT_API = get_service_ct_api()
+    return SERVICE_CT_API
+
+
+def get_service_user_id() -> int | None:
+    """Id of the ChurchTools user of the service login - None if not available."""
+    global SERVICE_CT_USER_ID  # noqa: PLW0603
+    if SERVICE_CT_USER_ID is None and (service_api := get_service_api()) is not None:
+        user = service_api.who_am_i()
+        if user:
+            SERVICE_CT_USER_ID = user["id"]
+    return SERVICE_CT_USER_ID
+
+
+def render_calendar_appointments_snapshot(params: dict[str, str]) -> str:
+    """Render calendar appointments outside of a request using the service login.
+
+    Args:
+        params: GET params like used for ct_calendar_appointments
+
+    Returns:
+        rendered html
 
-    available_service_categories = {
-        serviceGroup["id"]: serviceGroup["name"]
-        for serviceGroup in session["ct_api"].get_event_masterdata(
-            resultClass="serviceGroups"
+    Raises:
+        RuntimeError: if the service login is not configured
+    """
+    if (service_api := get_service_api()) is None:
+        msg = "CT_DOMAIN and CT_TOKEN are required to render snapshots"
+        raise RuntimeError(msg)
+    with app.test_request_context("/ct/calendar_appointments"):
+        return render_calendar_appointments(
+            ct_api=get_mirrored_api(service_api, user_id=None),
+            **get_calendar_appointments_params(params),
+        )
+
+
+# generated feeds keyed by ct domain, user, normalized GET params and format
+CALENDAR_FEED_CACHE = TTLCache(maxsize=64, ttl=15 * 60)
+CALENDAR_FEED_MAX_AGE = 15 * 60
+CALENDAR_FEED_MIMETYPES = {"ics": ICS_MIMETYPE, "json": JSON_MIMETYPE}
+
+
+@app.route("/ct/calendar_appointments/feed.<any(ics, json):feed_format>")
+def ct_calendar_appointments_feed(feed_format: str) -> Response:
+    """Calendar appointments as iCalendar or JSON feed.
+
+    Uses the same GET params as ct_calendar_appointments
+    """
+    return calendar_appointments_feed(
+        ct_api=get_mirrored_api(session["ct_api"], user_id=get_session_user_id()),
+        params=get_calendar_appointments_params(request.args),
+        feed_format=feed_format,
+        calendar_name=f"calendar {request.args.get('calendar_id', '')}".strip(),
+        user_id=get_session_user_id(),
+    )
+
+
+@app.route("/public/calendar_feeds/<name>.<any(ics, json):feed_format>")
+def public_calendar_feed(name: str, feed_format: str) -> Response:
+    """Calendar appointments feed which can be subscribed without login.
+
+    Only variants configured in SNAPSHOT_CONFIG are available
+    """
+    if SNAPSHOT_PUBLISHER is None or name not in SNAPSHOT_PUBLISHER.variants:
+        abort(404)
+    if (service_api := get_service_api()) is None:
+        abort(
+            HTTPStatus.SERVICE_UNAVAILABLE,
+            description="Public feeds require CT_DOMAIN and CT_TOKEN",
+        )
+    return calendar_appointments_feed(
+        ct_api=get_mirrored_api(service_api, user_id=None),
+        params=get_calendar_appointments_params(SNAPSHOT_PUBLISHER.variants[name]),
+        feed_format=feed_format,
+        calendar_name=name,
+        user_id=None,
+    )
+
+
+def calendar_appointments_feed(
+    ct_api: CTAPI,
+    params: dict,
+    feed_format: str,
+    calendar_name: str,
+    user_id: Hashable | None,
+) -> Response:
+    """Create a cached and streamed calendar appointments feed response.
+
+    Cached feeds are served with conditional GET support.
+    Otherwise the feed is streamed and stored in CALENDAR_FEED_CACHE once complete.
+    Feeds of a user session are cached separately from public feeds
+    and are marked private so that shared proxies don't store them.
+
+    Args:
+        ct_api: initialized churchtools api connection used as datasource
+        params: as returned by get_calendar_appointments_params
+        feed_format: either "ics" or "json"
+        calendar_name: name of the calendar used by calendar apps
+        user_id: user of the session - None for the service account of public feeds
+
+    Returns:
+        response with feed
+    """
+    params = {key: value for key, value in params.items() if key != "hide_menu"}
+    cache_key = (ct_api.domain, user_id, make_cache_key(params), feed_format)
+    private = user_id is not None
+    mimetype = CALENDAR_FEED_MIMETYPES[feed_format]
+
+    if (cached := CALENDAR_FEED_CACHE.get(cache_key)) is not None:
+        body, etag, last_modified = cached
+        return conditional_response(
+            body=body,
+            last_modified=last_modified,
+            max_age=CALENDAR_FEED_MAX_AGE,
+            mimetype=mimetype,
+            etag=etag,
+            private=private,
+        )
+
+    from_ = datetime.today()
+    entries = get_calendar_appointments_entries(
+        ct_api=ct_api,
+        calendar_ids=[params["calendar_id"]],
+        from_=from_,
+        to_=from_ + relativedelta(days=params["days"]),
+        services=params["services"],
+        special_name_calendar_ids=params["special_name_calendar_ids"],
+    )
+    etag = make_cache_key(entries, feed_format)
+    last_modified = datetime.now(pytz.UTC).replace(microsecond=0)
+
+    if feed_format == "ics":
+        chunks = iter_calendar_ics(
+            entries=entries,
+            calendar_name=calendar_name,
+            uid_domain=urllib.parse.urlparse(ct_api.domain).netloc,
+            generated=last_modified,
+        )
+    else:
+        chunks = iter_calendar_json(entries=entries)
+
+    def generate() -> Iterator[str]:
+        body = []
+        for chunk in chunks:
+            body.append(chunk)
+            yield chunk
+        CALENDAR_FEED_CACHE.set(cache_key, ("".join(body), etag, last_modified))
+
+    response = Response(generate(), mimetype=mimetype)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    if private:
+        response.cache_control.private = True
+    else:
+        response.cache_control.public = True
+    response.cache_control.max_age = CALENDAR_FEED_MAX_AGE
+    response = response.make_conditional(request)
+    if response.status_code == HTTPStatus.NOT_MODIFIED:
+        # body is not sent but the feed should still be cached
+        CALENDAR_FEED_CACHE.set(cache_key, ("".join(chunks), etag, last_modified))
+    return response
+
+
+WORKLOAD_HISTORY_DEFAULT_MONTHS = 36
+WORKLOAD_ROLLUP_DIRECTORY = Path(os.environ.get("WORKLOAD_ROLLUP_DIRECTORY", "rollups"))
+CHART_MODES = {"png": "Bilder (Server)", "client": "Interaktiv (Browser)"}
+
+
+def get_service_workload_masterdata(
+    ct_api: CTAPI, cache_key: Hashable
+) -> tuple[dict[int, str], dict[int, str], dict[int, list[dict]]]:
+    """Calendars and services available as filter on the service workload pages.
+
+    Args:
+        ct_api: initialized churchtools api connection used as datasource
+        cache_key: identifies domain and user of cached masterdata
+
+    Returns:
+        dict of calendar id and name,
+        dict of service category id and name,
+        dict of service category id and list of services with id and name
+    """
+    available_calendars = {
+        cal["id"]: cal["name"]
+        for cal in get_calendars(
+            ct_api=ct_api, cache=MASTERDATA_CACHE, cache_key=cache_key
         )
     }
+
+    available_service_categories = get_event_masterdata(
+        ct_api=ct_api,
+        cache=MASTERDATA_CACHE,
+        cache_key=cache_key,
+        result_class="serviceGroups",
+        return_as_dict=True,
+    )
     available_service_types_by_category = {
         key: [] for key in available_service_categories
     }
-    for service in session["ct_api"].get_event_masterdata(resultClass="services"):
+    for service in get_event_masterdata(
+        ct_api=ct_api,
+        cache=MASTERDATA_CACHE,
+        cache_key=cache_key,
+        result_class="services",
+    ):
         available_service_types_by_category[service["serviceGroupId"]].append(
             {"id": service["id"], "name": service["name"]}
         )
+    return (
+        available_calendars,
+        available_service_categories,
+        available_service_types_by_category,
+    )
+
+
+@app.route("/ct/service_workload", methods=["GET", "POST"])
+def ct_service_workload() -> str:
+    from church_web_helper.charts import render_chart_png  # noqa: PLC0415
+    from church_web_helper.service_workload import (  # noqa: PLC0415
+        collect_service_records,
+        filter_persons,
+        format_month_index,
+        get_chart_data,
+        get_cumulative_counts_by_date,
+        get_cumulative_monthly_counts,
+        get_monthly_counts,
+        get_service_type_counts,
+        get_weekly_heatmap,
+        prepare_service_data,
+    )
+
+    (
+        available_calendars,
+        available_service_categories,
+        available_service_types_by_category,
+    ) = get_service_workload_masterdata(
+        ct_api=session["ct_api"], cache_key=get_masterdata_cache_key()
+    )
 
     if request.method == "GET":  # set defaults if case of new request
         DEFAULT_TIMEFRAME_MONTHS = 6
@@ -857,45 +1412,13 @@ def ct_service_workload() -> str:
             for service_type_id in request.form.getlist("selected_service_types")
         ]
 
-    collected_data = []
-    for event in session["ct_api"].get_events(
-        from_=from_date, to_=to_date, include="eventServices"
-    ):
-        if int(event["calendar"]["domainIdentifier"]) in selected_calendars:
-            # filter to service categories only
-            # filtered_services = [event["eventServices"] for event in content if content[0]["calendar"]["domainIdentifier"] in calendar_ids]
-
-            # filter to specific services only
-            for service in event["eventServices"]:
-                exclude = False
-
-                for pattern in EXCLUDE_PATTERNS:
-                    if re.search(pattern, event["name"]):
-                        exclude = True
-                        break
-
-                if exclude:
-                    continue
-
-                collected_data.append(
-                    {
-                        "Datum": datetime.strptime(
-                            event["startDate"], "%Y-%m-%dT%H:%M:%SZ"
-                        ),
-                        "Monat": datetime.strptime(
-                            event["startDate"], "%Y-%m-%dT%H:%M:%SZ"
-                        ).strftime("%m %B"),
-                        "Eventname": event["name"],
-                        "Dienst": service["serviceId"],
-                        "Name": service["name"],
-                    }
-                )
-
-    service_data = pd.DataFrame(collected_data)
-
-    # fallback in case of no data filtered
-    if len(service_data) == 0:
-        service_data = pd.DataFrame(columns=["Datum", "Eventname", "Dienst", "Name"])
+    service_data = collect_service_records(
+        events=get_mirrored_api(
+            session["ct_api"], user_id=get_session_user_id()
+        ).get_events(from_=from_date, to_=to_date, include="eventServices"),
+        selected_calendars=selected_calendars,
+        exclude_patterns=EXCLUDE_PATTERNS,
+    )
 
     # prepare mapping for requested service category and services only
     relevant_map = {}
@@ -904,18 +1427,11 @@ def ct_service_workload() -> str:
             if service_type["id"] in selected_service_types:
                 relevant_map[service_type["id"]] = service_type["name"]
 
-    # modify dataframe for readability
-    service_data["Dienst"] = service_data["Dienst"].replace(relevant_map)
-    filter_only_mapped = ~service_data["Dienst"].apply(lambda x: isinstance(x, int))
-    service_data["Name"] = service_data["Name"].fillna("? noch offen")
-
-    # remove all items that are not mapped (not desired)
-    service_data = service_data.loc[filter_only_mapped]
-    # remove all entries which don't meet minimum service count required
-    filter_names_keep = service_data["Name"].replace(
-        service_data["Name"].value_counts() > MIN_SERVICES_COUNT
+    service_data = prepare_service_data(
+        service_records=service_data,
+        service_names=relevant_map,
+        min_services_count=MIN_SERVICES_COUNT,
     )
-    service_data = service_data.loc[filter_names_keep]
 
     # create list of available names based on filter criteria
     available_persons = list(service_data["Name"].unique())
@@ -928,77 +1444,50 @@ def ct_service_workload() -> str:
             else available_persons
         )
 
-    service_data = service_data[service_data["Name"].isin(selected_persons)]
+    service_data = filter_persons(service_data=service_data, persons=selected_persons)
 
     # prepare event names
     event_names = dict(service_data["Eventname"].value_counts())
 
-    # create plots
-    plots = {}
-    if len(service_data) > 0:
-        # rolling chart
-        df_rolling = (
-            service_data.groupby("Name")["Datum"]
-            .value_counts()
-            .unstack()
-            .fillna(0)
-            .transpose()
-        )
-        df_rolling = df_rolling.rolling(window=len(df_rolling), min_periods=1).sum()
+    chart_mode = request.values.get("chart_mode", "png")
+    if chart_mode not in CHART_MODES:
+        chart_mode = "png"
 
-        ax1 = df_rolling.plot()
-        y_min, y_max = ax1.get_ylim()
-        ax1.set_yticks(range(int(y_min), int(y_max) + 1, 1))
+    if request.values.get("format") == "json":
+        return jsonify(get_chart_data(service_data))
 
-        # Save it to a BytesIO object
-        img = io.BytesIO()
-        plt.savefig(img, format="png")
-        img.seek(0)
+    # create plots
+    plots = {}
+    chart_data = None
+    if len(service_data) > 0 and chart_mode == "client":
+        chart_data = get_chart_data(service_data)
+    elif len(service_data) > 0:
+        df_rolling = get_cumulative_counts_by_date(service_data)
         plots["Kummulierter Verlauf je Person"] = base64.b64encode(
-            img.getvalue()
+            render_chart_png(df_rolling, chart_type="cumulative_line")
         ).decode("utf8")
 
-        # service types by person
-        df_diensttyp = (
-            service_data.groupby(["Dienst"])["Name"]
-            .value_counts()
-            .unstack()
-            .fillna(0)
-            .transpose()
-        )
-        df_diensttyp.plot.bar(stacked=True)
-
-        # Save it to a BytesIO object
-        img = io.BytesIO()
-        plt.savefig(img, format="png")
-        img.seek(0)
+        df_diensttyp = get_service_type_counts(service_data)
         plots["Diensttypen je Person im Gesamtzeitraum"] = base64.b64encode(
-            img.getvalue()
+            render_chart_png(df_diensttyp, chart_type="stacked_bar")
+        ).decode("utf8")
+
+        df_heatmap = get_weekly_heatmap(service_data)
+        plots["Dienste je Person und Kalenderwoche"] = base64.b64encode(
+            render_chart_png(df_heatmap, chart_type="heatmap")
         ).decode("utf8")
 
     # create tables
     tables = {}
     if len(service_data) > 0:
         # prepare tables
-        df_table_1 = (
-            service_data.groupby("Name")["Monat"]
-            .value_counts()
-            .unstack()
-            .fillna(0)
-            .transpose()
-            .sort_index(ascending=True)
-        )
-        df_table_2 = (
-            df_table_1.rolling(window=len(df_table_1), min_periods=1)
-            .sum()
-            .astype(int)
-            .sort_index(ascending=True)
-        )
+        df_table_1 = get_monthly_counts(service_data)
+        df_table_2 = get_cumulative_monthly_counts(df_table_1)
         tables = {
-            "Monatsübersicht": df_table_1.to_html(
+            "Monatsübersicht": format_month_index(df_table_1).to_html(
                 classes="table table-striped text-center", index=True
             ),
-            "Kummulierte Monatsansicht": df_table_2.to_html(
+            "Kummulierte Monatsansicht": format_month_index(df_table_2).to_html(
                 classes="table table-striped text-center", index=True
             ),
         }
@@ -1020,59 +1509,198 @@ def ct_service_workload() -> str:
         selected_service_types=selected_service_types,
         available_persons=available_persons,
         selected_persons=selected_persons,
+        chart_modes=CHART_MODES,
+        chart_mode=chart_mode,
+        chart_data=chart_data,
     )
 
 
+@app.route("/ct/service_workload/history", methods=["GET", "POST"])
+def ct_service_workload_history() -> str:
+    """Monthly service workload of long time ranges based on stored rollups."""
+    import pandas as pd  # noqa: PLC0415
+
+    from church_web_helper.charts import render_chart_png  # noqa: PLC0415
+    from church_web_helper.service_workload import (  # noqa: PLC0415
+        format_month_index,
+        get_cumulative_monthly_counts,
+    )
+    from church_web_helper.workload_rollups import (  # noqa: PLC0415
+        ROLLUP_COLUMNS,
+        WorkloadRollupStore,
+        get_monthly_counts_from_rollups,
+    )
+
+    (
+        available_calendars,
+        available_service_categories,
+        available_service_types_by_category,
+    ) = get_service_workload_masterdata(
+        ct_api=session["ct_api"], cache_key=get_masterdata_cache_key()
+    )
+
+    if request.method == "GET":  # set defaults if case of new request
+        to_month = pd.Period(datetime.now(), freq="M")
+        from_month = to_month - WORKLOAD_HISTORY_DEFAULT_MONTHS + 1
+        min_services_count = 5
+        exclude_patterns = []
+        selected_calendars = list(available_calendars.keys())
+        selected_service_types = []
+    elif request.method == "POST":
+        from_month = pd.Period(request.form["from_month"], freq="M")
+        to_month = pd.Period(request.form["to_month"], freq="M")
+        min_services_count = int(request.form["min_services_count"])
+        exclude_patterns = (
+            ast.literal_eval(request.form["exclude_patterns"])
+            if len(request.form["exclude_patterns"]) > 0
+            else []
+        )
+        selected_calendars = [
+            int(calendar_id)
+            for calendar_id in request.form.getlist("selected_calendars")
+        ]
+        selected_service_types = [
+            int(service_type_id)
+            for service_type_id in request.form.getlist("selected_service_types")
+        ]
+
+    service_names = {
+        service_type["id"]: service_type["name"]
+        for service_types in available_service_types_by_category.values()
+        for service_type in service_types
+        if service_type["id"] in selected_service_types
+    }
+
+    user_id = get_session_user_id()
+    rollup_store = WorkloadRollupStore(
+        directory=WORKLOAD_ROLLUP_DIRECTORY,
+        domain=session["ct_api"].domain,
+        user_id=user_id,
+    )
+    df_rollups = rollup_store.get_rollups(
+        ct_api=get_mirrored_api(session["ct_api"], user_id=user_id),
+        from_month=from_month,
+        to_month=to_month,
+    )
+    error = None
+    if df_rollups is None:
+        error = "Services could not be requested from ChurchTools"
+        df_rollups = pd.DataFrame(columns=["Monat", *ROLLUP_COLUMNS])
+    df_monthly, df_service_types = get_monthly_counts_from_rollups(
+        df_rollups=df_rollups,
+        selected_calendars=selected_calendars,
+        exclude_patterns=exclude_patterns,
+        service_names=service_names,
+        min_services_count=min_services_count,
+    )
+
+    plots = {}
+    tables = {}
+    if len(df_monthly) > 0:
+        df_cumulative = get_cumulative_monthly_counts(df_monthly)
+        df_cumulative.index = df_cumulative.index.to_timestamp()
+        plots["Kummulierter Verlauf je Person"] = base64.b64encode(
+            render_chart_png(df_cumulative, chart_type="cumulative_line")
+        ).decode("utf8")
+        plots["Diensttypen je Person im Gesamtzeitraum"] = base64.b64encode(
+            render_chart_png(df_service_types, chart_type="stacked_bar")
+        ).decode("utf8")
+        tables = {
+            "Monatsübersicht": format_month_index(df_monthly).to_html(
+                classes="table table-striped text-center", index=True
+            ),
+            "Diensttypen je Person": df_service_types.to_html(
+                classes="table table-striped text-center", index=True
+            ),
+        }
+
+    return render_template(
+        "ct_service_workload_history.html",
+        error=error,
+        plots=plots,
+        tables=tables,
+        from_month=from_month,
+        to_month=to_month,
+        min_services_count=min_services_count,
+        exclude_patterns=exclude_patterns,
+        available_calendars=available_calendars,
+        selected_calendars=selected_calendars,
+        available_service_categories=available_service_categories,
+        available_service_types_by_category=available_service_types_by_category,
+        selected_service_types=selected_service_types,
+    )
+
+
+CONTACT_SYNC_DIRECTORY = Path(os.environ.get("CONTACT_SYNC_DIRECTORY", "contact_sync"))
+
+
 @app.route("/ct/contacts", methods=["GET"])
 def ct_contacts() -> str:
     """Vcard export for ChurchTools contacts.
 
     Generates VCards for Name / Phone number for all available persons
+
+    With GET param sync_token only new or changed VCards since the export
+    of this token are returned. The new token is returned as X-Sync-Token header,
+    UIDs of removed persons as comma separated X-Removed-Uids header.
+    An empty, expired or foreign token results in all VCards and X-Full-Sync true,
+    tokens are only valid for the user they were issued to.
     """
     if request.args.get("download"):
-        persons = session["ct_api"].get_persons()
-        vcards = []
-        for person in persons:
-            vcard = vobject.vCard()
-
-            # Add a full name
-            vcard.add("fn")
-            vcard.fn.value = f"{person['firstName']} {person['lastName']}"
-
-            # Add a HOME phone number
-            home_tel = vcard.add("tel")
-            home_tel.value = person.get("phonePrivate")
-            home_tel.type_param = "HOME"
-
-            # Add a WORK phone number
-            work_tel = vcard.add("tel")
-            work_tel.value = person.get("phoneWork")
-            work_tel.type_param = "WORK"
-
-            # Add a CELL phone number
-            cell_tel = vcard.add("tel")
-            cell_tel.value = person.get("mobile")
-            cell_tel.type_param = "CELL"
-
-            vcards.append(vcard)
-
-        # Create an in-memory bytes buffer
-        output = io.BytesIO()
-
-        # Write each vCard to the buffer
-        for vcard in vcards:
-            output.write(vcard.serialize().encode("utf-8"))
-
-        # Set the file pointer to the beginning of the buffer
-        output.seek(0)
-
-        # Send the file as a download
-        return send_file(
-            output,
-            as_attachment=True,
-            download_name="ct_contacts.vcf",
-            mimetype="text/vcard",
+        ct_api = session["ct_api"]
+        uid_domain = urllib.parse.urlparse(ct_api.domain).netloc
+        headers = {"Content-Disposition": "attachment; filename=ct_contacts.vcf"}
+
+        if "sync_token" not in request.args:
+            persons = iter_persons(ct_api=ct_api)
+            try:
+                # first page is requested before the response to report failures
+                first_persons = list(itertools.islice(persons, 1))
+            except requests.HTTPError as error:
+                return render_template(
+                    "ct_contacts.html", error=str(error)
+                ), HTTPStatus.BAD_GATEWAY
+            # generator is consumed after the request - session can't be used inside
+            # failures of later pages abort the stream instead of ending the file
+            return Response(
+                iter_vcards(
+                    itertools.chain(first_persons, persons), uid_domain=uid_domain
+                ),
+                mimetype=VCARD_MIMETYPE,
+                headers=headers,
+            )
+
+        sync_store = ContactSyncStore(
+            directory=CONTACT_SYNC_DIRECTORY,
+            domain=ct_api.domain,
+            user_id=get_session_user_id(),
         )
+        previous_hashes = sync_store.load(request.args["sync_token"])
+        try:
+            vcards, hashes, removed_uids = get_contact_changes(
+                persons=iter_persons(ct_api=ct_api),
+                previous_hashes=previous_hashes or {},
+                uid_domain=uid_domain,
+            )
+        except requests.HTTPError as error:
+            # incomplete persons would be reported as removed - no token is issued
+            return render_template(
+                "ct_contacts.html", error=str(error)
+            ), HTTPStatus.BAD_GATEWAY
+        logger.info(
+            "contact export with %s changed and %s removed of %s persons",
+            len(vcards),
+            len(removed_uids),
+            len(hashes),
+        )
+        headers.update(
+            {
+                "X-Sync-Token": sync_store.save(hashes),
+                "X-Removed-Uids": ",".join(removed_uids),
+                "X-Full-Sync": str(previous_hashes is None).lower(),
+            }
+        )
+        return Response("".join(vcards), mimetype=VCARD_MIMETYPE, headers=headers)
 
     return render_template("ct_contacts.html")
 
@@ -1086,53 +1714,106 @@ def ct_posts() -> str:
 
     Used to assist with reposting entries from ChurchTools to Communi.
     use DEFAULT_GROUP_ID to pre-select your most frequently used group
-    """
-    posts = session.get("ct_api").get_posts()
-    available_groups = {
-        group["id"]: group["title"] for group in session["communi_api"].getGroups()
-    }
 
-    DEFAULT_GROUP_ID = 65021  # noqa: N806
+    Pages of posts and Communi groups are cached per session, see communi_posts.
+    Multiple selected posts can be reposted at once using bulk_repost.
+    The selected group is kept in the session for following requests.
 
-    if request.method == "GET":  # set defaults if case of new request
-        selected_group = DEFAULT_GROUP_ID
+    Request arguments:
+        page: number of the page of posts - starting with 1
+    """
+    ct_api = session["ct_api"]
+    cache_key = (ct_api.domain, session.sid)
+    available_groups = get_communi_groups(
+        communi_api=session["communi_api"], cache_key=cache_key
+    )
 
-    elif request.method == "POST" and (
-        (selected_group := request.form.get("selected_group", type=int))
-        and (post_id := request.form.get("repost_post_id", type=int))
-    ):
-        posts = [post for post in posts if post["id"] == post_id]
-        post = posts[0]
-
-        GROUP_ID = selected_group
-        base_url = re.match(
-            r"^(https?:\/\/[^/]+)(?:.*)", post.get("group").get("apiUrl")
-        ).group(1)
-
-        session["communi_api"].recommendation(
-            group_id=GROUP_ID,
-            title=f"{post.get('title')} ({post['group']['title']})",
-            description=post.get("content"),
-            post_date=datetime.strptime(
-                post.get("publishedDate"), "%Y-%m-%dT%H:%M:%SZ"
-            ).astimezone(),
-            pic_url=post.get("images")[0] if len(post.get("images")) > 0 else "",
-            link=f"{base_url}/posts/{post.get('id')}",
-            is_official=True,
-        )
+    DEFAULT_GROUP_ID = 65021  # noqa: N806
+    page = request.values.get("page", default=1, type=int)
+    selected_group = request.form.get(
+        "selected_group",
+        default=session.get("ct_posts_selected_group", DEFAULT_GROUP_ID),
+        type=int,
+    )
+    session["ct_posts_selected_group"] = selected_group
+    error = None
+    message = None
+    results = {}
 
-        return render_template(
-            "ct_posts.html",
-            posts=posts,
-            available_groups=available_groups,
-            selected_group=selected_group,
-            message=f"Reposted {post.get('title')} to Communi",
+    if request.method == "POST":
+        if post_id := request.form.get("repost_post_id", type=int):
+            post = get_post(
+                ct_api=ct_api, post_id=post_id, cache_key=cache_key, page=page
+            )
+            if post is None:
+                message = f"Post {post_id} is not available"
+            else:
+                repost_to_communi(
+                    communi_api=session["communi_api"],
+                    post=post,
+                    group_id=selected_group,
+                )
+                message = f"Reposted {post.get('title')} to Communi"
+        elif "bulk_repost" in request.form:
+            results = repost_posts_to_communi(
+                ct_api=ct_api,
+                communi_api=session["communi_api"],
+                post_ids=request.form.getlist("post_ids", type=int),
+                group_id=selected_group,
+                cache_key=cache_key,
+                page=page,
+            )
+            failed = sum(result != "reposted" for result in results.values())
+            message = f"Reposted {len(results) - failed} posts to Communi"
+            if failed > 0:
+                message += f", {failed} failed"
+
+    try:
+        posts, number_of_pages = get_posts_page(
+            ct_api=ct_api, page=page, cache_key=cache_key
         )
+    except requests.HTTPError as http_error:
+        error = str(http_error)
+        posts, number_of_pages = [], 1
 
     return render_template(
         "ct_posts.html",
         posts=posts,
-        message=None,
+        page=min(max(page, 1), number_of_pages),
+        number_of_pages=number_of_pages,
+        results=results,
+        error=error,
+        message=message,
         available_groups=available_groups,
         selected_group=selected_group,
     )
+
+
+# background rendering of public pages - requires CT_DOMAIN and CT_TOKEN env variables
+SERVICE_CT_API = None
+SERVICE_CT_USER_ID = None
+SNAPSHOT_STALE_WHILE_REVALIDATE = 24 * 60 * 60
+SNAPSHOT_PUBLISHER = None
+if "SNAPSHOT_CONFIG" in os.environ:
+    SNAPSHOT_PUBLISHER = SnapshotPublisher(
+        directory=Path(os.environ.get("SNAPSHOT_DIRECTORY", "snapshots")),
+        variants=load_snapshot_variants(Path(os.environ["SNAPSHOT_CONFIG"])),
+        render=render_calendar_appointments_snapshot,
+        interval=int(os.environ.get("SNAPSHOT_INTERVAL", 15 * 60)),
+    )
+
+# local copy of ChurchTools data used instead of live requests where possible
+CT_MIRROR = None
+if "CT_MIRROR_PATH" in os.environ and "CT_DOMAIN" in os.environ:
+    CT_MIRROR = ChurchToolsMirror(
+        path=Path(os.environ["CT_MIRROR_PATH"]), domain=os.environ["CT_DOMAIN"]
+    )
+
+# background jobs are started last - they use the module globals defined above
+if CT_MIRROR is not None:
+    CT_MIRROR.start(
+        get_ct_api=get_service_api,
+        interval=int(os.environ.get("CT_MIRROR_INTERVAL", 15 * 60)),
+    )
+if SNAPSHOT_PUBLISHER is not None:
+    SNAPSHOT_PUBLISHER.start()
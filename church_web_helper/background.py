@@ -0,0 +1,40 @@
+"""This module implements background jobs which run independent of requests."""
+
+import logging
+import threading
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob(threading.Thread):
+    """Daemon thread which executes a function in a fixed interval.
+
+    Exceptions are logged and don't stop the job.
+    """
+
+    def __init__(self, name: str, func: Callable[[], None], interval: float) -> None:
+        """Init job without starting it.
+
+        Args:
+            name: name of the thread used for logging
+            func: callable without params which is executed
+            interval: seconds between the end of one and the start of the next run
+        """
+        super().__init__(name=name, daemon=True)
+        self.func = func
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        """Execute func until stop is called - first run is executed immediately."""
+        while not self._stopped.is_set():
+            try:
+                self.func()
+            except Exception:
+                logger.exception("background job %s failed", self.name)
+            self._stopped.wait(self.interval)
+
+    def stop(self) -> None:
+        """Stop the job after the current run."""
+        self._stopped.set()
@@ -0,0 +1,361 @@
+"""Simple caches used to avoid repeated ChurchTools requests.
+
+Flask session data is pickled per user, therefore shared data which is
+expensive to retrieve is kept in module level caches instead.
+TTLCache is kept in-process, SQLiteCache is shared by all processes on a host
+and TieredCache combines both so that most reads don't need to access the disk.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+_CACHES: "weakref.WeakSet[TTLCache]" = weakref.WeakSet()
+
+
+def _reset_locks_after_fork() -> None:
+    """Replace locks in forked processes.
+
+    Background threads of the parent process are not copied by fork,
+    a lock held by one of them at that moment would otherwise never be released.
+    """
+    for cache in list(_CACHES):
+        cache._lock = threading.Lock()  # noqa: SLF001
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_locks_after_fork)
+
+
+class Cache(ABC):
+    """Common interface of all caches - subclasses implement get, set, delete, clear."""
+
+    # default seconds an entry stays valid - None for no expiry
+    ttl: float | None = None
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Check if a valid entry exists for key."""
+        return self.get(key, _MISSING) is not _MISSING
+
+    @abstractmethod
+    def get(self, key: Hashable, default: Any = None) -> Any:  # noqa: ANN401
+        """Retrieve a cached value or default if key is unknown or expired."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:  # noqa: ANN401
+        """Store a value - ttl overrides the default ttl of the cache."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: Hashable) -> None:
+        """Remove a single entry if it exists."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all entries."""
+        raise NotImplementedError
+
+    def get_or_set(self, key: Hashable, func: Callable[[], Any]) -> Any:  # noqa: ANN401
+        """Retrieve a cached value or compute and store it.
+
+        func is executed without holding a lock,
+        concurrent misses might therefore compute the value more than once.
+
+        Args:
+            key: the cache key
+            func: callable without params used to compute a missing value
+
+        Returns:
+            cached or newly computed value
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = func()
+            self.set(key, value)
+        return value
+
+
+class TTLCache(Cache):
+    """Thread-safe key value store with expiry and size-bounded LRU eviction.
+
+    Entries are kept when the process is forked e.g. by preloading gunicorn workers.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float | None = None) -> None:
+        """Init an empty cache.
+
+        Args:
+            maxsize: number of entries kept before least recently used are evicted
+            ttl: seconds an entry stays valid - None for no expiry
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float | None, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        _CACHES.add(self)
+
+    def __len__(self) -> int:
+        """Number of entries including not yet purged expired ones."""
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:  # noqa: ANN401
+        """Retrieve a cached value.
+
+        Args:
+            key: the cache key
+            default: value returned if key is unknown or expired
+
+        Returns:
+            cached value or default
+        """
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires, value = entry
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:  # noqa: ANN401
+        """Store a value evicting least recently used entries if required.
+
+        Args:
+            key: the cache key
+            value: the value to store
+            ttl: optional override of the default ttl in seconds
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """Remove a single entry if it exists."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+
+SQLITE_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    expires REAL,
+    stored REAL NOT NULL,
+    value BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_stored ON cache (stored);
+"""
+
+
+class SQLiteCache(Cache):
+    """Key value store in a SQLite file shared by all processes on a host.
+
+    Values are pickled, keys which are not str are hashed using make_cache_key.
+    Entries are evicted in the order they were stored once maxsize is exceeded.
+    Only use a path which is not writable by others because values are unpickled.
+    """
+
+    def __init__(
+        self, path: Path, maxsize: int = 1024, ttl: float | None = None
+    ) -> None:
+        """Init cache - the file is created on first use if it doesn't exist.
+
+        Args:
+            path: the SQLite file
+            maxsize: number of entries kept before the oldest are evicted
+            ttl: seconds an entry stays valid - None for no expiry
+        """
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection for a single transaction - one per call keeps it thread-safe."""
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(SQLITE_CACHE_SCHEMA)
+            finally:
+                connection.close()
+            self._initialized = True
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _get_key(key: Hashable) -> str:
+        """Text used as primary key."""
+        return key if isinstance(key, str) else make_cache_key(key)
+
+    def __len__(self) -> int:
+        """Number of entries including not yet purged expired ones."""
+        with self._connect() as connection:
+            return connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:  # noqa: ANN401
+        """Retrieve a cached value.
+
+        Args:
+            key: the cache key
+            default: value returned if key is unknown or expired
+
+        Returns:
+            cached value or default
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT expires, value FROM cache WHERE key = ?", (self._get_key(key),)
+            ).fetchone()
+        if row is None:
+            return default
+        expires, value = row
+        if expires is not None and expires < time.time():
+            self.delete(key)
+            return default
+        # only values stored by this app are unpickled
+        return pickle.loads(value)  # noqa: S301
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:  # noqa: ANN401
+        """Store a value and evict expired or the oldest entries if required.
+
+        Args:
+            key: the cache key
+            value: the value to store - must be picklable
+            ttl: optional override of the default ttl in seconds
+        """
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        expires = None if ttl is None else now + ttl
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO cache (key, expires, stored, value)"
+                " VALUES (?, ?, ?, ?)",
+                (
+                    self._get_key(key),
+                    expires,
+                    now,
+                    pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+                ),
+            )
+            connection.execute("DELETE FROM cache WHERE expires < ?", (now,))
+            connection.execute(
+                "DELETE FROM cache WHERE key IN"
+                " (SELECT key FROM cache ORDER BY stored DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+
+    def delete(self, key: Hashable) -> None:
+        """Remove a single entry if it exists."""
+        with self._connect() as connection:
+            connection.execute("DELETE FROM cache WHERE key = ?", (self._get_key(key),))
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._connect() as connection:
+            connection.execute("DELETE FROM cache")
+
+
+class TieredCache(Cache):
+    """Combines caches which are checked in order e.g. in-process before disk.
+
+    Hits of a later tier are stored in all previous tiers,
+    writes and deletions are applied to all tiers.
+    Other processes keep entries of their own in-process tier until they expire,
+    therefore in-process tiers should use a short ttl.
+    """
+
+    def __init__(self, tiers: list[Cache]) -> None:
+        """Init with tiers ordered from fastest to slowest."""
+        self.tiers = tiers
+
+    def get(self, key: Hashable, default: Any = None) -> Any:  # noqa: ANN401
+        """Retrieve a cached value from the first tier which has it.
+
+        Args:
+            key: the cache key
+            default: value returned if no tier has a valid entry
+
+        Returns:
+            cached value or default
+        """
+        for index, tier in enumerate(self.tiers):
+            value = tier.get(key, _MISSING)
+            if value is not _MISSING:
+                for previous_tier in self.tiers[:index]:
+                    previous_tier.set(key, value)
+                return value
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:  # noqa: ANN401
+        """Store a value in all tiers.
+
+        Args:
+            key: the cache key
+            value: the value to store
+            ttl: optional override of the default ttl of each tier in seconds -
+                limited to the default ttl of a tier so in-process copies stay short
+        """
+        for tier in self.tiers:
+            tier_ttl = ttl
+            if ttl is not None and tier.ttl is not None:
+                tier_ttl = min(ttl, tier.ttl)
+            tier.set(key, value, ttl=tier_ttl)
+
+    def delete(self, key: Hashable) -> None:
+        """Remove a single entry from all tiers."""
+        for tier in self.tiers:
+            tier.delete(key)
+
+    def clear(self) -> None:
+        """Remove all entries from all tiers."""
+        for tier in self.tiers:
+            tier.clear()
+
+
+def make_cache_key(*parts: Any) -> str:  # noqa: ANN401
+    """Create a stable hash for json serializable parts.
+
+    dict keys are sorted so that equal content always results in the same key.
+
+    Args:
+        parts: any json serializable items - others are converted using str()
+
+    Returns:
+        hex digest which can be used as cache key
+    """
+    serialized = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
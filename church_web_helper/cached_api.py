@@ -0,0 +1,179 @@
+"""This module implements a caching proxy for ChurchToolsApi.
+
+The api stored in the session at login is wrapped by CachedApi,
+therefore all routes and helpers reuse responses of read methods
+listed in CACHE_POLICIES without changing their call sites.
+
+Each policy defines how long a response stays valid and its scope:
+- REQUEST_SCOPE responses are kept until the current request finished
+- SHARED_SCOPE responses are kept in API_CACHE which all workers share
+"""
+
+import copy
+import functools
+import inspect
+import logging
+import os
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from churchtools_api.churchtools_api import ChurchToolsApi
+from flask import g, has_request_context
+
+from church_web_helper.cache import (
+    Cache,
+    SQLiteCache,
+    TieredCache,
+    TTLCache,
+    make_cache_key,
+)
+
+logger = logging.getLogger(__name__)
+
+REQUEST_SCOPE = "request"
+SHARED_SCOPE = "shared"
+
+# persons, group members and service assignments of events are personal data
+# - they are not kept beyond a single request
+# calendars and event masterdata are cached by MASTERDATA_CACHE in app.py instead
+CACHE_POLICIES = {
+    "get_groups": {"scope": SHARED_SCOPE, "ttl": 10 * 60},
+    "get_group_members": {"scope": REQUEST_SCOPE, "ttl": None},
+    "get_persons": {"scope": REQUEST_SCOPE, "ttl": None},
+    "get_persons_masterdata": {"scope": SHARED_SCOPE, "ttl": 6 * 60 * 60},
+    "get_event_by_calendar_appointment": {"scope": REQUEST_SCOPE, "ttl": None},
+}
+
+API_CACHE_PATH = Path(os.environ.get("API_CACHE_PATH", "cache/ct_api.sqlite"))
+API_CACHE = TieredCache(
+    [
+        TTLCache(maxsize=256, ttl=60),
+        SQLiteCache(API_CACHE_PATH, maxsize=4096),
+    ]
+)
+
+_MISSING = object()
+
+
+class CacheStatistics:
+    """Thread-safe counter of cache hits and misses per method of this process."""
+
+    def __init__(self) -> None:
+        """Init without any requests."""
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, method: str, *, hit: bool) -> None:
+        """Count a single hit or miss of method."""
+        with self._lock:
+            counts = self._counts.setdefault(method, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+
+    def as_dict(self) -> dict[str, dict[str, int]]:
+        """Copy of hits and misses by method name."""
+        with self._lock:
+            return {method: dict(counts) for method, counts in self._counts.items()}
+
+    def reset(self) -> None:
+        """Remove all counts."""
+        with self._lock:
+            self._counts.clear()
+
+
+CACHE_STATISTICS = CacheStatistics()
+
+
+def get_request_cache() -> Cache | None:
+    """Cache which is discarded at the end of the current request.
+
+    Returns:
+        None if there is no request e.g. in background jobs
+    """
+    if not has_request_context():
+        return None
+    if "ct_api_cache" not in g:
+        g.ct_api_cache = TTLCache(maxsize=256)
+    return g.ct_api_cache
+
+
+class CachedApi:
+    """Wraps a ChurchTools api to cache responses of read methods.
+
+    Cache keys contain domain and user because visibility depends on permissions
+    and the arguments bound to the signature of the method
+    so that positional, keyword and default arguments result in the same key.
+    Empty responses of failed requests are not cached.
+    Cached values are copied so that callers can modify them.
+    Only the wrapped api and settings are kept as attributes
+    therefore instances can be pickled e.g. in the flask session.
+    """
+
+    def __init__(
+        self,
+        ct_api: ChurchToolsApi,
+        user_id: int | None,
+        policies: dict[str, dict] | None = None,
+    ) -> None:
+        """Init wrapper.
+
+        Args:
+            ct_api: api used to request anything not cached yet
+            user_id: id of the user logged in with ct_api
+            policies: dict of method name and dict of scope and ttl in seconds
+                defaults to CACHE_POLICIES
+        """
+        self._ct_api = ct_api
+        self.user_id = user_id
+        self.policies = CACHE_POLICIES if policies is None else policies
+
+    def __getattr__(self, name: str):  # noqa: ANN204
+        """Methods with a policy are cached, anything else is forwarded."""
+        # private names are not forwarded - e.g. pickle checks them before init
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attribute = getattr(self._ct_api, name)
+        if name not in self.policies or not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        def cached_method(*args, **kwargs) -> Any:  # noqa: ANN002, ANN003, ANN401
+            return self._call_cached(name, attribute, *args, **kwargs)
+
+        return cached_method
+
+    def _get_cache(self, scope: str) -> Cache | None:
+        if scope == REQUEST_SCOPE:
+            return get_request_cache()
+        return API_CACHE
+
+    def _call_cached(
+        self,
+        name: str,
+        method: Callable,
+        *args,  # noqa: ANN002
+        **kwargs,  # noqa: ANN003
+    ) -> Any:  # noqa: ANN401
+        policy = self.policies[name]
+        cache = self._get_cache(policy["scope"])
+        try:
+            arguments = inspect.signature(method).bind(*args, **kwargs)
+        except TypeError:
+            # invalid arguments are passed on to raise the original error
+            cache = None
+        if cache is None:
+            return method(*args, **kwargs)
+
+        arguments.apply_defaults()
+        key = make_cache_key(
+            "ct_api", name, self._ct_api.domain, self.user_id, arguments.arguments
+        )
+        value = cache.get(key, _MISSING)
+        CACHE_STATISTICS.record(name, hit=value is not _MISSING)
+        if value is _MISSING:
+            value = method(*args, **kwargs)
+            if value is None or value is False:
+                return value
+            cache.set(key, value, ttl=policy["ttl"])
+        return copy.deepcopy(value)
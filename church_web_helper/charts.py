@@ -0,0 +1,127 @@
+"""This module implements PNG chart rendering used by the service workload page.
+
+Figures are created with the object oriented matplotlib API and an Agg canvas.
+No global pyplot state is involved which keeps rendering thread-safe and
+figures are released explicitly after rendering.
+"""
+
+import hashlib
+import io
+import logging
+
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import MaxNLocator
+
+from church_web_helper.cache import TTLCache, make_cache_key
+
+logger = logging.getLogger(__name__)
+
+CHART_CACHE = TTLCache(maxsize=64, ttl=3600)
+CHART_FIGSIZE = (6.4, 4.8)
+CHART_DPI = 100
+HEATMAP_ROW_INCHES = 0.2
+HEATMAP_MAX_XTICKS = 20
+
+
+def get_dataframe_hash(df: pd.DataFrame) -> str:
+    """Hash values, index and columns of a df.
+
+    Args:
+        df: data which should be identified
+
+    Returns:
+        hex digest which changes with any plotted value or label
+    """
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    digest.update(repr(list(df.columns)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _draw_cumulative_line_chart(figure: Figure, df: pd.DataFrame) -> None:
+    """Draw one line per column with integer y-axis ticks."""
+    ax = figure.add_subplot()
+    for column in df.columns:
+        ax.plot(df.index, df[column], label=str(column))
+    ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+    ax.set_xlabel(str(df.index.name or ""))
+    ax.legend()
+    figure.autofmt_xdate()
+
+
+def _draw_stacked_bar_chart(figure: Figure, df: pd.DataFrame) -> None:
+    """Draw one bar per row stacking the values of all columns."""
+    ax = figure.add_subplot()
+    labels = [str(label) for label in df.index]
+    bottom = pd.Series(0, index=df.index, dtype=float)
+    for column in df.columns:
+        ax.bar(labels, df[column], bottom=bottom, label=str(column))
+        bottom += df[column]
+    ax.set_xlabel(str(df.index.name or ""))
+    ax.tick_params(axis="x", labelrotation=90)
+    ax.legend()
+
+
+def _draw_heatmap(figure: Figure, df: pd.DataFrame) -> None:
+    """Draw a colored cell for each value - figure height grows with rows."""
+    figure.set_size_inches(
+        CHART_FIGSIZE[0] * 1.5,
+        max(CHART_FIGSIZE[1], HEATMAP_ROW_INCHES * len(df.index) + 1.5),
+    )
+    ax = figure.add_subplot()
+    image = ax.imshow(
+        df.to_numpy(), aspect="auto", cmap="YlOrRd", interpolation="nearest"
+    )
+    ax.set_yticks(range(len(df.index)), labels=[str(label) for label in df.index])
+    x_ticks = range(0, len(df.columns), max(1, len(df.columns) // HEATMAP_MAX_XTICKS))
+    ax.set_xticks(
+        x_ticks, labels=[str(df.columns[tick]) for tick in x_ticks], rotation=90
+    )
+    ax.set_xlabel(str(df.columns.name or ""))
+    colorbar = figure.colorbar(image, ax=ax)
+    colorbar.locator = MaxNLocator(integer=True)
+    colorbar.update_ticks()
+
+
+CHART_TYPES = {
+    "cumulative_line": _draw_cumulative_line_chart,
+    "stacked_bar": _draw_stacked_bar_chart,
+    "heatmap": _draw_heatmap,
+}
+
+
+def render_chart_png(df: pd.DataFrame, chart_type: str) -> bytes:
+    """Render a df as PNG chart - results are cached by chart type and data.
+
+    Args:
+        df: data to plot - columns are used as series
+        chart_type: one of CHART_TYPES
+
+    Raises:
+        ValueError: if chart_type is not supported
+
+    Returns:
+        PNG image
+    """
+    if chart_type not in CHART_TYPES:
+        msg = f"unsupported chart type {chart_type}"
+        raise ValueError(msg)
+
+    cache_key = make_cache_key(chart_type, get_dataframe_hash(df))
+
+    def render() -> bytes:
+        figure = Figure(figsize=CHART_FIGSIZE, dpi=CHART_DPI)
+        FigureCanvasAgg(figure)
+        try:
+            CHART_TYPES[chart_type](figure, df)
+            figure.tight_layout()
+            img = io.BytesIO()
+            figure.savefig(img, format="png")
+        finally:
+            figure.clear()
+        logger.debug("rendered %s chart with %s series", chart_type, len(df.columns))
+        return img.getvalue()
+
+    return CHART_CACHE.get_or_set(cache_key, render)
@@ -0,0 +1,219 @@
+"""This module implements helpers used to repost ChurchTools posts to Communi.
+
+It is used to outsource parts of the ct_posts page which don't need to be
+part of app.py. Pages of posts and Communi groups are cached per user session
+so that browsing pages or reposting doesn't request them again.
+"""
+
+import json
+import logging
+import re
+from collections.abc import Hashable
+from datetime import datetime
+from http import HTTPStatus
+
+import requests
+from churchtools_api.churchtools_api import ChurchToolsApi
+from communi_api.communi_api import CommuniApi
+
+from church_web_helper.cache import TTLCache
+from church_web_helper.communi_sync import DEFAULT_MAX_COMMUNI_WORKERS
+from church_web_helper.helper import run_concurrently
+
+logger = logging.getLogger(__name__)
+
+POSTS_PAGE_SIZE = 20
+POSTS_CACHE = TTLCache(maxsize=128, ttl=2 * 60)
+COMMUNI_GROUPS_CACHE = TTLCache(maxsize=128, ttl=60 * 60)
+
+
+def get_posts_page(
+    ct_api: ChurchToolsApi,
+    page: int,
+    cache_key: Hashable,
+    page_size: int = POSTS_PAGE_SIZE,
+) -> tuple[list[dict], int]:
+    """Posts to display on one page - cached for a short time.
+
+    Only the requested page is retrieved from /api/posts so that browsing
+    doesn't depend on the number of posts ever published.
+
+    Args:
+        ct_api: initialized churchtools api connection of the user
+        page: number of the page starting with 1 - limited to available pages
+        cache_key: identifies the user e.g. the session id
+        page_size: number of posts per page
+
+    Returns:
+        posts of the page, number of available pages
+
+    Raises:
+        requests.HTTPError: if the page can't be retrieved
+    """
+    page = max(page, 1)
+    key = (cache_key, page, page_size)
+    if (cached := POSTS_CACHE.get(key)) is not None:
+        return cached
+
+    response = ct_api.session.get(
+        url=f"{ct_api.domain}/api/posts",
+        params={"page": page, "limit": page_size},
+        headers={"accept": "application/json"},
+    )
+    if response.status_code != HTTPStatus.OK:
+        logger.warning(
+            "%s requesting posts page %s: %s",
+            response.status_code,
+            page,
+            response.content,
+        )
+        msg = f"{response.status_code} requesting posts page {page}"
+        raise requests.HTTPError(msg, response=response)
+
+    response_content = json.loads(response.content)
+    number_of_pages = max(1, response_content["meta"]["pagination"]["lastPage"])
+    if page > number_of_pages:
+        return get_posts_page(
+            ct_api=ct_api,
+            page=number_of_pages,
+            cache_key=cache_key,
+            page_size=page_size,
+        )
+
+    result = (response_content["data"], number_of_pages)
+    POSTS_CACHE.set(key, result)
+    return result
+
+
+def get_post(
+    ct_api: ChurchToolsApi,
+    post_id: int,
+    cache_key: Hashable,
+    page: int | None = None,
+) -> dict | None:
+    """Single post - from the cached page if available.
+
+    Args:
+        ct_api: initialized churchtools api connection of the user
+        post_id: id of the post
+        cache_key: identifies the user e.g. the session id
+        page: number of the page the post was displayed on
+
+    Returns:
+        post as returned by ChurchTools - None if not available
+    """
+    posts, _ = POSTS_CACHE.get((cache_key, page, POSTS_PAGE_SIZE), ([], 1))
+    for post in posts:
+        if post["id"] == post_id:
+            return post
+
+    response = ct_api.session.get(
+        url=f"{ct_api.domain}/api/posts/{post_id}",
+        headers={"accept": "application/json"},
+    )
+    if response.status_code != HTTPStatus.OK:
+        logger.warning(
+            "%s requesting post %s: %s",
+            response.status_code,
+            post_id,
+            response.content,
+        )
+        return None
+    return json.loads(response.content)["data"]
+
+
+def get_communi_groups(communi_api: CommuniApi, cache_key: Hashable) -> dict[int, str]:
+    """Communi groups of a user - cached for a longer time.
+
+    Args:
+        communi_api: initialized communi api connection of the user
+        cache_key: identifies the user e.g. the session id
+
+    Returns:
+        dict of group id and title
+    """
+    return COMMUNI_GROUPS_CACHE.get_or_set(
+        cache_key,
+        lambda: {group["id"]: group["title"] for group in communi_api.getGroups()},
+    )
+
+
+def repost_to_communi(communi_api: CommuniApi, post: dict, group_id: int) -> None:
+    """Create a Communi recommendation linking to a ChurchTools post.
+
+    Args:
+        communi_api: initialized communi api connection
+        post: post as returned by ChurchTools
+        group_id: Communi group which should show the recommendation
+    """
+    base_url = re.match(
+        r"^(https?:\/\/[^/]+)(?:.*)", post.get("group").get("apiUrl")
+    ).group(1)
+
+    communi_api.recommendation(
+        group_id=group_id,
+        title=f"{post.get('title')} ({post['group']['title']})",
+        description=post.get("content"),
+        post_date=datetime.strptime(
+            post.get("publishedDate"), "%Y-%m-%dT%H:%M:%SZ"
+        ).astimezone(),
+        pic_url=post.get("images")[0] if len(post.get("images")) > 0 else "",
+        link=f"{base_url}/posts/{post.get('id')}",
+        is_official=True,
+    )
+
+
+def repost_posts_to_communi(  # noqa: PLR0913
+    ct_api: ChurchToolsApi,
+    communi_api: CommuniApi,
+    post_ids: list[int],
+    group_id: int,
+    cache_key: Hashable,
+    page: int | None = None,
+    max_workers: int = DEFAULT_MAX_COMMUNI_WORKERS,
+) -> dict[int, str]:
+    """Repost multiple ChurchTools posts to a Communi group concurrently.
+
+    Args:
+        ct_api: initialized churchtools api connection of the user
+        communi_api: initialized communi api connection of the user
+        post_ids: ids of the posts which should be reposted
+        group_id: Communi group which should show the recommendations
+        cache_key: identifies the user e.g. the session id
+        page: number of the page the posts were displayed on
+        max_workers: max number of recommendations created in parallel
+
+    Returns:
+        dict of post id and human readable result
+    """
+    posts = {
+        post_id: get_post(
+            ct_api=ct_api, post_id=post_id, cache_key=cache_key, page=page
+        )
+        for post_id in dict.fromkeys(post_ids)
+    }
+    results = dict.fromkeys(
+        [post_id for post_id, post in posts.items() if post is None],
+        "failed: post not available",
+    )
+
+    def func(post_id: int) -> None:
+        repost_to_communi(
+            communi_api=communi_api, post=posts[post_id], group_id=group_id
+        )
+
+    reposted = run_concurrently(
+        func,
+        [post_id for post_id, post in posts.items() if post is not None],
+        max_workers=max_workers,
+    )
+    logger.info("processed %s reposts to communi group %s", len(reposted), group_id)
+    results.update(
+        {
+            post_id: f"failed: {result}"
+            if isinstance(result, Exception)
+            else "reposted"
+            for post_id, result in reposted.items()
+        }
+    )
+    return results
@@ -0,0 +1,196 @@
+"""This module implements helpers which combine ChurchTools events and Communi groups.
+
+It is used to outsource parts of the communi_events page which don't need to be
+part of app.py and to keep the number of remote requests independent of the
+number of events.
+"""
+
+import logging
+from datetime import datetime
+
+from churchtools_api.churchtools_api import ChurchToolsApi
+from communi_api.churchToolsActions import (
+    create_event_chats,
+    delete_event_chats,
+    generate_group_name_for_event,
+)
+from communi_api.communi_api import CommuniApi
+from dateutil.relativedelta import relativedelta
+
+from church_web_helper.helper import run_concurrently
+
+logger = logging.getLogger(__name__)
+
+# Communi is rate limited - keep the number of parallel group changes small
+DEFAULT_MAX_COMMUNI_WORKERS = 4
+EVENT_CHAT_ACTIONS = ("create", "delete")
+
+
+class PrefetchedEventsApi:
+    """Wrapper of ChurchToolsApi which answers single event requests from memory.
+
+    communi_api helpers like generate_group_name_for_event request each event by id.
+    Wrapping the api allows to reuse them with events retrieved in one request.
+    All other attributes are forwarded to the wrapped api.
+    """
+
+    def __init__(self, ct_api: ChurchToolsApi, events: list[dict]) -> None:
+        """Init wrapper.
+
+        Args:
+            ct_api: initialized churchtools api connection used as fallback
+            events: events which were already retrieved
+        """
+        self._ct_api = ct_api
+        self._events = {int(event["id"]): event for event in events}
+
+    def get_events(self, *args, **kwargs) -> list[dict]:  # noqa: ANN002, ANN003
+        """Same as ChurchToolsApi.get_events but using known events if possible."""
+        event_id = kwargs.get("eventId")
+        if not args and set(kwargs) == {"eventId"} and int(event_id) in self._events:
+            return [self._events[int(event_id)]]
+        return self._ct_api.get_events(*args, **kwargs)
+
+    def __getattr__(self, name: str):  # noqa: ANN204
+        """Forward all other attributes to the wrapped api."""
+        return getattr(self._ct_api, name)
+
+
+def get_events_in_window(
+    ct_api: ChurchToolsApi,
+    reference_day: datetime,
+    days_before: int = 7,
+    days_after: int = 25,
+) -> list[dict]:
+    """Retrieve all events around a reference day with a single request.
+
+    Args:
+        ct_api: initialized churchtools api connection used as datasource
+        reference_day: the day used as center of the window
+        days_before: number of days before reference day
+        days_after: number of days after reference day
+
+    Returns:
+        list of events sorted by startDate
+    """
+    events = ct_api.get_events(
+        from_=reference_day - relativedelta(days=days_before),
+        to_=reference_day + relativedelta(days=days_after),
+    )
+    return sorted(events or [], key=lambda event: event["startDate"])
+
+
+def get_group_names_for_events(
+    ct_api: ChurchToolsApi, events: list[dict]
+) -> dict[int, str]:
+    """Generate the Communi group name of each event without additional requests.
+
+    Args:
+        ct_api: initialized churchtools api connection used as fallback
+        events: events which were already retrieved
+
+    Returns:
+        dict of event id and group name
+    """
+    prefetched_api = PrefetchedEventsApi(ct_api=ct_api, events=events)
+    return {
+        event["id"]: generate_group_name_for_event(prefetched_api, event["id"])
+        for event in events
+    }
+
+
+def get_group_index(communi_api: CommuniApi) -> dict[str, int]:
+    """Retrieve all Communi groups once and index them by name.
+
+    Args:
+        communi_api: initialized communi api connection used as datasource
+
+    Returns:
+        dict of group title and group id
+    """
+    groups = communi_api.getGroups()
+    logger.debug("retrieved %s communi groups", len(groups))
+    return {group["title"]: group["id"] for group in groups}
+
+
+def get_event_chat_sync_candidates(
+    event_ids: list[int],
+    group_names: dict[int, str],
+    group_index: dict[str, int],
+    action: str,
+) -> list[int]:
+    """Diff events against existing Communi groups.
+
+    Args:
+        event_ids: ids of the events which should be considered
+        group_names: dict of event id and group name
+        group_index: dict of existing group title and group id
+        action: either "create" or "delete"
+
+    Returns:
+        ids of events without group for create or with group for delete
+
+    Raises:
+        ValueError: if action is not supported
+    """
+    if action == "create":
+        return [
+            event_id
+            for event_id in event_ids
+            if group_names.get(event_id) not in group_index
+        ]
+    if action == "delete":
+        return [
+            event_id
+            for event_id in event_ids
+            if group_names.get(event_id) in group_index
+        ]
+    msg = f"unsupported action {action}"
+    raise ValueError(msg)
+
+
+def sync_event_chats(
+    ct_api: ChurchToolsApi,
+    communi_api: CommuniApi,
+    event_ids: list[int],
+    action: str,
+    max_workers: int = DEFAULT_MAX_COMMUNI_WORKERS,
+) -> dict[int, str]:
+    """Create or delete the Communi groups of multiple events concurrently.
+
+    Args:
+        ct_api: initialized churchtools api connection
+            - ideally a PrefetchedEventsApi to avoid requesting each event again
+        communi_api: initialized communi api connection
+        event_ids: ids of the events which should be changed
+        action: either "create" or "delete"
+        max_workers: max number of events processed in parallel
+
+    Returns:
+        dict of event id and human readable result
+
+    Raises:
+        ValueError: if action is not supported
+    """
+    if action == "create":
+
+        def func(event_id: int) -> None:
+            create_event_chats(ct_api, communi_api, [event_id], only_relevant=False)
+
+        success = "created"
+    elif action == "delete":
+
+        def func(event_id: int) -> None:
+            delete_event_chats(ct_api, communi_api, [event_id])
+
+        success = "deleted"
+    else:
+        msg = f"unsupported action {action}"
+        raise ValueError(msg)
+
+    results = run_concurrently(func, event_ids, max_workers=max_workers)
+    logger.info("%s communi groups for %s events", action, len(results))
+    return {
+        event_id: f"failed: {result}" if isinstance(result, Exception) else success
+        for event_id, result in results.items()
+    }
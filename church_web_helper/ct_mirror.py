@@ -0,0 +1,599 @@
+"""This module implements a local SQLite mirror of frequently used ChurchTools data.
+
+Calendars, calendar appointments, events including service assignments,
+groups and persons are stored as JSON next to indexed columns.
+Past data rarely changes, therefore incremental syncs only refetch a short
+window of recent and all upcoming dates. Groups, persons and the whole history
+are refetched with a less frequent full sync.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytz
+from churchtools_api.churchtools_api import ChurchToolsApi
+
+from church_web_helper.background import PeriodicJob
+from church_web_helper.helper import parse_ct_datetime
+
+logger = logging.getLogger(__name__)
+
+MIRROR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calendars (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS appointments (
+    id INTEGER NOT NULL,
+    calendar_id INTEGER,
+    start_date TEXT NOT NULL,
+    end_date TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (id, start_date)
+);
+CREATE INDEX IF NOT EXISTS appointments_start ON appointments (start_date);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    appointment_id INTEGER,
+    calendar_id INTEGER,
+    start_date TEXT NOT NULL,
+    name TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_start ON events (start_date);
+CREATE INDEX IF NOT EXISTS events_appointment ON events (appointment_id, start_date);
+CREATE TABLE IF NOT EXISTS event_services (
+    event_id INTEGER NOT NULL,
+    service_id INTEGER,
+    person_id INTEGER,
+    name TEXT
+);
+CREATE INDEX IF NOT EXISTS event_services_event ON event_services (event_id);
+CREATE TABLE IF NOT EXISTS groups (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS persons (
+    id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+MIRROR_DATE_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def to_mirror_date(value: datetime | str) -> str:
+    """Convert a datetime or ChurchTools date string to a sortable UTC string.
+
+    Naive datetimes are interpreted as local time.
+
+    Args:
+        value: datetime or date string as returned by ChurchTools
+
+    Returns:
+        UTC string like 2024-12-24T16:00:00Z
+    """
+    if isinstance(value, str):
+        value = parse_ct_datetime(value)
+    return value.astimezone(pytz.UTC).strftime(MIRROR_DATE_FORMAT)
+
+
+def get_day_range(from_: datetime, to_: datetime) -> tuple[datetime, datetime]:
+    """Extend a range to whole days like ChurchTools does for from and to params.
+
+    Args:
+        from_: start of the range
+        to_: end of the range
+
+    Returns:
+        start of the first day, last second of the last day
+    """
+    return (
+        from_.replace(hour=0, minute=0, second=0, microsecond=0),
+        to_.replace(hour=23, minute=59, second=59, microsecond=0),
+    )
+
+
+def get_calendar_id(event: dict) -> int | None:
+    """Calendar id of an event.
+
+    Args:
+        event: event with calendar domain object
+
+    Returns:
+        id of the calendar if available
+    """
+    calendar_id = (event.get("calendar") or {}).get("domainIdentifier")
+    return int(calendar_id) if calendar_id is not None else None
+
+
+class ChurchToolsMirror:
+    """Local copy of ChurchTools data for one domain."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        path: Path,
+        domain: str,
+        history_days: int = 2 * 365,
+        horizon_days: int = 400,
+        recent_days: int = 14,
+        full_sync_interval: float = 24 * 60 * 60,
+        max_age: float = 60 * 60,
+    ) -> None:
+        """Init mirror and create database schema if required.
+
+        Args:
+            path: SQLite database file
+            domain: ChurchTools domain of the mirrored data
+            history_days: days before today which are mirrored with a full sync
+            horizon_days: days after today which are mirrored
+            recent_days: days before today which are refetched by incremental syncs
+            full_sync_interval: seconds after which history, groups and persons
+                are refetched
+            max_age: seconds after last sync until the mirror is considered stale
+        """
+        self.path = path
+        self.domain = domain
+        self.history_days = history_days
+        self.horizon_days = horizon_days
+        self.recent_days = recent_days
+        self.full_sync_interval = full_sync_interval
+        self.max_age = max_age
+        self._sync_lock = threading.Lock()
+        self._job = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(MIRROR_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection for a single transaction - one per call keeps it thread-safe."""
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get_state(self, key: str) -> str | None:
+        """Retrieve a value of the sync state e.g. last_sync."""
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT value FROM sync_state WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def covers(self, from_: datetime, to_: datetime) -> bool:
+        """Check if the mirror is up to date and contains the whole range.
+
+        Args:
+            from_: start of the range - naive datetimes are interpreted as local
+            to_: end of the range
+
+        Returns:
+            True if reads for the range can be answered by the mirror
+        """
+        last_sync = self.get_state("last_sync")
+        synced_from = self.get_state("synced_from")
+        synced_to = self.get_state("synced_to")
+        if last_sync is None or synced_from is None or synced_to is None:
+            return False
+        if time.time() - float(last_sync) > self.max_age:
+            return False
+        return synced_from <= to_mirror_date(from_) and to_mirror_date(to_) <= synced_to
+
+    def sync(self, ct_api: ChurchToolsApi | None, full: bool = False) -> None:
+        """Refetch data from ChurchTools.
+
+        The sync is aborted without changes if any request fails
+        because replacing a range with an empty result would remove mirrored data.
+
+        Args:
+            ct_api: connection with read access to all mirrored data
+            full: refetch whole history, groups and persons
+                - also done if the last full sync is older than full_sync_interval
+        """
+        if ct_api is None:
+            logger.warning("no ChurchTools login available - mirror not synced")
+            return
+
+        with self._sync_lock:
+            now = time.time()
+            last_full_sync = self.get_state("last_full_sync")
+            full = (
+                full
+                or last_full_sync is None
+                or now - float(last_full_sync) > self.full_sync_interval
+            )
+
+            today = datetime.combine(datetime.now().date(), datetime.min.time())
+            from_ = today - timedelta(
+                days=self.history_days if full else self.recent_days
+            )
+            to_ = today + timedelta(days=self.horizon_days)
+
+            calendars = ct_api.get_calendars()
+            if calendars is None:
+                logger.warning("mirror sync aborted - failed to fetch calendars")
+                return
+            # requested per calendar because appointments don't reference it
+            appointments = {
+                calendar["id"]: ct_api.get_calendar_appointments(
+                    calendar_ids=[calendar["id"]], from_=from_, to_=to_
+                )
+                for calendar in calendars
+            }
+            events = ct_api.get_events(from_=from_, to_=to_, include="eventServices")
+            groups = ct_api.get_groups() if full else []
+            persons = ct_api.get_persons() if full else []
+
+            failed = [
+                name
+                for name, result in {
+                    **{
+                        f"appointments of calendar {calendar_id}": result
+                        for calendar_id, result in appointments.items()
+                    },
+                    "events": events,
+                    "groups": groups,
+                    "persons": persons,
+                }.items()
+                if result is None
+            ]
+            if failed:
+                logger.warning(
+                    "mirror sync aborted - failed to fetch %s", ", ".join(failed)
+                )
+                return
+
+            # ChurchTools includes the whole last day
+            from_, to_ = get_day_range(from_, to_)
+            with self._connect() as connection:
+                self._store_calendars(connection, calendars)
+                self._store_appointments(connection, appointments, from_, to_)
+                self._store_events(connection, events, from_, to_)
+                if full:
+                    self._store_groups(connection, groups)
+                    self._store_persons(connection, persons)
+                    self._set_state(connection, "last_full_sync", str(now))
+                    self._set_state(connection, "synced_from", to_mirror_date(from_))
+                self._set_state(connection, "synced_to", to_mirror_date(to_))
+                self._set_state(connection, "last_sync", str(now))
+
+            logger.info(
+                "%s sync of %s appointments and %s events took %.1fs",
+                "full" if full else "incremental",
+                sum(map(len, appointments.values())),
+                len(events),
+                time.time() - now,
+            )
+
+    @staticmethod
+    def _set_state(connection: sqlite3.Connection, key: str, value: str) -> None:
+        connection.execute(
+            "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+            (key, value),
+        )
+
+    @staticmethod
+    def _store_calendars(connection: sqlite3.Connection, calendars: list[dict]) -> None:
+        connection.execute("DELETE FROM calendars")
+        connection.executemany(
+            "INSERT INTO calendars (id, name, data) VALUES (?, ?, ?)",
+            [
+                (calendar["id"], calendar.get("name"), json.dumps(calendar))
+                for calendar in calendars
+            ],
+        )
+
+    @staticmethod
+    def _store_appointments(
+        connection: sqlite3.Connection,
+        appointments: dict[int, list[dict]],
+        from_: datetime,
+        to_: datetime,
+    ) -> None:
+        """Replace all appointments starting within the range.
+
+        Args:
+            connection: open transaction
+            appointments: dict of calendar id and appointments of this calendar
+            from_: start of the synced range
+            to_: end of the synced range
+        """
+        connection.execute(
+            "DELETE FROM appointments WHERE start_date BETWEEN ? AND ?",
+            (to_mirror_date(from_), to_mirror_date(to_)),
+        )
+        connection.executemany(
+            "INSERT OR REPLACE INTO appointments "
+            "(id, calendar_id, start_date, end_date, data) VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    appointment["id"],
+                    calendar_id,
+                    to_mirror_date(appointment["startDate"]),
+                    to_mirror_date(
+                        appointment.get("endDate") or appointment["startDate"]
+                    ),
+                    json.dumps(appointment),
+                )
+                for calendar_id, calendar_appointments in appointments.items()
+                for appointment in calendar_appointments
+            ],
+        )
+
+    @staticmethod
+    def _store_events(
+        connection: sqlite3.Connection,
+        events: list[dict],
+        from_: datetime,
+        to_: datetime,
+    ) -> None:
+        """Replace all events and their services starting within the range."""
+        range_params = (to_mirror_date(from_), to_mirror_date(to_))
+        connection.execute(
+            "DELETE FROM event_services WHERE event_id IN "
+            "(SELECT id FROM events WHERE start_date BETWEEN ? AND ?)",
+            range_params,
+        )
+        connection.execute(
+            "DELETE FROM events WHERE start_date BETWEEN ? AND ?", range_params
+        )
+        connection.executemany(
+            "INSERT OR REPLACE INTO events "
+            "(id, appointment_id, calendar_id, start_date, name, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    event["id"],
+                    event.get("appointmentId"),
+                    get_calendar_id(event),
+                    to_mirror_date(event["startDate"]),
+                    event.get("name"),
+                    json.dumps(event),
+                )
+                for event in events
+            ],
+        )
+        connection.executemany(
+            "INSERT INTO event_services (event_id, service_id, person_id, name) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (
+                    event["id"],
+                    service.get("serviceId"),
+                    service.get("personId"),
+                    service.get("name"),
+                )
+                for event in events
+                for service in event.get("eventServices") or []
+            ],
+        )
+
+    @staticmethod
+    def _store_groups(connection: sqlite3.Connection, groups: list[dict]) -> None:
+        connection.execute("DELETE FROM groups")
+        connection.executemany(
+            "INSERT INTO groups (id, name, data) VALUES (?, ?, ?)",
+            [(group["id"], group.get("name"), json.dumps(group)) for group in groups],
+        )
+
+    @staticmethod
+    def _store_persons(connection: sqlite3.Connection, persons: list[dict]) -> None:
+        connection.execute("DELETE FROM persons")
+        connection.executemany(
+            "INSERT INTO persons (id, data) VALUES (?, ?)",
+            [(person["id"], json.dumps(person)) for person in persons],
+        )
+
+    def _query_data(self, query: str, params: tuple = ()) -> list[dict]:
+        """Execute a query selecting the data column and parse the JSON."""
+        with self._connect() as connection:
+            rows = connection.execute(query, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get_calendars(self) -> list[dict]:
+        """All mirrored calendars."""
+        return self._query_data("SELECT data FROM calendars ORDER BY id")
+
+    def get_calendar_appointments(
+        self, calendar_ids: list[int], from_: datetime, to_: datetime
+    ) -> list[dict]:
+        """Appointments of the calendars starting within the range ordered by start.
+
+        Args:
+            calendar_ids: calendars to include
+            from_: start of the range - the whole day is included
+            to_: end of the range - the whole day is included
+
+        Returns:
+            list of appointments like returned by ChurchTools
+        """
+        from_, to_ = get_day_range(from_, to_)
+        placeholders = ",".join("?" * len(calendar_ids))
+        query = (
+            "SELECT data FROM appointments "  # noqa: S608
+            f"WHERE calendar_id IN ({placeholders}) "
+            "AND start_date BETWEEN ? AND ? ORDER BY start_date, id"
+        )
+        return self._query_data(
+            query,
+            (*calendar_ids, to_mirror_date(from_), to_mirror_date(to_)),
+        )
+
+    def get_events(self, from_: datetime, to_: datetime) -> list[dict]:
+        """Events including eventServices starting within the range ordered by start.
+
+        Args:
+            from_: start of the range - the whole day is included
+            to_: end of the range - the whole day is included
+
+        Returns:
+            list of events like returned by ChurchTools
+        """
+        from_, to_ = get_day_range(from_, to_)
+        return self._query_data(
+            "SELECT data FROM events WHERE start_date BETWEEN ? AND ? "
+            "ORDER BY start_date, id",
+            (to_mirror_date(from_), to_mirror_date(to_)),
+        )
+
+    def get_event_by_calendar_appointment(
+        self, appointment_id: int, start_date: datetime | str
+    ) -> dict | None:
+        """Event of a specific calendar appointment date.
+
+        Args:
+            appointment_id: id of the calendar appointment
+            start_date: start of the appointment date
+
+        Returns:
+            event including eventServices or None if there is no event
+        """
+        events = self._query_data(
+            "SELECT data FROM events WHERE appointment_id = ? AND start_date = ?",
+            (appointment_id, to_mirror_date(start_date)),
+        )
+        return events[0] if events else None
+
+    def get_groups(self) -> list[dict]:
+        """All mirrored groups."""
+        return self._query_data("SELECT data FROM groups ORDER BY id")
+
+    def get_persons(self, ids: list[int] | None = None) -> list[dict]:
+        """Mirrored persons - all or only the ids requested."""
+        if ids is None:
+            return self._query_data("SELECT data FROM persons ORDER BY id")
+        placeholders = ",".join("?" * len(ids))
+        return self._query_data(
+            f"SELECT data FROM persons WHERE id IN ({placeholders})",  # noqa: S608
+            tuple(ids),
+        )
+
+    def start(
+        self, get_ct_api: Callable[[], ChurchToolsApi | None], interval: float
+    ) -> None:
+        """Start syncing in a background thread.
+
+        Args:
+            get_ct_api: callable returning the connection used for syncing
+            interval: seconds between incremental syncs
+        """
+        self._job = PeriodicJob(
+            name="ct_mirror", func=lambda: self.sync(get_ct_api()), interval=interval
+        )
+        self._job.start()
+
+
+class MirroredApi:
+    """Wraps a ChurchTools api to answer supported reads from a mirror.
+
+    Reads outside of the mirrored range, of a different domain
+    or while the mirror is stale are forwarded to the wrapped api.
+    """
+
+    def __init__(self, ct_api: ChurchToolsApi, mirror: ChurchToolsMirror) -> None:
+        """Init wrapper.
+
+        Args:
+            ct_api: api used for anything not available in the mirror
+            mirror: local data of the same ChurchTools domain
+        """
+        self._ct_api = ct_api
+        self._mirror = mirror
+
+    def __getattr__(self, name: str):  # noqa: ANN204
+        """Anything not overwritten is forwarded to the wrapped api."""
+        return getattr(self._ct_api, name)
+
+    def _is_available(self, from_: datetime | None, to_: datetime | None) -> bool:
+        return (
+            from_ is not None
+            and to_ is not None
+            and self._ct_api.domain == self._mirror.domain
+            and self._mirror.covers(from_, to_)
+        )
+
+    def get_calendars(self) -> list[dict]:
+        """Calendars from the mirror if it is up to date."""
+        now = datetime.now()
+        if self._is_available(now, now):
+            return self._mirror.get_calendars()
+        return self._ct_api.get_calendars()
+
+    def get_calendar_appointments(
+        self,
+        calendar_ids: list[int],
+        **kwargs,  # noqa: ANN003
+    ) -> list[dict]:
+        """Appointments of a date range from the mirror if available."""
+        if set(kwargs) == {"from_", "to_"} and self._is_available(
+            *get_day_range(kwargs["from_"], kwargs["to_"])
+        ):
+            return self._mirror.get_calendar_appointments(calendar_ids, **kwargs)
+        return self._ct_api.get_calendar_appointments(calendar_ids, **kwargs)
+
+    def get_events(self, **kwargs) -> list[dict]:  # noqa: ANN003
+        """Events of a date range from the mirror if available.
+
+        Mirrored events always include eventServices.
+        """
+        range_params = {"from_", "to_"}
+        if range_params <= set(kwargs) <= {*range_params, "include"} and (
+            self._is_available(*get_day_range(kwargs["from_"], kwargs["to_"]))
+        ):
+            return self._mirror.get_events(kwargs["from_"], kwargs["to_"])
+        return self._ct_api.get_events(**kwargs)
+
+    def get_groups(self, **kwargs) -> list[dict]:  # noqa: ANN003
+        """Single groups by id from the mirror if available."""
+        now = datetime.now()
+        if set(kwargs) == {"group_id"} and self._is_available(now, now):
+            groups = [
+                group
+                for group in self._mirror.get_groups()
+                if group["id"] == int(kwargs["group_id"])
+            ]
+            if groups:
+                return groups
+        return self._ct_api.get_groups(**kwargs)
+
+    def get_persons(self, **kwargs) -> list[dict]:  # noqa: ANN003
+        """Persons by ids from the mirror if all of them are available."""
+        now = datetime.now()
+        if set(kwargs) == {"ids"} and self._is_available(now, now):
+            persons = self._mirror.get_persons(ids=kwargs["ids"])
+            if len(persons) == len(set(kwargs["ids"])):
+                return persons
+        return self._ct_api.get_persons(**kwargs)
+
+    def get_event_by_calendar_appointment(
+        self, appointment_id: int, start_date: datetime | str
+    ) -> dict | None:
+        """Event of an appointment date from the mirror if available."""
+        start = (
+            parse_ct_datetime(start_date) if isinstance(start_date, str) else start_date
+        )
+        if self._is_available(start, start):
+            return self._mirror.get_event_by_calendar_appointment(
+                appointment_id, start_date
+            )
+        return self._ct_api.get_event_by_calendar_appointment(
+            appointment_id, start_date
+        )
@@ -0,0 +1,66 @@
+"""This module implements German date formatting without changing the locale.
+
+locale.setlocale changes process wide state and is not thread-safe.
+Weekday and month names are therefore inserted from built-in tables
+before all other directives are passed to strftime.
+"""
+
+import re
+from datetime import date
+
+WEEKDAY_NAMES = {
+    0: "Montag",
+    1: "Dienstag",
+    2: "Mittwoch",
+    3: "Donnerstag",
+    4: "Freitag",
+    5: "Samstag",
+    6: "Sonntag",
+}
+WEEKDAY_ABBREVIATIONS = {weekday: name[:2] for weekday, name in WEEKDAY_NAMES.items()}
+MONTH_NAMES = {
+    1: "Januar",
+    2: "Februar",
+    3: "März",
+    4: "April",
+    5: "Mai",
+    6: "Juni",
+    7: "Juli",
+    8: "August",
+    9: "September",
+    10: "Oktober",
+    11: "November",
+    12: "Dezember",
+}
+MONTH_ABBREVIATIONS = {month: name[:3] for month, name in MONTH_NAMES.items()}
+
+NAME_DIRECTIVES = re.compile(r"%[aAbB%]")
+
+
+def format_date(value: date, date_format: str) -> str:
+    """Format like strftime but with German weekday and month names.
+
+    Equivalent to strftime with the locale de_DE.UTF-8 for %a, %A, %b and %B
+    e.g. "%a %d.%m" -> "So 07.01"
+
+    Args:
+        value: date or datetime to format
+        date_format: format string as used by strftime
+
+    Returns:
+        formatted text
+    """
+
+    def replace(match: re.Match) -> str:
+        directive = match.group(0)
+        if directive == "%a":
+            return WEEKDAY_ABBREVIATIONS[value.weekday()]
+        if directive == "%A":
+            return WEEKDAY_NAMES[value.weekday()]
+        if directive == "%b":
+            return MONTH_ABBREVIATIONS[value.month]
+        if directive == "%B":
+            return MONTH_NAMES[value.month]
+        return directive
+
+    return value.strftime(NAME_DIRECTIVES.sub(replace, date_format))
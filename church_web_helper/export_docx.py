@@ -1,22 +1,76 @@
 """This module implements all helper functions specific to docx export."""
 
-import locale
+import io
 import logging
+from collections.abc import Hashable
 from datetime import datetime
 
 import docx
 import docx.table
 import pandas as pd
+from churchtools_api.churchtools_api import ChurchToolsApi
 from docx.oxml import OxmlElement, ns
 from docx.oxml.ns import qn
 from docx.shared import Cm, Pt, RGBColor
 
+from church_web_helper.cache import TTLCache, make_cache_key
+from church_web_helper.date_formatting import format_date
+from church_web_helper.helper import EVENT_AGENDA_CACHE
+
 logger = logging.getLogger(__name__)
 
+# rendered agenda documents keyed by hash of all inputs used for rendering
+# expire like agendas - rendering also requests service assignments of the event
+AGENDA_DOCX_CACHE = TTLCache(maxsize=32, ttl=EVENT_AGENDA_CACHE.ttl)
+
+DOCX_MIMETYPE = (
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+)
+
+
+def get_event_agenda_docx_bytes(
+    ct_api: ChurchToolsApi,
+    agenda: dict,
+    service_groups: dict,
+    user_id: Hashable,
+    exclude_before_event: bool = False,  # noqa: FBT001, FBT002
+) -> bytes:
+    """Render the agenda of an event as DOCx using AGENDA_DOCX_CACHE.
+
+    The document is only rendered again if agenda content,
+    selected service groups or exclude_before_event changed.
+    Documents are cached per user because rendering requests data
+    which depends on the permissions of a user.
+
+    Args:
+        ct_api: initialized churchtools api connection used for rendering
+        agenda: the agenda as retrieved from ChurchTools
+        service_groups: dict of service groups which should be included
+        user_id: identifies the user logged in with ct_api
+        exclude_before_event: if agenda items before the event should be skipped
+
+    Returns:
+        content of the docx file
+    """
+    key = make_cache_key(
+        ct_api.domain, user_id, agenda, service_groups, exclude_before_event
+    )
+
+    def render() -> bytes:
+        logger.debug("rendering agenda docx for %s", agenda.get("name"))
+        document = ct_api.get_event_agenda_docx(
+            agenda,
+            serviceGroups=service_groups,
+            excludeBeforeEvent=exclude_before_event,
+        )
+        output = io.BytesIO()
+        document.save(output)
+        return output.getvalue()
+
+    return AGENDA_DOCX_CACHE.get_or_set(key, render)
 
-def get_plan_months_docx(
-    data: pd.DataFrame, from_date: datetime, apply_locale: str = "de_DE.UTF-8"
-) -> docx.Document:
+
+def get_plan_months_docx(data: pd.DataFrame, from_date: datetime) -> docx.Document:
     """Function which converts a Dataframe into a DOCx document.
 
     used for final print modifications.
@@ -24,14 +78,10 @@ def get_plan_months_docx(
     Args:
         data: pre-formatted data to be used as base
         from_date: date used for heading
-        apply_locale: the locale to be used (in particular for date to text conversion)
-            e.g. "de_DE.UTF-8" (default) or "deu" (for windows)
 
     Returns:
         document reference
     """
-    locale.setlocale(locale.LC_TIME, apply_locale)
-
     document = docx.Document()
     padding_left = 1.5
     padding_right = -0.25
@@ -44,7 +94,7 @@ def get_plan_months_docx(
         right=0.25 - padding_right,
     )
 
-    heading = f"Unsere Gottesdienste im {from_date.strftime('%B %Y')}"
+    heading = f"Unsere Gottesdienste im {format_date(from_date, '%B %Y')}"
     paragraph = document.add_heading(heading)
     for run in paragraph.runs:
         run.bold = True
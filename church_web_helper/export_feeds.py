@@ -0,0 +1,141 @@
+"""This module implements all helper functions specific to calendar feed export.
+
+Feeds are generated line by line so that they can be streamed as response.
+"""
+
+import json
+import logging
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+
+import pytz
+
+logger = logging.getLogger(__name__)
+
+ICS_MIMETYPE = "text/calendar"
+JSON_MIMETYPE = "application/json"
+
+MAX_LINE_OCTETS = 75
+
+
+def escape_text(value: str) -> str:
+    """Escape a text value for iCalendar and vCard 3.0 content lines.
+
+    Args:
+        value: original text
+
+    Returns:
+        text with escaped backslash, semicolon, comma and line breaks
+    """
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+        .replace("\r", "\\n")
+    )
+
+
+def fold_line(line: str) -> str:
+    """Fold a content line to max 75 octets per line as required by RFC 5545/2425.
+
+    Args:
+        line: unfolded content line without line break
+
+    Returns:
+        folded content line including final CRLF
+    """
+    encoded = line.encode("utf-8")
+    if len(encoded) <= MAX_LINE_OCTETS:
+        return line + "\r\n"
+
+    parts = []
+    current = ""
+    current_octets = 0
+    for char in line:
+        char_octets = len(char.encode("utf-8"))
+        # continuation lines start with a space which counts towards the limit
+        limit = MAX_LINE_OCTETS if len(parts) == 0 else MAX_LINE_OCTETS - 1
+        if current_octets + char_octets > limit:
+            parts.append(current)
+            current = ""
+            current_octets = 0
+        current += char
+        current_octets += char_octets
+    parts.append(current)
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def format_ics_datetime(value: datetime) -> str:
+    """Format a timezone aware datetime as UTC iCalendar value."""
+    return value.astimezone(pytz.UTC).strftime("%Y%m%dT%H%M%SZ")
+
+
+def iter_calendar_ics(
+    entries: list[dict], calendar_name: str, uid_domain: str, generated: datetime
+) -> Iterator[str]:
+    """Generate an iCalendar feed from calendar appointments entries.
+
+    Args:
+        entries: as returned by helper.get_calendar_appointments_entries
+        calendar_name: name shown by calendar apps
+        uid_domain: domain used as suffix of the event UIDs
+        generated: time used as DTSTAMP
+
+    Yields:
+        folded content lines including CRLF
+    """
+    yield fold_line("BEGIN:VCALENDAR")
+    yield fold_line("VERSION:2.0")
+    yield fold_line("PRODID:-//ChurchWebHelper//Calendar Appointments//DE")
+    yield fold_line("CALSCALE:GREGORIAN")
+    yield fold_line(f"X-WR-CALNAME:{escape_text(calendar_name)}")
+
+    dtstamp = format_ics_datetime(generated)
+    for entry in entries:
+        start = entry["start_date"]
+        yield fold_line("BEGIN:VEVENT")
+        yield fold_line(f"UID:{entry['id']}-{format_ics_datetime(start)}@{uid_domain}")
+        yield fold_line(f"DTSTAMP:{dtstamp}")
+        if entry["all_day"]:
+            end = entry["end_date"].date() + timedelta(days=1)
+            yield fold_line(f"DTSTART;VALUE=DATE:{start.strftime('%Y%m%d')}")
+            yield fold_line(f"DTEND;VALUE=DATE:{end.strftime('%Y%m%d')}")
+        else:
+            yield fold_line(f"DTSTART:{format_ics_datetime(start)}")
+            yield fold_line(f"DTEND:{format_ics_datetime(entry['end_date'])}")
+        yield fold_line(f"SUMMARY:{escape_text(entry['caption'])}")
+
+        description = [
+            text for text in (entry["special_day_name"], entry["persons"]) if text
+        ]
+        if len(description) > 0:
+            yield fold_line(f"DESCRIPTION:{escape_text(chr(10).join(description))}")
+        yield fold_line("END:VEVENT")
+
+    yield fold_line("END:VCALENDAR")
+
+
+def iter_calendar_json(entries: list[dict]) -> Iterator[str]:
+    """Generate a JSON feed from calendar appointments entries.
+
+    Args:
+        entries: as returned by helper.get_calendar_appointments_entries
+
+    Yields:
+        parts of a JSON object with a list of appointments
+    """
+    yield '{"appointments": ['
+    for index, entry in enumerate(entries):
+        item = {
+            "id": entry["id"],
+            "caption": entry["caption"],
+            "startDate": entry["start_date"].isoformat(),
+            "endDate": entry["end_date"].isoformat(),
+            "allDay": entry["all_day"],
+            "specialDayName": entry["special_day_name"],
+            "persons": entry["persons"],
+        }
+        yield ("," if index > 0 else "") + json.dumps(item, ensure_ascii=False)
+    yield "]}"
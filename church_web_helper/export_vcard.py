@@ -0,0 +1,219 @@
+"""This module implements all helper functions specific to vCard contact export.
+
+Persons are requested page by page and converted one by one
+so that the export can be streamed as response.
+Incremental exports compare content hashes with the export of a sync token.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import secrets
+import time
+from collections.abc import Hashable, Iterable, Iterator
+from http import HTTPStatus
+from pathlib import Path
+
+import requests
+from churchtools_api.churchtools_api import ChurchToolsApi
+
+from church_web_helper.export_feeds import escape_text, fold_line
+
+logger = logging.getLogger(__name__)
+
+VCARD_MIMETYPE = "text/vcard"
+PERSONS_PAGE_SIZE = 200
+VCARD_PHONE_FIELDS = {"phonePrivate": "HOME", "phoneWork": "WORK", "mobile": "CELL"}
+SYNC_TOKEN_PATTERN = re.compile(r"^\d+-[0-9a-f]{8}$")
+
+
+def iter_persons(
+    ct_api: ChurchToolsApi, page_size: int = PERSONS_PAGE_SIZE
+) -> Iterator[dict]:
+    """Request all persons page by page.
+
+    The session of ct_api is used directly because ChurchToolsApi.get_persons
+    requests all pages before returning - the export could not be streamed.
+
+    Args:
+        ct_api: initialized churchtools api connection used as datasource
+        page_size: number of persons requested at once
+
+    Yields:
+        persons as returned by /api/persons
+
+    Raises:
+        requests.HTTPError: if a page can't be retrieved - an incomplete list
+            of persons would otherwise look like a complete export
+    """
+    url = ct_api.domain + "/api/persons"
+    headers = {"accept": "application/json"}
+    page = 1
+    while True:
+        response = ct_api.session.get(
+            url=url, params={"page": page, "limit": page_size}, headers=headers
+        )
+        if response.status_code != HTTPStatus.OK:
+            logger.warning(
+                "%s requesting persons page %s: %s",
+                response.status_code,
+                page,
+                response.content,
+            )
+            msg = f"{response.status_code} requesting persons page {page}"
+            raise requests.HTTPError(msg, response=response)
+
+        response_content = json.loads(response.content)
+        yield from response_content["data"]
+
+        last_page = response_content["meta"]["pagination"]["lastPage"]
+        logger.debug("received persons page %s/%s", page, last_page)
+        if page >= last_page:
+            return
+        page += 1
+
+
+def get_person_uid(person: dict, uid_domain: str) -> str:
+    """Stable unique id of a person used as vCard UID."""
+    return f"person-{person['id']}@{uid_domain}"
+
+
+def format_person_vcard(person: dict, uid: str | None = None) -> str:
+    """Serialize name and phone numbers of a person as vCard 3.0.
+
+    Equivalent to the vobject serialization of the same fields
+    but without building component objects. Missing numbers are skipped.
+
+    Args:
+        person: person as returned by ChurchTools
+        uid: optional UID of the vCard
+
+    Returns:
+        folded vCard including final CRLF
+    """
+    full_name = f"{person['firstName']} {person['lastName']}"
+    lines = ["BEGIN:VCARD\r\n", "VERSION:3.0\r\n"]
+    if uid is not None:
+        lines.append(fold_line(f"UID:{escape_text(uid)}"))
+    lines.append(fold_line(f"FN:{escape_text(full_name)}"))
+    for field, tel_type in VCARD_PHONE_FIELDS.items():
+        if number := person.get(field):
+            lines.append(fold_line(f"TEL;TYPE={tel_type}:{escape_text(number)}"))
+    lines.append("END:VCARD\r\n")
+    return "".join(lines)
+
+
+def iter_vcards(
+    persons: Iterable[dict], uid_domain: str | None = None
+) -> Iterator[str]:
+    """Serialize persons as vCards.
+
+    Args:
+        persons: persons as returned by ChurchTools
+        uid_domain: domain used as suffix of UIDs - None for vCards without UID
+
+    Yields:
+        one serialized vCard per person
+    """
+    for person in persons:
+        uid = get_person_uid(person, uid_domain) if uid_domain else None
+        yield format_person_vcard(person, uid=uid)
+
+
+def get_contact_changes(
+    persons: Iterable[dict], previous_hashes: dict[str, str], uid_domain: str
+) -> tuple[list[str], dict[str, str], list[str]]:
+    """Compare vCards of all persons with the hashes of a previous export.
+
+    Args:
+        persons: persons as returned by ChurchTools
+        previous_hashes: dict of UID and vCard hash of the previous export
+        uid_domain: domain used as suffix of UIDs
+
+    Returns:
+        list of new or changed vCards,
+        dict of UID and vCard hash of all persons,
+        list of UIDs which were removed since the previous export
+    """
+    changed = []
+    hashes = {}
+    for person in persons:
+        uid = get_person_uid(person, uid_domain)
+        vcard = format_person_vcard(person, uid=uid)
+        hashes[uid] = hashlib.sha256(vcard.encode("utf-8")).hexdigest()
+        if previous_hashes.get(uid) != hashes[uid]:
+            changed.append(vcard)
+    removed = sorted(uid for uid in previous_hashes if uid not in hashes)
+    return changed, hashes, removed
+
+
+class ContactSyncStore:
+    """vCard hashes of previous exports of one user identified by sync tokens.
+
+    Visible persons depend on the permissions of a user, therefore each user
+    has own tokens - a token of another user is treated as unknown.
+    """
+
+    def __init__(
+        self, directory: Path, domain: str, user_id: Hashable, max_tokens: int = 10
+    ) -> None:
+        """Init store - files are located in a sub directory per domain and user.
+
+        Args:
+            directory: base directory of all sync states
+            domain: ChurchTools domain of the exported persons
+            user_id: user whose permissions were used to request the persons
+            max_tokens: number of most recent sync tokens which are kept per user
+        """
+        domain_name = re.sub(r"^https?://", "", domain).strip("/")
+        self.directory = (
+            directory
+            / re.sub(r"[^\w.-]", "_", domain_name)
+            / re.sub(r"[^\w.-]", "_", str(user_id))
+        )
+        self.max_tokens = max_tokens
+
+    def load(self, sync_token: str) -> dict[str, str] | None:
+        """Hashes of the export of a sync token.
+
+        Args:
+            sync_token: as returned by save
+
+        Returns:
+            dict of UID and vCard hash - None if the token is unknown or expired
+            or was issued to another user
+        """
+        if not SYNC_TOKEN_PATTERN.match(sync_token):
+            return None
+        path = self.directory / f"{sync_token}.json"
+        if not path.exists():
+            return None
+        with path.open(encoding="utf-8") as f_in:
+            return json.load(f_in)
+
+    def save(self, hashes: dict[str, str]) -> str:
+        """Store hashes of an export and remove states of outdated tokens.
+
+        Args:
+            hashes: dict of UID and vCard hash
+
+        Returns:
+            new sync token
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        sync_token = f"{time.time_ns()}-{secrets.token_hex(4)}"
+        path = self.directory / f"{sync_token}.json"
+        temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with temp_path.open("w", encoding="utf-8") as f_out:
+            json.dump(hashes, f_out)
+        temp_path.replace(path)
+
+        paths = sorted(
+            self.directory.glob("*.json"),
+            key=lambda path: int(path.stem.split("-")[0]),
+        )
+        for outdated_path in paths[: -self.max_tokens]:
+            outdated_path.unlink(missing_ok=True)
+        return sync_token
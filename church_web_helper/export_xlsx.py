@@ -6,6 +6,8 @@ from datetime import datetime
 import pandas as pd
 import xlsxwriter
 
+from church_web_helper.date_formatting import format_date
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,7 +26,7 @@ def get_plan_months_xlsx(  # noqa: C901
     """
     workbook = xlsxwriter.Workbook(filename)
 
-    heading = f"{from_date.strftime('%B %Y')}"
+    heading = format_date(from_date, "%B %Y")
     worksheet = workbook.add_worksheet(name=heading)
 
     locations = {item[0] for item in data.columns[2:]}
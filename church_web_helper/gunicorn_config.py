@@ -0,0 +1,43 @@
+"""Gunicorn settings used to run the app in production.
+
+Usage:
+gunicorn --config python:church_web_helper.gunicorn_config church_web_helper.app:app
+
+Requests spend most of their time waiting for ChurchTools or Communi,
+therefore each worker process serves multiple requests using threads.
+The app is imported once before workers are forked - background jobs like
+SNAPSHOT_PUBLISHER and CT_MIRROR therefore run once in the master process
+and caches created during import are shared copy-on-write.
+
+All values can be adjusted with the environment variables listed below.
+"""
+
+import os
+from pathlib import Path
+
+# address the server listens on
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+
+# processes - caches are kept per process
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+worker_class = "gthread"
+# requests served concurrently by each worker
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+
+# seconds before a busy worker is restarted - plan exports request many events
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "5"))
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "True").lower() == "true"
+
+# recycle workers to limit memory growth of long running processes
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+accesslog = os.environ.get("GUNICORN_ACCESSLOG", "-") or None
+errorlog = "-"
+
+# heartbeat files on disk can block workers in containers
+if Path("/dev/shm").is_dir():  # noqa: S108
+    worker_tmp_dir = "/dev/shm"  # noqa: S108
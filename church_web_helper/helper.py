@@ -5,14 +5,29 @@ It is used to outsource parts which don't need to be part of app.py
 
 import logging
 from collections import OrderedDict
-from datetime import datetime
+from collections.abc import Callable, Hashable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Any
 
-import pandas as pd
 from churchtools_api.churchtools_api import ChurchToolsApi
 from dateutil.relativedelta import relativedelta
 
+from church_web_helper.cache import TTLCache
+
+if TYPE_CHECKING:
+    import pandas as pd
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_WORKERS = 8
+
+# agendas are keyed by (ct domain, user, event id) and rarely change within minutes
+EVENT_AGENDA_CACHE = TTLCache(maxsize=512, ttl=10 * 60)
+# events without agenda can't be told apart from failed requests - kept shortly
+EVENT_AGENDA_MISSING_TTL = 60
+_MISSING = object()
+
 
 def get_special_day_name(
     ct_api: ChurchToolsApi, special_name_calendar_ids: list[int], date: datetime
@@ -92,9 +107,11 @@ def extract_relevant_calendar_appointment_shortname(longname: str) -> str:
     return result
 
 
-def deduplicate_df_index_with_lists(df_input: pd.DataFrame) -> pd.DataFrame:
+def deduplicate_df_index_with_lists(df_input: "pd.DataFrame") -> "pd.DataFrame":
     """Flattens a df with multiple same index entries to list entries.
 
+    pandas is imported on first use because most pages don't need it.
+
     Args:
         df_input: the original dataframe which contains multiple entries
             for "shortDay" index per column
@@ -102,6 +119,8 @@ def deduplicate_df_index_with_lists(df_input: pd.DataFrame) -> pd.DataFrame:
     Returns:
         flattened df which has unique shortDay and combined lists in cells
     """
+    import pandas as pd  # noqa: PLC0415
+
     shortDays = list(OrderedDict.fromkeys(df_input["shortDay"]).keys())
     df_output = pd.DataFrame(columns=df_input.columns)
     for shortDay in shortDays:
@@ -167,3 +186,264 @@ def get_primary_resource(
         appointment_id=appointment_id,
     )
     return {booking["base"]["resource"]["name"] for booking in bookings}
+
+
+def run_concurrently(
+    func: Callable[[Any], Any],
+    items: Iterable[Hashable],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> dict[Hashable, Any]:
+    """Execute func for each item using a bounded thread pool.
+
+    Used for independent remote requests which would otherwise run sequentially.
+
+    Args:
+        func: callable which is called with one item as only argument
+        items: unique items which should be processed
+        max_workers: max number of requests executed in parallel
+
+    Returns:
+        dict of item and result - exceptions raised by func are returned as value
+    """
+    items = list(dict.fromkeys(items))
+    if len(items) == 0:
+        return {}
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        futures = {item: executor.submit(func, item) for item in items}
+        for item, future in futures.items():
+            try:
+                results[item] = future.result()
+            except Exception as exception:  # noqa: BLE001
+                logger.warning(
+                    "concurrent execution failed for %s: %s", item, exception
+                )
+                results[item] = exception
+    return results
+
+
+def get_event_agenda(
+    ct_api: ChurchToolsApi, event_id: int, user_id: Hashable
+) -> dict | None:
+    """Retrieve the agenda of an event using EVENT_AGENDA_CACHE.
+
+    Visibility depends on the permissions of a user, therefore agendas are
+    cached per user. None might be a failed request as well as an event without
+    agenda, therefore it is only cached for EVENT_AGENDA_MISSING_TTL.
+
+    Args:
+        ct_api: initialized churchtools api connection used as datasource
+        event_id: id of the event
+        user_id: identifies the user logged in with ct_api
+
+    Returns:
+        agenda as returned by ChurchTools or None if the event has no agenda
+    """
+    cache_key = (ct_api.domain, user_id, event_id)
+    agenda = EVENT_AGENDA_CACHE.get(cache_key, _MISSING)
+    if agenda is _MISSING:
+        agenda = ct_api.get_event_agenda(event_id)
+        EVENT_AGENDA_CACHE.set(
+            cache_key,
+            agenda,
+            ttl=EVENT_AGENDA_MISSING_TTL if agenda is None else None,
+        )
+    return agenda
+
+
+def get_event_agendas(
+    ct_api: ChurchToolsApi,
+    event_ids: list[int],
+    user_id: Hashable,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> dict[int, dict | None]:
+    """Retrieve the agendas of multiple events concurrently.
+
+    Args:
+        ct_api: initialized churchtools api connection used as datasource
+        event_ids: ids of the events
+        user_id: identifies the user logged in with ct_api
+        max_workers: max number of requests executed in parallel
+
+    Returns:
+        dict of event id and agenda - None if not available or request failed
+    """
+    results = run_concurrently(
+        lambda event_id: get_event_agenda(
+            ct_api=ct_api, event_id=event_id, user_id=user_id
+        ),
+        event_ids,
+        max_workers=max_workers,
+    )
+    return {
+        event_id: None if isinstance(agenda, Exception) else agenda
+        for event_id, agenda in results.items()
+    }
+
+
+def parse_ct_datetime(value: str) -> datetime:
+    """Convert a ChurchTools date or datetime string into a timezone aware datetime.
+
+    Args:
+        value: e.g. "2024-12-24", "2024-12-24T09:00:00Z" or "2024-12-24T10:00:00+01:00"
+
+    Returns:
+        datetime in local timezone - dates are interpreted as local midnight
+    """
+    if len(value) == len("YYYY-MM-DD"):
+        return datetime.strptime(value, "%Y-%m-%d").astimezone()
+    if value[-1] in ("Z", "z"):
+        value = value[:-1] + "+00:00"
+    return datetime.fromisoformat(value).astimezone()
+
+
+def get_special_day_names(
+    ct_api: ChurchToolsApi,
+    special_name_calendar_ids: list[int],
+    from_: datetime,
+    to_: datetime,
+) -> dict[date, str]:
+    """Retrieve the name of the first calendar entry for each day of a range.
+
+    Same as get_special_day_name but using one request for all days.
+    Appointments spanning multiple days are used for each day.
+
+    Args:
+        ct_api: initialized churchtools api connection used as datasource
+        special_name_calendar_ids: list of calendar ids used for special names
+        from_: first day of the range
+        to_: last day of the range
+
+    Returns:
+        dict of local date and first caption on that day - usually name of a holiday
+    """
+    if len(special_name_calendar_ids) == 0:
+        return {}
+
+    trunc_from = datetime(year=from_.year, month=from_.month, day=from_.day)
+    trunc_to = datetime(year=to_.year, month=to_.month, day=to_.day)
+    special_names = ct_api.get_calendar_appointments(
+        calendar_ids=special_name_calendar_ids,
+        from_=trunc_from,
+        to_=trunc_to + relativedelta(days=1) - relativedelta(seconds=1),
+    )
+
+    result = {}
+    for appointment in special_names or []:
+        start_day = parse_ct_datetime(appointment["startDate"]).date()
+        end_day = parse_ct_datetime(
+            appointment.get("endDate") or appointment["startDate"]
+        ).date()
+        for offset in range((end_day - start_day).days + 1):
+            result.setdefault(
+                start_day + timedelta(days=offset), appointment["caption"]
+            )
+    return result
+
+
+def get_events_by_calendar_appointment(
+    ct_api: ChurchToolsApi, from_: datetime, to_: datetime
+) -> dict[tuple[int, datetime], dict]:
+    """Retrieve all events of a range including their services with one request.
+
+    Used instead of get_event_by_calendar_appointment for each appointment
+
+    Args:
+        ct_api: initialized churchtools api connection used as datasource
+        from_: start of the range
+        to_: end of the range
+
+    Returns:
+        dict of (appointment id, start datetime) and event including eventServices
+    """
+    events = ct_api.get_events(from_=from_, to_=to_, include="eventServices")
+    return {
+        (event["appointmentId"], parse_ct_datetime(event["startDate"])): event
+        for event in events or []
+        if event.get("appointmentId")
+    }
+
+
+def get_calendar_appointments_entries(  # noqa: PLR0913
+    ct_api: ChurchToolsApi,
+    calendar_ids: list[int],
+    from_: datetime,
+    to_: datetime,
+    services: list[int] | None,
+    special_name_calendar_ids: list[int],
+) -> list[dict]:
+    """Retrieve calendar appointments including special day names and service persons.
+
+    Special day names and events are requested once for the whole range
+    and joined in memory with the appointments.
+
+    Args:
+        ct_api: initialized churchtools api connection used as datasource
+        calendar_ids: calendars to include
+        from_: start of the range
+        to_: end of the range
+        services: service IDs of persons which should be added to each appointment
+        special_name_calendar_ids: calendar IDs used for special day names
+
+    Returns:
+        list of dicts with id, caption, start_date, end_date, all_day,
+            special_day_name and persons (None if not applicable)
+    """
+    appointments = ct_api.get_calendar_appointments(
+        calendar_ids=calendar_ids, from_=from_, to_=to_
+    )
+    if not appointments:
+        return []
+
+    special_day_names = get_special_day_names(
+        ct_api=ct_api,
+        special_name_calendar_ids=special_name_calendar_ids,
+        from_=from_,
+        to_=to_,
+    )
+    events = (
+        get_events_by_calendar_appointment(ct_api=ct_api, from_=from_, to_=to_)
+        if services is not None
+        else {}
+    )
+
+    entries = []
+    for appointment in appointments:
+        start_date = parse_ct_datetime(appointment["startDate"])
+        end_date = parse_ct_datetime(
+            appointment.get("endDate") or appointment["startDate"]
+        )
+
+        persons = None
+        if services is not None:
+            event = events.get((appointment["id"], start_date))
+            if event is None:
+                logger.debug(
+                    "appointment %s not prefetched - requesting event",
+                    appointment["id"],
+                )
+                event = ct_api.get_event_by_calendar_appointment(
+                    appointment["id"], start_date
+                )
+            available_services = event["eventServices"] if event else []
+            persons = [
+                service["name"]
+                for service in available_services
+                if service["serviceId"] in services and service["name"] is not None
+            ]
+            persons = ", ".join(persons) if len(persons) > 0 else None
+
+        entries.append(
+            {
+                "id": appointment["id"],
+                "caption": appointment["caption"],
+                "start_date": start_date,
+                "end_date": end_date,
+                "all_day": bool(appointment.get("allDay"))
+                or len(appointment["startDate"]) == len("YYYY-MM-DD"),
+                "special_day_name": special_day_names.get(start_date.date(), ""),
+                "persons": persons,
+            }
+        )
+    return entries
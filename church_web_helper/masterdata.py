@@ -0,0 +1,119 @@
+"""This module implements cached access to ChurchTools masterdata.
+
+Calendars, resources and event masterdata rarely change but were requested
+by multiple pages on every request. They are kept in a cache which is
+shared by all workers - see MASTERDATA_CACHE in app.py.
+Visibility depends on the permissions of a user,
+therefore cache keys contain the domain and the id of the user.
+Failed requests are not cached - they would hide masterdata for hours.
+"""
+
+import logging
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from churchtools_api.churchtools_api import ChurchToolsApi
+
+from church_web_helper.cache import Cache
+
+logger = logging.getLogger(__name__)
+
+
+def _get_or_request(
+    cache: Cache,
+    key: Hashable,
+    request: Callable[[], Any],
+    default: Any,  # noqa: ANN401
+) -> Any:  # noqa: ANN401
+    """Cached value or response of request - failed requests are not stored.
+
+    Args:
+        cache: cache used to store the result
+        key: the cache key
+        request: callable without params returning None if the request failed
+        default: returned without caching if the request failed
+
+    Returns:
+        cached or newly requested value, default if the request failed
+    """
+    value = cache.get(key)
+    if value is None:
+        value = request()
+        if value is None:
+            logger.warning("failed requesting %s - not cached", key[0])
+            return default
+        cache.set(key, value)
+    return value
+
+
+def get_calendars(
+    ct_api: ChurchToolsApi, cache: Cache, cache_key: Hashable
+) -> list[dict]:
+    """All calendars visible for a user.
+
+    Args:
+        ct_api: initialized churchtools api connection of the user
+        cache: cache used to store the result
+        cache_key: identifies domain and user
+
+    Returns:
+        list of calendars as returned by ChurchTools - empty if the request failed
+    """
+    return _get_or_request(
+        cache, ("calendars", cache_key), ct_api.get_calendars, default=[]
+    )
+
+
+def get_resource_masterdata(
+    ct_api: ChurchToolsApi, result_class: str, cache: Cache, cache_key: Hashable
+) -> list[dict]:
+    """Resource masterdata of one kind e.g. resources or resourceTypes.
+
+    Args:
+        ct_api: initialized churchtools api connection of the user
+        result_class: kind of masterdata as used by ChurchTools
+        cache: cache used to store the result
+        cache_key: identifies domain and user
+
+    Returns:
+        masterdata items as returned by ChurchTools - empty if the request failed
+    """
+    return _get_or_request(
+        cache,
+        ("resource_masterdata", result_class, cache_key),
+        lambda: ct_api.get_resource_masterdata(resultClass=result_class),
+        default=[],
+    )
+
+
+def get_event_masterdata(
+    ct_api: ChurchToolsApi,
+    cache: Cache,
+    cache_key: Hashable,
+    result_class: str | None = None,
+    *,
+    return_as_dict: bool = False,
+) -> dict | list[dict]:
+    """Event masterdata - all kinds are cached with a single request.
+
+    Args:
+        ct_api: initialized churchtools api connection of the user
+        cache: cache used to store the result
+        cache_key: identifies domain and user
+        result_class: optional kind of masterdata e.g. serviceGroups or services
+        return_as_dict: return dict of id and name instead of a list of result_class
+
+    Returns:
+        dict of all kinds if result_class is None,
+        list of items of result_class or dict of id and name of these items,
+        empty if the request failed
+    """
+    event_masterdata = _get_or_request(
+        cache, ("event_masterdata", cache_key), ct_api.get_event_masterdata, default={}
+    )
+    if result_class is None:
+        return event_masterdata
+    items = event_masterdata.get(result_class, [])
+    if return_as_dict:
+        return {item["id"]: item["name"] for item in items}
+    return items
@@ -0,0 +1,315 @@
+"""This module implements data transformations used for the service workload page.
+
+It is used to outsource parts of ct_service_workload which don't need to be
+part of app.py and work on whole columns instead of single events.
+"""
+
+import logging
+import re
+
+import numpy as np
+import pandas as pd
+
+from church_web_helper.date_formatting import MONTH_NAMES
+
+logger = logging.getLogger(__name__)
+
+SERVICE_RECORD_COLUMNS = ["Datum", "Eventname", "Dienst", "Name"]
+
+
+def compile_exclude_patterns(exclude_patterns: list[str]) -> re.Pattern | None:
+    """Combine multiple regex patterns into one compiled pattern.
+
+    Args:
+        exclude_patterns: list of regex strings
+
+    Returns:
+        pattern which matches if any of the patterns matches - None if empty
+    """
+    if len(exclude_patterns) == 0:
+        return None
+    return re.compile("|".join(f"(?:{pattern})" for pattern in exclude_patterns))
+
+
+def flatten_event_services(events: list[dict]) -> pd.DataFrame:
+    """Create one row per service of all events.
+
+    Args:
+        events: events including eventServices as returned by ChurchTools
+
+    Returns:
+        df with columns Datum, Eventname, calendar_id, Dienst (service id) and Name
+    """
+    records = [
+        (
+            event["startDate"],
+            event["name"],
+            int(event["calendar"]["domainIdentifier"]),
+            service["serviceId"],
+            service["name"],
+        )
+        for event in events
+        for service in event["eventServices"]
+    ]
+    df_services = pd.DataFrame.from_records(
+        records, columns=["Datum", "Eventname", "calendar_id", "Dienst", "Name"]
+    )
+    df_services["Datum"] = pd.to_datetime(
+        df_services["Datum"], format="%Y-%m-%dT%H:%M:%SZ"
+    )
+    return df_services
+
+
+def filter_service_records(
+    df_services: pd.DataFrame,
+    selected_calendars: list[int],
+    exclude_patterns: list[str],
+) -> pd.DataFrame:
+    """Keep rows of selected calendars and not excluded event names.
+
+    Args:
+        df_services: df with calendar_id and Eventname columns
+        selected_calendars: calendar ids which should be kept
+        exclude_patterns: regex strings - events with matching names are removed
+
+    Returns:
+        filtered df with new index
+    """
+    keep = df_services["calendar_id"].isin(list(selected_calendars))
+    if (exclude_pattern := compile_exclude_patterns(exclude_patterns)) is not None:
+        keep &= ~df_services["Eventname"].str.contains(exclude_pattern)
+    return df_services.loc[keep].reset_index(drop=True)
+
+
+def collect_service_records(
+    events: list[dict], selected_calendars: list[int], exclude_patterns: list[str]
+) -> pd.DataFrame:
+    """Flatten the service assignments of events into one row per service.
+
+    Args:
+        events: events including eventServices as returned by ChurchTools
+        selected_calendars: calendar ids which should be kept
+        exclude_patterns: regex strings - events with matching names are removed
+
+    Returns:
+        df with columns Datum, Eventname, Dienst (service id) and Name
+    """
+    df_services = filter_service_records(
+        flatten_event_services(events),
+        selected_calendars=selected_calendars,
+        exclude_patterns=exclude_patterns,
+    )
+    logger.debug("collected %s service records", len(df_services))
+
+    return df_services[SERVICE_RECORD_COLUMNS]
+
+
+def prepare_service_data(
+    service_records: pd.DataFrame,
+    service_names: dict[int, str],
+    min_services_count: int,
+) -> pd.DataFrame:
+    """Keep relevant services only and convert to categorical person/service dtypes.
+
+    Args:
+        service_records: as returned by collect_service_records
+        service_names: dict of service id and name of all services to keep
+        min_services_count: persons need more services than this to be kept
+
+    Returns:
+        df with service names in Dienst and categorical Name and Dienst columns
+    """
+    service_data = service_records.loc[
+        service_records["Dienst"].isin(list(service_names))
+    ].copy()
+    service_data["Dienst"] = service_data["Dienst"].map(service_names)
+    service_data["Name"] = service_data["Name"].fillna("? noch offen")
+
+    # remove all entries which don't meet minimum service count required
+    counts = service_data["Name"].value_counts()
+    service_data = service_data.loc[
+        service_data["Name"].isin(counts.index[counts > min_services_count])
+    ]
+
+    return service_data.astype({"Name": "category", "Dienst": "category"})
+
+
+def filter_persons(service_data: pd.DataFrame, persons: list[str]) -> pd.DataFrame:
+    """Keep services of the selected persons only.
+
+    Args:
+        service_data: as returned by prepare_service_data
+        persons: names which should be kept
+
+    Returns:
+        df without unused person categories
+    """
+    service_data = service_data.loc[service_data["Name"].isin(persons)].copy()
+    service_data["Name"] = service_data["Name"].cat.remove_unused_categories()
+    return service_data
+
+
+def get_counts_by_date(service_data: pd.DataFrame) -> pd.DataFrame:
+    """Number of services per person and date.
+
+    Args:
+        service_data: as returned by prepare_service_data
+
+    Returns:
+        df with sorted dates as index, persons as columns and counts
+    """
+    return (
+        service_data.groupby(["Datum", "Name"], observed=True)
+        .size()
+        .unstack(fill_value=0)
+        .sort_index()
+    )
+
+
+def get_cumulative_counts_by_date(service_data: pd.DataFrame) -> pd.DataFrame:
+    """Running total of services per person.
+
+    Args:
+        service_data: as returned by prepare_service_data
+
+    Returns:
+        df with sorted dates as index, persons as columns and cumulative counts
+    """
+    return get_counts_by_date(service_data).cumsum()
+
+
+def get_service_type_counts(service_data: pd.DataFrame) -> pd.DataFrame:
+    """Number of services per person and service type.
+
+    Args:
+        service_data: as returned by prepare_service_data
+
+    Returns:
+        df with persons as index and service types as columns
+    """
+    return (
+        service_data.groupby(["Name", "Dienst"], observed=True)
+        .size()
+        .unstack(fill_value=0)
+    )
+
+
+def get_weekly_heatmap(service_data: pd.DataFrame) -> pd.DataFrame:
+    """Number of services per person and ISO week as dense matrix.
+
+    Weeks without services between first and last week are included.
+
+    Args:
+        service_data: as returned by prepare_service_data
+
+    Returns:
+        df with persons as index and ISO weeks like 2024-W05 as columns
+    """
+    persons = service_data["Name"].cat.categories
+    if len(service_data) == 0:
+        return pd.DataFrame(index=persons, columns=[], dtype=int)
+
+    dates = service_data["Datum"].to_numpy(dtype="datetime64[D]")
+    # numpy weeks start on thursday 1970-01-01, shift by 3 days to start on monday
+    weeks = (dates.astype(np.int64) + 3) // 7
+    first_week = weeks.min()
+    week_indices = weeks - first_week
+    number_of_weeks = int(week_indices.max()) + 1
+
+    person_indices = service_data["Name"].cat.codes.to_numpy(dtype=np.int64)
+    matrix = np.bincount(
+        person_indices * number_of_weeks + week_indices,
+        minlength=len(persons) * number_of_weeks,
+    ).reshape(len(persons), number_of_weeks)
+
+    week_starts = pd.DatetimeIndex(
+        ((np.arange(number_of_weeks) + first_week) * 7 - 3).astype("datetime64[D]")
+    )
+    return pd.DataFrame(
+        matrix,
+        index=persons,
+        columns=pd.Index(week_starts.strftime("%G-W%V"), name="Woche"),
+    )
+
+
+def get_monthly_counts(service_data: pd.DataFrame) -> pd.DataFrame:
+    """Number of services per month and person.
+
+    Months without services between first and last month are included.
+
+    Args:
+        service_data: as returned by prepare_service_data
+
+    Returns:
+        df with chronologically sorted monthly PeriodIndex and persons as columns
+    """
+    df_monthly = (
+        service_data.groupby(
+            [service_data["Datum"].dt.to_period("M").rename("Monat"), "Name"],
+            observed=True,
+        )
+        .size()
+        .unstack(fill_value=0)
+    )
+    if len(df_monthly) == 0:
+        return df_monthly
+
+    months = pd.period_range(
+        df_monthly.index.min(), df_monthly.index.max(), freq="M", name="Monat"
+    )
+    return df_monthly.reindex(months, fill_value=0)
+
+
+def get_cumulative_monthly_counts(monthly_counts: pd.DataFrame) -> pd.DataFrame:
+    """Running total of services per person by month.
+
+    Args:
+        monthly_counts: as returned by get_monthly_counts
+
+    Returns:
+        df with same shape as monthly_counts
+    """
+    return monthly_counts.cumsum()
+
+
+def format_month_index(df_monthly: pd.DataFrame) -> pd.DataFrame:
+    """Replace monthly PeriodIndex by readable labels for display.
+
+    Args:
+        df_monthly: df with monthly PeriodIndex
+
+    Returns:
+        copy of the df with labels like "2024-01 Januar"
+    """
+    df_monthly = df_monthly.copy()
+    df_monthly.index = (
+        df_monthly.index.strftime("%Y-%m ") + df_monthly.index.month.map(MONTH_NAMES)
+    ).rename("Monat")
+    return df_monthly
+
+
+def get_chart_data(service_data: pd.DataFrame) -> dict:
+    """Compact JSON serializable series used to draw charts in the browser.
+
+    Counts per date are not cumulated to keep the payload small,
+    the running total is calculated by the client.
+
+    Args:
+        service_data: as returned by prepare_service_data
+
+    Returns:
+        dict with dates, persons and services labels and nested lists of counts
+        counts_by_date is indexed [person][date]
+        counts_by_service is indexed [service][person]
+    """
+    df_dates = get_counts_by_date(service_data)
+    df_services = get_service_type_counts(service_data)
+
+    return {
+        "dates": df_dates.index.strftime("%Y-%m-%dT%H:%M").tolist(),
+        "persons": [str(person) for person in df_dates.columns],
+        "counts_by_date": df_dates.T.to_numpy().tolist(),
+        "services": [str(service) for service in df_services.columns],
+        "service_persons": [str(person) for person in df_services.index],
+        "counts_by_service": df_services.T.to_numpy().tolist(),
+    }
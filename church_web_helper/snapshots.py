@@ -0,0 +1,137 @@
+"""This module implements pre-rendered snapshots of public pages.
+
+Public website traffic (e.g. the calendar appointments iframe)
+is served from static files which are refreshed in the background,
+therefore page views never reach ChurchTools.
+"""
+
+import json
+import logging
+import os
+import re
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from churchtools_api.churchtools_api import ChurchToolsApi
+
+from church_web_helper.background import PeriodicJob
+
+logger = logging.getLogger(__name__)
+
+VARIANT_NAME_PATTERN = re.compile(r"^[\w-]+$")
+
+
+def get_service_ct_api() -> ChurchToolsApi | None:
+    """Login to ChurchTools using CT_DOMAIN and CT_TOKEN env variables.
+
+    Used for requests which are not bound to a user session.
+
+    Returns:
+        initialized churchtools api connection or None if not configured
+    """
+    ct_domain = os.environ.get("CT_DOMAIN")
+    ct_token = os.environ.get("CT_TOKEN")
+    if not ct_domain or not ct_token:
+        return None
+    return ChurchToolsApi(domain=ct_domain, ct_token=ct_token)
+
+
+def load_snapshot_variants(config_path: Path) -> dict[str, dict[str, str]]:
+    """Read the widget variants which should be published.
+
+    The config file is a JSON object of variant name and GET params
+    e.g. {"gottesdienste": {"calendar_id": "2", "days": "14", "services": "1,2"}}
+
+    Args:
+        config_path: path of the JSON config file
+
+    Returns:
+        dict of variant name and GET params as str
+
+    Raises:
+        ValueError: if a variant name can't be used as filename
+    """
+    with config_path.open(encoding="utf-8") as f_in:
+        variants = json.load(f_in)
+
+    for name in variants:
+        if not VARIANT_NAME_PATTERN.match(name):
+            msg = f"invalid snapshot variant name {name}"
+            raise ValueError(msg)
+
+    return {
+        name: {key: str(value) for key, value in params.items()}
+        for name, params in variants.items()
+    }
+
+
+class SnapshotPublisher:
+    """Renders configured variants of a page to static HTML files."""
+
+    def __init__(
+        self,
+        directory: Path,
+        variants: dict[str, dict[str, str]],
+        render: Callable[[dict[str, str]], str],
+        interval: float = 15 * 60,
+    ) -> None:
+        """Init publisher without rendering.
+
+        Args:
+            directory: target directory for the html files
+            variants: dict of variant name and GET params
+            render: callable which renders the page for GET params
+            interval: seconds between refreshes
+        """
+        self.directory = directory
+        self.variants = variants
+        self.render = render
+        self.interval = interval
+        self._job = None
+
+    def get_path(self, name: str) -> Path | None:
+        """Path of the snapshot file for a variant.
+
+        Args:
+            name: the variant name
+
+        Returns:
+            path of the file or None if variant is unknown
+        """
+        if name not in self.variants:
+            return None
+        return self.directory / f"{name}.html"
+
+    def refresh(self, force: bool = False) -> None:  # noqa: FBT001, FBT002
+        """Render all variants and replace their files atomically.
+
+        Snapshots which were refreshed within the interval are skipped
+        so that multiple workers sharing the directory don't render them again.
+
+        Args:
+            force: render all variants independent of their age
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for name, params in self.variants.items():
+            path = self.get_path(name)
+            if (
+                not force
+                and path.exists()
+                and time.time() - path.stat().st_mtime < self.interval * 0.9
+            ):
+                logger.debug("snapshot %s is up to date", name)
+                continue
+
+            content = self.render(params)
+            temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            temp_path.write_text(content, encoding="utf-8")
+            temp_path.replace(path)
+            logger.info("refreshed snapshot %s", name)
+
+    def start(self) -> None:
+        """Start refreshing in a background thread."""
+        self._job = PeriodicJob(
+            name="snapshot_publisher", func=self.refresh, interval=self.interval
+        )
+        self._job.start()
@@ -0,0 +1,239 @@
+"""This module implements monthly service workload rollups for long time ranges.
+
+Service counts of closed months don't change anymore, therefore they are
+aggregated once per calendar, event name, service and person and stored
+as compressed columnar NumPy files - one immutable file per month.
+Rollups are stored per user because the services visible in ChurchTools
+depend on the permissions of the user.
+Only missing closed months and the current month are requested from ChurchTools.
+"""
+
+import logging
+import os
+import re
+from collections.abc import Hashable
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from churchtools_api.churchtools_api import ChurchToolsApi
+
+from church_web_helper.service_workload import (
+    filter_service_records,
+    flatten_event_services,
+)
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLUMNS = ["calendar_id", "Eventname", "Dienst", "Name", "count"]
+
+
+def build_monthly_rollups(events: list[dict]) -> dict[pd.Period, pd.DataFrame]:
+    """Aggregate services of events by month.
+
+    Args:
+        events: events including eventServices as returned by ChurchTools
+
+    Returns:
+        dict of month and df with ROLLUP_COLUMNS - Name is "" for open services
+    """
+    df_services = flatten_event_services(events)
+    df_services["Name"] = df_services["Name"].fillna("")
+    df_services["Monat"] = df_services["Datum"].dt.to_period("M")
+
+    df_counts = (
+        df_services.groupby(
+            ["Monat", "calendar_id", "Eventname", "Dienst", "Name"], sort=True
+        )
+        .size()
+        .rename("count")
+        .reset_index()
+    )
+    return {
+        month: df_month[ROLLUP_COLUMNS].reset_index(drop=True)
+        for month, df_month in df_counts.groupby("Monat")
+    }
+
+
+class WorkloadRollupStore:
+    """Directory of monthly rollups of one user of a ChurchTools domain."""
+
+    def __init__(self, directory: Path, domain: str, user_id: Hashable) -> None:
+        """Init store - files are located in a sub directory per domain and user.
+
+        Args:
+            directory: base directory of all rollups
+            domain: ChurchTools domain of the rollups
+            user_id: user whose permissions were used to request the services
+        """
+        domain_name = re.sub(r"^https?://", "", domain).strip("/")
+        self.directory = (
+            directory
+            / re.sub(r"[^\w.-]", "_", domain_name)
+            / re.sub(r"[^\w.-]", "_", str(user_id))
+        )
+
+    def get_path(self, month: pd.Period) -> Path:
+        """Location of the rollup file of a month."""
+        return self.directory / f"{month.strftime('%Y-%m')}.npz"
+
+    def load(self, month: pd.Period) -> pd.DataFrame | None:
+        """Read a stored rollup.
+
+        Args:
+            month: month of the rollup
+
+        Returns:
+            df with ROLLUP_COLUMNS or None if not stored yet
+        """
+        path = self.get_path(month)
+        if not path.exists():
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            return pd.DataFrame({column: data[column] for column in ROLLUP_COLUMNS})
+
+    def save(self, month: pd.Period, df_rollup: pd.DataFrame) -> None:
+        """Store a rollup - existing files are replaced atomically.
+
+        Args:
+            month: month of the rollup
+            df_rollup: df with ROLLUP_COLUMNS
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.get_path(month)
+        temp_path = path.with_suffix(f".{os.getpid()}.tmp.npz")
+        np.savez_compressed(
+            temp_path,
+            calendar_id=df_rollup["calendar_id"].to_numpy(dtype=np.int32),
+            Eventname=df_rollup["Eventname"].to_numpy(dtype=str),
+            Dienst=df_rollup["Dienst"].to_numpy(dtype=np.int32),
+            Name=df_rollup["Name"].to_numpy(dtype=str),
+            count=df_rollup["count"].to_numpy(dtype=np.int32),
+        )
+        temp_path.replace(path)
+
+    def get_rollups(
+        self,
+        ct_api: ChurchToolsApi,
+        from_month: pd.Period,
+        to_month: pd.Period,
+        today: datetime | None = None,
+    ) -> pd.DataFrame | None:
+        """Rollups of a range of months.
+
+        Missing closed months are requested with one request and stored,
+        the current and future months are always requested and never stored.
+        Nothing is stored if the request failed - empty rollups would never
+        be requested again.
+
+        Args:
+            ct_api: initialized churchtools api connection used for missing months
+            from_month: first month
+            to_month: last month - included
+            today: used to identify closed months - defaults to now
+
+        Returns:
+            df with Monat and ROLLUP_COLUMNS - None if services couldn't be requested
+        """
+        current_month = pd.Period(today or datetime.now(), freq="M")
+        months = pd.period_range(from_month, to_month, freq="M")
+
+        rollups = {}
+        for month in months:
+            if month < current_month:
+                df_rollup = self.load(month)
+                if df_rollup is not None:
+                    rollups[month] = df_rollup
+
+        missing = [month for month in months if month not in rollups]
+        if len(missing) > 0:
+            logger.info(
+                "requesting services of %s months (%s - %s)",
+                len(missing),
+                missing[0],
+                missing[-1],
+            )
+            events = ct_api.get_events(
+                from_=missing[0].start_time.to_pydatetime(),
+                to_=missing[-1].end_time.floor("s").to_pydatetime(),
+                include="eventServices",
+            )
+            if events is None:
+                logger.warning(
+                    "failed requesting services of %s - %s", missing[0], missing[-1]
+                )
+                return None
+            fetched = build_monthly_rollups(events)
+            empty = pd.DataFrame(
+                {column: pd.Series(dtype=int) for column in ROLLUP_COLUMNS}
+            ).astype({"Eventname": str, "Name": str})
+            for month in missing:
+                rollups[month] = fetched.get(month, empty)
+                if month < current_month:
+                    self.save(month, rollups[month])
+
+        if len(rollups) == 0:
+            return pd.DataFrame(columns=["Monat", *ROLLUP_COLUMNS])
+        return pd.concat(
+            [df.assign(Monat=month) for month, df in sorted(rollups.items())],
+            ignore_index=True,
+        )[["Monat", *ROLLUP_COLUMNS]]
+
+
+def get_monthly_counts_from_rollups(  # noqa: PLR0913
+    df_rollups: pd.DataFrame,
+    selected_calendars: list[int],
+    exclude_patterns: list[str],
+    service_names: dict[int, str],
+    min_services_count: int,
+    persons: list[str] | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Apply the same filters like the service workload page to rollups.
+
+    Args:
+        df_rollups: as returned by WorkloadRollupStore.get_rollups
+        selected_calendars: calendar ids which should be kept
+        exclude_patterns: regex strings - events with matching names are removed
+        service_names: dict of service id and name of all services to keep
+        min_services_count: persons need more services than this to be kept
+        persons: names which should be kept - None for all
+
+    Returns:
+        df with months as index and persons as columns,
+        df with persons as index and services as columns
+    """
+    df_rollups = filter_service_records(
+        df_rollups,
+        selected_calendars=selected_calendars,
+        exclude_patterns=exclude_patterns,
+    )
+    df_rollups = df_rollups.loc[df_rollups["Dienst"].isin(list(service_names))]
+    df_rollups = df_rollups.assign(
+        Dienst=df_rollups["Dienst"].map(service_names),
+        Name=df_rollups["Name"].replace("", "? noch offen"),
+    )
+
+    totals = df_rollups.groupby("Name")["count"].sum()
+    keep = totals.index[totals > min_services_count]
+    if persons is not None:
+        keep = keep.intersection(persons)
+    df_rollups = df_rollups.loc[df_rollups["Name"].isin(keep)]
+
+    df_monthly = df_rollups.pivot_table(
+        index="Monat", columns="Name", values="count", aggfunc="sum", fill_value=0
+    )
+    if len(df_monthly) > 0:
+        df_monthly = df_monthly.reindex(
+            pd.period_range(
+                df_rollups["Monat"].min(),
+                df_rollups["Monat"].max(),
+                freq="M",
+                name="Monat",
+            ),
+            fill_value=0,
+        )
+    df_service_types = df_rollups.pivot_table(
+        index="Name", columns="Dienst", values="count", aggfunc="sum", fill_value=0
+    )
+    return df_monthly, df_service_types
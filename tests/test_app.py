@@ -0,0 +1,328 @@
+"""All tests in regards to routes of app.py which don't require API access."""
+
+import json
+import logging
+import logging.config
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+from flask.testing import FlaskClient
+
+from church_web_helper import app as app_module
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+
+class FakeResponse:
+    """Minimal stand in for requests.Response."""
+
+    def __init__(self, status_code: int, content: dict) -> None:
+        """Init with JSON content."""
+        self.status_code = status_code
+        self.content = json.dumps(content).encode("utf-8")
+
+
+class FakePersonsSession:
+    """Minimal stand in for requests.Session serving one page of persons."""
+
+    def __init__(self, status_code: int) -> None:
+        """Init with the status code of all responses."""
+        self.status_code = status_code
+
+    def get(self, url: str, params: dict, headers: dict) -> FakeResponse:  # noqa: ARG002
+        """Single person on a single page."""
+        return FakeResponse(
+            self.status_code,
+            {
+                "data": [{"id": 7, "firstName": "Max", "lastName": "Muster"}],
+                "meta": {"pagination": {"lastPage": 1}},
+            },
+        )
+
+
+class FakeSessionApi:
+    """Minimal stand in for ChurchToolsApi and CommuniApi of a logged in user."""
+
+    def __init__(
+        self,
+        domain: str = "https://example.church.tools",
+        persons_status_code: int = HTTPStatus.OK,
+    ) -> None:
+        """Init with the domain of the api and status code of person requests."""
+        self.domain = domain
+        self.session = FakePersonsSession(persons_status_code)
+
+    def who_am_i(self) -> dict:
+        """Logged in user."""
+        return {"id": 1}
+
+
+def login(
+    client: FlaskClient, user_id: int, ct_api: FakeSessionApi | None = None
+) -> None:
+    """Store stand in apis and the user id in the session of client."""
+    with client.session_transaction() as session:
+        session["ct_api"] = ct_api or FakeSessionApi()
+        session["communi_api"] = FakeSessionApi()
+        session["ct_user_id"] = user_id
+
+
+@pytest.fixture
+def rendered(monkeypatch: pytest.MonkeyPatch) -> list[dict]:
+    """Params of all calendar appointment pages rendered during a test."""
+    rendered = []
+
+    def render_calendar_appointments(ct_api: FakeSessionApi, **params) -> str:  # noqa: ANN003, ARG001
+        rendered.append(params)
+        return f"<p>calendar {params['calendar_id']}</p>"
+
+    monkeypatch.setattr(
+        app_module, "render_calendar_appointments", render_calendar_appointments
+    )
+    app_module.CALENDAR_APPOINTMENTS_CACHE.clear()
+    return rendered
+
+
+@pytest.fixture
+def client() -> FlaskClient:
+    """Test client of the app."""
+    app_module.app.config["TESTING"] = True
+    return app_module.app.test_client()
+
+
+class TestCalendarAppointmentsRoute:
+    """Combined tests which don't require API access."""
+
+    URL = "/ct/calendar_appointments?calendar_id=2&days=7&services=1"
+
+    def test_cached_per_user(self, client: FlaskClient, rendered: list[dict]) -> None:
+        """Check that pages are cached per user and not stored by proxies."""
+        login(client, user_id=1)
+        first = client.get(self.URL)
+        second = client.get(self.URL)
+        login(client, user_id=2)
+        client.get(self.URL)
+
+        assert first.status_code == HTTPStatus.OK
+        assert first.data == second.data == b"<p>calendar 2</p>"
+        assert first.cache_control.private
+        assert not first.cache_control.public
+        assert len(rendered) == 2  # noqa: PLR2004
+
+    def test_if_none_match(self, client: FlaskClient, rendered: list[dict]) -> None:
+        """Check that a known ETag is answered with 304 without rendering again."""
+        login(client, user_id=1)
+        first = client.get(self.URL)
+
+        response = client.get(
+            self.URL, headers={"If-None-Match": first.headers["ETag"]}
+        )
+
+        assert first.headers["ETag"]
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert response.data == b""
+        assert len(rendered) == 1
+
+
+class FakeSnapshotPublisher:
+    """Minimal stand in for SnapshotPublisher with a single public variant."""
+
+    def __init__(self) -> None:
+        """Init with the configured variant."""
+        self.variants = {
+            "gottesdienste": {"calendar_id": "2", "days": "7", "services": "1"}
+        }
+
+
+@pytest.fixture
+def feed_requests(monkeypatch: pytest.MonkeyPatch) -> list[FakeSessionApi]:
+    """Apis used to request calendar entries for feeds during a test."""
+    feed_requests = []
+    service_api = FakeSessionApi()
+
+    def get_calendar_appointments_entries(ct_api: FakeSessionApi, **kwargs) -> list:  # noqa: ANN003, ARG001
+        feed_requests.append(ct_api)
+        return []
+
+    monkeypatch.setattr(
+        app_module,
+        "get_calendar_appointments_entries",
+        get_calendar_appointments_entries,
+    )
+    monkeypatch.setattr(app_module, "SNAPSHOT_PUBLISHER", FakeSnapshotPublisher())
+    monkeypatch.setattr(app_module, "get_service_api", lambda: service_api)
+    app_module.CALENDAR_FEED_CACHE.clear()
+    return feed_requests
+
+
+class TestCalendarFeedRoutes:
+    """Combined tests which don't require API access."""
+
+    def test_public_feed_not_shared_with_users(
+        self, client: FlaskClient, feed_requests: list[FakeSessionApi]
+    ) -> None:
+        """Check that feeds of a user session are not served without login."""
+        login(client, user_id=1)
+        user_feed = client.get(
+            "/ct/calendar_appointments/feed.json?calendar_id=2&days=7&services=1"
+        )
+        public_feed = client.get("/public/calendar_feeds/gottesdienste.json")
+        client.get("/public/calendar_feeds/gottesdienste.json")
+
+        assert user_feed.status_code == public_feed.status_code == HTTPStatus.OK
+        assert user_feed.cache_control.private
+        assert public_feed.cache_control.public
+        assert len(feed_requests) == 2  # noqa: PLR2004
+        assert feed_requests[0] is not feed_requests[1]
+
+    def test_public_feed_without_service_login(
+        self,
+        client: FlaskClient,
+        feed_requests: list[FakeSessionApi],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Check that public feeds are unavailable without CT_DOMAIN and CT_TOKEN."""
+        monkeypatch.setattr(app_module, "get_service_api", lambda: None)
+
+        response = client.get("/public/calendar_feeds/gottesdienste.ics")
+
+        assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+        assert feed_requests == []
+
+    def test_snapshot_without_service_login(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Check that snapshots fail with a clear message without service login."""
+        monkeypatch.setattr(app_module, "get_service_api", lambda: None)
+
+        with pytest.raises(RuntimeError, match="CT_TOKEN"):
+            app_module.render_calendar_appointments_snapshot({"calendar_id": "2"})
+
+
+class TestMirroredApi:
+    """Combined tests which don't require API access."""
+
+    def test_mirror_only_for_service_login(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Check that other users are not answered with data of the service login."""
+        ct_api = FakeSessionApi()
+        monkeypatch.setattr(app_module, "CT_MIRROR", object())
+        monkeypatch.setattr(app_module, "SERVICE_CT_USER_ID", 1)
+
+        assert app_module.get_mirrored_api(ct_api, user_id=2) is ct_api
+        assert isinstance(
+            app_module.get_mirrored_api(ct_api, user_id=1), app_module.MirroredApi
+        )
+        assert isinstance(
+            app_module.get_mirrored_api(ct_api, user_id=None), app_module.MirroredApi
+        )
+
+
+class TestContactsRoute:
+    """Combined tests which don't require API access."""
+
+    def test_download(self, client: FlaskClient) -> None:
+        """Check that persons are exported as vCards."""
+        login(client, user_id=1)
+
+        response = client.get("/ct/contacts?download=1")
+
+        assert response.status_code == HTTPStatus.OK
+        assert b"FN:Max Muster" in response.data
+
+    def test_download_failed_request(self, client: FlaskClient) -> None:
+        """Check that a failed request is reported instead of an empty file."""
+        login(client, user_id=1, ct_api=FakeSessionApi(persons_status_code=502))
+
+        response = client.get("/ct/contacts?download=1")
+
+        assert response.status_code == HTTPStatus.BAD_GATEWAY
+        assert b"BEGIN:VCARD" not in response.data
+
+    def test_sync_failed_request(
+        self, client: FlaskClient, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """Check that no sync token is issued for an incomplete export."""
+        monkeypatch.setattr(app_module, "CONTACT_SYNC_DIRECTORY", tmp_path)
+        login(client, user_id=1)
+        response = client.get("/ct/contacts?download=1&sync_token=")
+        sync_token = response.headers["X-Sync-Token"]
+
+        login(client, user_id=1, ct_api=FakeSessionApi(persons_status_code=502))
+        response = client.get(f"/ct/contacts?download=1&sync_token={sync_token}")
+
+        assert response.status_code == HTTPStatus.BAD_GATEWAY
+        assert "X-Sync-Token" not in response.headers
+        assert "X-Removed-Uids" not in response.headers
+        assert len(list(tmp_path.rglob("*.json"))) == 1
+
+    def test_sync_token_of_other_user(
+        self, client: FlaskClient, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """Check that tokens of other users result in a full export."""
+        monkeypatch.setattr(app_module, "CONTACT_SYNC_DIRECTORY", tmp_path)
+        login(client, user_id=1)
+        sync_token = client.get("/ct/contacts?download=1&sync_token=").headers[
+            "X-Sync-Token"
+        ]
+
+        login(client, user_id=2)
+        response = client.get(f"/ct/contacts?download=1&sync_token={sync_token}")
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers["X-Full-Sync"] == "true"
+        assert response.headers["X-Removed-Uids"] == ""
+
+
+@pytest.fixture
+def reposts(monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    """Communi group ids of all posts reposted during a test."""
+    reposts = []
+
+    def repost_to_communi(communi_api: FakeSessionApi, **kwargs) -> None:  # noqa: ANN003, ARG001
+        reposts.append(kwargs["group_id"])
+
+    monkeypatch.setattr(
+        app_module,
+        "get_communi_groups",
+        lambda communi_api, cache_key: {5: "Gruppe", 65021: "Standard"},  # noqa: ARG005
+    )
+    monkeypatch.setattr(
+        app_module,
+        "get_posts_page",
+        lambda ct_api, page, cache_key: ([], 1),  # noqa: ARG005
+    )
+    monkeypatch.setattr(
+        app_module,
+        "get_post",
+        lambda ct_api, post_id, cache_key, page: {"id": post_id, "title": "Post"},  # noqa: ARG005
+    )
+    monkeypatch.setattr(app_module, "repost_to_communi", repost_to_communi)
+    return reposts
+
+
+class TestPostsRoute:
+    """Combined tests which don't require API access."""
+
+    def test_selected_group_fallback(
+        self, client: FlaskClient, reposts: list[int]
+    ) -> None:
+        """Check that a missing group falls back to the previous or default one."""
+        login(client, user_id=1)
+
+        client.post("/ct/posts", data={"repost_post_id": 1})
+        client.post("/ct/posts", data={"repost_post_id": 1, "selected_group": 5})
+        response = client.post("/ct/posts", data={"repost_post_id": 1})
+
+        assert response.status_code == HTTPStatus.OK
+        assert reposts == [65021, 5, 5]
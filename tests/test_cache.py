@@ -0,0 +1,210 @@
+"""All tests in regards to cache.py."""
+
+import json
+import logging
+import logging.config
+import multiprocessing
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from church_web_helper.cache import (
+    Cache,
+    SQLiteCache,
+    TieredCache,
+    TTLCache,
+    make_cache_key,
+)
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+
+class IncompleteCache(Cache):
+    """Cache which misses delete and clear."""
+
+    def get(self, key: str, default: object = None) -> object:  # noqa: ARG002
+        """Nothing is cached."""
+        return default
+
+    def set(self, key: str, value: object, ttl: float | None = None) -> None:
+        """Values are discarded."""
+
+
+class TestCache:
+    """Combined tests which don't require API access."""
+
+    def test_abstract_methods(self) -> None:
+        """Check that incomplete caches fail on init instead of first use."""
+        with pytest.raises(TypeError, match="delete"):
+            IncompleteCache()
+
+
+class TestTTLCache:
+    """Combined tests which don't require API access."""
+
+    def test_get_set(self) -> None:
+        """Check values can be stored and missing keys return default."""
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b", "default") == "default"
+        assert "a" in cache
+
+    def test_none_is_cached(self) -> None:
+        """Check that None is a valid cached value."""
+        calls = []
+        cache = TTLCache(maxsize=2)
+
+        def func() -> None:
+            calls.append(1)
+
+        cache.get_or_set("a", func)
+        cache.get_or_set("a", func)
+
+        assert len(calls) == 1
+
+    def test_lru_eviction(self) -> None:
+        """Check that least recently used entries are evicted first."""
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert len(cache) == 2  # noqa: PLR2004
+
+    def test_ttl(self) -> None:
+        """Check that entries expire."""
+        cache = TTLCache(maxsize=2, ttl=0.01)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=60)
+        time.sleep(0.02)
+
+        assert "a" not in cache
+        assert cache.get("b") == 2  # noqa: PLR2004
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+    def test_fork_with_held_lock(self) -> None:
+        """Check that a forked process can use a cache locked in the parent."""
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+
+        with cache._lock:  # noqa: SLF001
+            process = multiprocessing.get_context("fork").Process(
+                target=cache.get, args=("a",)
+            )
+            process.start()
+            process.join(timeout=10)
+        if process.is_alive():
+            process.kill()
+
+        assert process.exitcode == 0
+
+    def test_make_cache_key(self) -> None:
+        """Check that keys are stable independent of dict order."""
+        assert make_cache_key({"a": 1, "b": 2}, [1]) == make_cache_key(
+            {"b": 2, "a": 1}, [1]
+        )
+        assert make_cache_key({"a": 1}) != make_cache_key({"a": 2})
+
+
+class TestSQLiteCache:
+    """Combined tests which don't require API access."""
+
+    def test_get_set(self, tmp_path: Path) -> None:
+        """Check values are stored, tuple keys work and None is a valid value."""
+        cache = SQLiteCache(tmp_path / "cache.sqlite")
+        cache.set(("calendars", "example.church.tools", 1), [{"id": 2}])
+        cache.set("none", None)
+
+        assert cache.get(("calendars", "example.church.tools", 1)) == [{"id": 2}]
+        assert cache.get(("calendars", "example.church.tools", 2), "d") == "d"
+        assert "none" in cache
+
+        cache.delete("none")
+        assert "none" not in cache
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_shared_file(self, tmp_path: Path) -> None:
+        """Check that entries are visible for other instances e.g. workers."""
+        SQLiteCache(tmp_path / "cache.sqlite").set("a", {"b": 1})
+
+        assert SQLiteCache(tmp_path / "cache.sqlite").get("a") == {"b": 1}
+
+    def test_eviction(self, tmp_path: Path) -> None:
+        """Check that the oldest entries are evicted."""
+        cache = SQLiteCache(tmp_path / "cache.sqlite", maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("c", 3)
+
+        assert "a" not in cache
+        assert len(cache) == 2  # noqa: PLR2004
+
+    def test_ttl(self, tmp_path: Path) -> None:
+        """Check that entries expire."""
+        cache = SQLiteCache(tmp_path / "cache.sqlite", ttl=0.01)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=60)
+        time.sleep(0.02)
+
+        assert "a" not in cache
+        assert cache.get("b") == 2  # noqa: PLR2004
+
+
+class TestTieredCache:
+    """Combined tests which don't require API access."""
+
+    def test_backfill(self, tmp_path: Path) -> None:
+        """Check that hits of the shared tier are stored in memory."""
+        shared = SQLiteCache(tmp_path / "cache.sqlite")
+        shared.set("a", 1)
+        memory = TTLCache(maxsize=2)
+        cache = TieredCache([memory, shared])
+
+        assert cache.get("a") == 1
+        assert memory.get("a") == 1
+        assert cache.get("b", "default") == "default"
+
+    def test_get_or_set_clear(self, tmp_path: Path) -> None:
+        """Check values are computed once and invalidation applies to all tiers."""
+        calls = []
+        memory = TTLCache(maxsize=2)
+        shared = SQLiteCache(tmp_path / "cache.sqlite")
+        cache = TieredCache([memory, shared])
+
+        for _ in range(2):
+            cache.get_or_set("a", lambda: calls.append(1) or "value")
+
+        assert len(calls) == 1
+        assert shared.get("a") == "value"
+
+        cache.clear()
+        assert "a" not in memory
+        assert "a" not in shared
+
+    def test_ttl_limited_per_tier(self, tmp_path: Path) -> None:
+        """Check that a long ttl is limited to the ttl of the in-process tier."""
+        memory = TTLCache(maxsize=2, ttl=0.01)
+        shared = SQLiteCache(tmp_path / "cache.sqlite")
+        cache = TieredCache([memory, shared])
+        cache.set("a", 1, ttl=60)
+        time.sleep(0.02)
+
+        assert "a" not in memory
+        assert cache.get("a") == 1
@@ -0,0 +1,156 @@
+"""All tests in regards to cached_api.py."""
+
+import json
+import logging
+import logging.config
+import pickle
+from pathlib import Path
+
+import pytest
+from flask import Flask
+
+from church_web_helper import cached_api
+from church_web_helper.cache import TTLCache
+from church_web_helper.cached_api import (
+    CACHE_POLICIES,
+    CACHE_STATISTICS,
+    REQUEST_SCOPE,
+    SHARED_SCOPE,
+    CachedApi,
+)
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+
+class FakeCTApi:
+    """Minimal stand in for ChurchToolsApi counting requests."""
+
+    def __init__(self) -> None:
+        """Init with empty request log."""
+        self.domain = "https://example.church.tools"
+        self.requests = []
+
+    def get_groups(self, group_id: int | None = None) -> list[dict]:
+        """Single group or all groups."""
+        self.requests.append(("get_groups", group_id))
+        return [{"id": group_id or 1, "name": "Gemeinde"}]
+
+    def get_persons(self, **kwargs) -> list[dict]:  # noqa: ANN003
+        """Persons by id."""
+        self.requests.append(("get_persons", kwargs))
+        return [{"id": person_id} for person_id in kwargs.get("ids", [])]
+
+    def get_calendars(self) -> None:
+        """Failed request."""
+        self.requests.append(("get_calendars", None))
+
+    def who_am_i(self) -> dict:
+        """Not cached."""
+        self.requests.append(("who_am_i", None))
+        return {"id": 1}
+
+
+@pytest.fixture
+def shared_cache(monkeypatch: pytest.MonkeyPatch) -> TTLCache:
+    """In-memory cache used instead of the shared SQLite file."""
+    cache = TTLCache(maxsize=16)
+    monkeypatch.setattr(cached_api, "API_CACHE", cache)
+    CACHE_STATISTICS.reset()
+    return cache
+
+
+class TestCachedApi:
+    """Combined tests which don't require API access."""
+
+    def test_shared_scope(self, shared_cache: TTLCache) -> None:
+        """Check that bound arguments result in the same key and results are copied."""
+        ct_api = FakeCTApi()
+        cached = CachedApi(ct_api, user_id=1)
+
+        result = cached.get_groups(5)
+        result[0]["name"] = "changed"
+        assert cached.get_groups(group_id=5) == [{"id": 5, "name": "Gemeinde"}]
+        cached.get_groups()
+        cached.get_groups(group_id=None)
+
+        assert ct_api.requests == [("get_groups", 5), ("get_groups", None)]
+        assert len(shared_cache) == 2  # noqa: PLR2004
+        assert CACHE_STATISTICS.as_dict() == {"get_groups": {"hits": 2, "misses": 2}}
+
+    def test_user_in_key(self, shared_cache: TTLCache) -> None:
+        """Check that users don't share responses."""
+        ct_api = FakeCTApi()
+
+        CachedApi(ct_api, user_id=1).get_groups()
+        CachedApi(ct_api, user_id=2).get_groups()
+
+        assert len(ct_api.requests) == 2  # noqa: PLR2004
+        assert len(shared_cache) == 2  # noqa: PLR2004
+
+    def test_failed_request_and_forwarding(self, shared_cache: TTLCache) -> None:
+        """Check that failed requests and methods without policy are not cached."""
+        ct_api = FakeCTApi()
+        cached = CachedApi(ct_api, user_id=1)
+
+        for _ in range(2):
+            assert cached.get_calendars() is None
+            assert cached.who_am_i() == {"id": 1}
+
+        assert len(ct_api.requests) == 4  # noqa: PLR2004
+        assert len(shared_cache) == 0
+        assert cached.domain == ct_api.domain
+
+    @pytest.mark.parametrize(
+        "method",
+        ["get_persons", "get_group_members", "get_event_by_calendar_appointment"],
+    )
+    def test_personal_data_request_scope(self, method: str) -> None:
+        """Check that responses containing persons are not shared."""
+        assert CACHE_POLICIES[method]["scope"] == REQUEST_SCOPE
+
+    @pytest.mark.parametrize("method", ["get_calendars", "get_event_masterdata"])
+    def test_masterdata_not_cached_twice(self, method: str) -> None:
+        """Check that methods cached by MASTERDATA_CACHE have no policy."""
+        assert method not in CACHE_POLICIES
+
+    def test_request_scope(self, shared_cache: TTLCache) -> None:
+        """Check that request scoped responses are discarded after the request."""
+        ct_api = FakeCTApi()
+        cached = CachedApi(ct_api, user_id=1)
+        app = Flask(__name__)
+
+        for _ in range(2):
+            with app.test_request_context():
+                cached.get_persons(ids=[1, 2])
+                cached.get_persons(ids=[1, 2])
+        cached.get_persons(ids=[1, 2])
+
+        assert len(ct_api.requests) == 3  # noqa: PLR2004
+        assert len(shared_cache) == 0
+
+    def test_pickle(self, shared_cache: TTLCache) -> None:
+        """Check that the proxy can be stored in the session."""
+        cached = CachedApi(
+            FakeCTApi(),
+            user_id=1,
+            policies={
+                "get_groups": {"scope": SHARED_SCOPE, "ttl": 60},
+                "get_persons": {"scope": REQUEST_SCOPE, "ttl": None},
+            },
+        )
+        cached.get_groups()
+
+        restored = pickle.loads(pickle.dumps(cached))  # noqa: S301
+        restored.get_groups()
+
+        assert restored.user_id == 1
+        assert restored.requests == [("get_groups", None)]
+        assert len(shared_cache) == 1
@@ -0,0 +1,73 @@
+"""All tests in regards to charts.py."""
+
+import json
+import logging
+import logging.config
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from matplotlib import pyplot as plt
+
+from church_web_helper.charts import (
+    CHART_CACHE,
+    get_dataframe_hash,
+    render_chart_png,
+)
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+SAMPLE_DF = pd.DataFrame(
+    {"Person 1": [1, 2, 2], "Person 2": [0, 1, 3]},
+    index=pd.to_datetime(["2024-01-07", "2024-01-14", "2024-01-21"]),
+)
+
+
+class TestCharts:
+    """Combined tests which don't require API access."""
+
+    def setup_method(self) -> None:
+        """Start each test without cached charts."""
+        CHART_CACHE.clear()
+
+    def test_get_dataframe_hash(self) -> None:
+        """Check that the hash changes with values and labels."""
+        renamed = SAMPLE_DF.rename(columns={"Person 2": "Person 3"})
+        changed = SAMPLE_DF.copy()
+        changed.iloc[0, 0] = 5
+
+        assert get_dataframe_hash(SAMPLE_DF) == get_dataframe_hash(SAMPLE_DF.copy())
+        assert get_dataframe_hash(SAMPLE_DF) != get_dataframe_hash(renamed)
+        assert get_dataframe_hash(SAMPLE_DF) != get_dataframe_hash(changed)
+
+    @pytest.mark.parametrize(
+        "chart_type", ["cumulative_line", "stacked_bar", "heatmap"]
+    )
+    def test_render_chart_png(self, chart_type: str) -> None:
+        """Check that a PNG is rendered once and served from cache afterwards."""
+        result = render_chart_png(SAMPLE_DF, chart_type=chart_type)
+
+        assert result.startswith(PNG_SIGNATURE)
+        assert len(CHART_CACHE) == 1
+        assert render_chart_png(SAMPLE_DF.copy(), chart_type=chart_type) is result
+
+    def test_render_chart_png_no_pyplot_figures(self) -> None:
+        """Check that rendering doesn't register figures in global pyplot state."""
+        render_chart_png(SAMPLE_DF, chart_type="cumulative_line")
+
+        assert plt.get_fignums() == []
+
+    def test_render_chart_png_invalid_type(self) -> None:
+        """Check that unknown chart types are rejected."""
+        with pytest.raises(ValueError, match="unsupported chart type"):
+            render_chart_png(SAMPLE_DF, chart_type="pie")
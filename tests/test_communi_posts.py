@@ -0,0 +1,258 @@
+"""All tests in regards to communi_posts.py."""
+
+import json
+import logging
+import logging.config
+from pathlib import Path
+
+import pytest
+import requests
+
+from church_web_helper.communi_posts import (
+    COMMUNI_GROUPS_CACHE,
+    POSTS_CACHE,
+    get_communi_groups,
+    get_post,
+    get_posts_page,
+    repost_posts_to_communi,
+    repost_to_communi,
+)
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+
+def generate_sample_post(post_id: int) -> dict:
+    """Post with the fields used for reposting."""
+    return {
+        "id": post_id,
+        "title": f"Post {post_id}",
+        "content": "Inhalt",
+        "images": [],
+        "publishedDate": "2024-01-01T10:00:00Z",
+        "group": {
+            "title": "Gemeinde",
+            "apiUrl": "https://example.church.tools/api/groups/1",
+        },
+    }
+
+
+class FakeResponse:
+    """Minimal stand in for requests.Response."""
+
+    def __init__(self, status_code: int, content: dict) -> None:
+        """Init with JSON content."""
+        self.status_code = status_code
+        self.content = json.dumps(content).encode("utf-8")
+
+
+class FakeSession:
+    """Minimal stand in for requests.Session serving pages and single posts."""
+
+    def __init__(self, posts: list[dict]) -> None:
+        """Init with posts to serve and empty request log."""
+        self.posts = {post["id"]: post for post in posts}
+        self.requests = []
+        self.status_code = 200
+
+    def get(
+        self,
+        url: str,
+        headers: dict,  # noqa: ARG002
+        params: dict | None = None,
+    ) -> FakeResponse:
+        """Return the requested page of posts or single post."""
+        self.requests.append((url, params))
+        if self.status_code != 200:  # noqa: PLR2004
+            return FakeResponse(self.status_code, {"message": "failed"})
+        if params is not None:
+            page, limit = params["page"], params["limit"]
+            posts = list(self.posts.values())
+            return FakeResponse(
+                200,
+                {
+                    "data": posts[(page - 1) * limit : page * limit],
+                    "meta": {"pagination": {"lastPage": -(-len(posts) // limit)}},
+                },
+            )
+        post_id = int(url.rsplit("/", 1)[-1])
+        if post_id not in self.posts:
+            return FakeResponse(404, {"message": "not found"})
+        return FakeResponse(200, {"data": self.posts[post_id]})
+
+
+class FakeChurchToolsApi:
+    """Minimal stand in providing the session used for posts."""
+
+    domain = "https://example.church.tools"
+
+    def __init__(self, number_of_posts: int) -> None:
+        """Init with sample posts."""
+        self.posts = [
+            generate_sample_post(post_id) for post_id in range(number_of_posts)
+        ]
+        self.session = FakeSession(self.posts)
+
+
+class FakeCommuniApi:
+    """Minimal stand in which records requests and recommendations."""
+
+    def __init__(self) -> None:
+        """Init with empty logs."""
+        self.requests = 0
+        self.recommendations = []
+
+    def getGroups(self) -> list[dict]:  # noqa: N802
+        """All groups."""
+        self.requests += 1
+        return [{"id": 1, "title": "Gruppe"}]
+
+    def recommendation(self, **kwargs) -> None:  # noqa: ANN003
+        """Record recommendation - fails for titles containing 'fail'."""
+        if "fail" in kwargs["title"]:
+            msg = "rejected"
+            raise RuntimeError(msg)
+        self.recommendations.append(kwargs)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches() -> None:
+    """Caches are module level therefore cleared for each test."""
+    POSTS_CACHE.clear()
+    COMMUNI_GROUPS_CACHE.clear()
+
+
+class TestCommuniPosts:
+    """Combined tests which don't require API access."""
+
+    def test_get_posts_page_cached(self) -> None:
+        """Check that pages are only requested once per cache key."""
+        ct_api = FakeChurchToolsApi(number_of_posts=5)
+
+        posts, _ = get_posts_page(ct_api=ct_api, page=1, cache_key="a")
+        assert len(posts) == 5  # noqa: PLR2004
+        get_posts_page(ct_api=ct_api, page=1, cache_key="a")
+        assert len(ct_api.session.requests) == 1
+
+        get_posts_page(ct_api=ct_api, page=1, cache_key="b")
+        assert len(ct_api.session.requests) == 2  # noqa: PLR2004
+
+    @pytest.mark.parametrize(
+        ("page", "expected_ids", "expected_pages", "expected_requests"),
+        [
+            (1, list(range(20)), 3, [1]),
+            (3, list(range(40, 45)), 3, [3]),
+            (0, list(range(20)), 3, [1]),
+            (9, list(range(40, 45)), 3, [9, 3]),
+        ],
+    )
+    def test_get_posts_page(
+        self,
+        page: int,
+        expected_ids: list[int],
+        expected_pages: int,
+        expected_requests: list[int],
+    ) -> None:
+        """Check that only the page is requested and limited to available pages."""
+        ct_api = FakeChurchToolsApi(number_of_posts=45)
+
+        result, number_of_pages = get_posts_page(
+            ct_api=ct_api, page=page, cache_key="a"
+        )
+
+        assert [post["id"] for post in result] == expected_ids
+        assert number_of_pages == expected_pages
+        assert [
+            params["page"] for _, params in ct_api.session.requests
+        ] == expected_requests
+        assert all(params["limit"] == 20 for _, params in ct_api.session.requests)  # noqa: PLR2004
+
+    def test_get_posts_page_empty(self) -> None:
+        """Check that no posts still result in one page."""
+        ct_api = FakeChurchToolsApi(number_of_posts=0)
+
+        assert get_posts_page(ct_api=ct_api, page=1, cache_key="a") == ([], 1)
+
+    def test_get_posts_page_failed_request(self) -> None:
+        """Check that failed requests are raised and not cached."""
+        ct_api = FakeChurchToolsApi(number_of_posts=5)
+        ct_api.session.status_code = 502
+
+        with pytest.raises(requests.HTTPError):
+            get_posts_page(ct_api=ct_api, page=1, cache_key="a")
+        assert len(POSTS_CACHE) == 0
+
+    def test_get_post(self) -> None:
+        """Check that single posts don't require all posts."""
+        ct_api = FakeChurchToolsApi(number_of_posts=5)
+
+        assert get_post(ct_api=ct_api, post_id=3, cache_key="a")["id"] == 3  # noqa: PLR2004
+        assert get_post(ct_api=ct_api, post_id=7, cache_key="a") is None
+        assert len(ct_api.session.requests) == 2  # noqa: PLR2004
+
+        get_posts_page(ct_api=ct_api, page=1, cache_key="a")
+        assert get_post(ct_api=ct_api, post_id=3, cache_key="a", page=1)["id"] == 3  # noqa: PLR2004
+        assert len(ct_api.session.requests) == 3  # noqa: PLR2004
+
+    def test_get_communi_groups(self) -> None:
+        """Check that groups are mapped by id and cached."""
+        communi_api = FakeCommuniApi()
+
+        assert get_communi_groups(communi_api=communi_api, cache_key="a") == {
+            1: "Gruppe"
+        }
+        get_communi_groups(communi_api=communi_api, cache_key="a")
+        assert communi_api.requests == 1
+
+    def test_repost_to_communi(self) -> None:
+        """Check that the recommendation links to the ChurchTools post."""
+        communi_api = FakeCommuniApi()
+
+        repost_to_communi(
+            communi_api=communi_api, post=generate_sample_post(3), group_id=1
+        )
+
+        recommendation = communi_api.recommendations[0]
+        assert recommendation["group_id"] == 1
+        assert recommendation["title"] == "Post 3 (Gemeinde)"
+        assert recommendation["link"] == "https://example.church.tools/posts/3"
+        assert recommendation["pic_url"] == ""
+
+    def test_repost_posts_to_communi(self) -> None:
+        """Check that each post is reported as reposted or failed."""
+        ct_api = FakeChurchToolsApi(number_of_posts=5)
+        ct_api.posts[2]["title"] = "fail"
+        communi_api = FakeCommuniApi()
+        get_posts_page(ct_api=ct_api, page=1, cache_key="a")
+
+        result = repost_posts_to_communi(
+            ct_api=ct_api,
+            communi_api=communi_api,
+            post_ids=[1, 2, 3, 3, 9],
+            group_id=1,
+            cache_key="a",
+            page=1,
+            max_workers=2,
+        )
+
+        assert result == {
+            1: "reposted",
+            2: "failed: rejected",
+            3: "reposted",
+            9: "failed: post not available",
+        }
+        assert sorted(item["link"] for item in communi_api.recommendations) == [
+            "https://example.church.tools/posts/1",
+            "https://example.church.tools/posts/3",
+        ]
+        assert [url for url, _ in ct_api.session.requests] == [
+            "https://example.church.tools/api/posts",
+            "https://example.church.tools/api/posts/9",
+        ]
@@ -0,0 +1,93 @@
+"""All tests in regards to communi_sync.py."""
+
+import json
+import logging
+import logging.config
+from pathlib import Path
+
+import pytest
+
+from church_web_helper.communi_sync import (
+    PrefetchedEventsApi,
+    get_event_chat_sync_candidates,
+)
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+
+class FakeChurchToolsApi:
+    """Minimal stand in which records requested events."""
+
+    domain = "https://example.church.tools"
+
+    def __init__(self) -> None:
+        """Init empty request log."""
+        self.requests = []
+
+    def get_events(self, **kwargs) -> list[dict]:  # noqa: ANN003
+        """Record request and return a generic event."""
+        self.requests.append(kwargs)
+        return [{"id": kwargs.get("eventId"), "name": "remote"}]
+
+
+class TestPrefetchedEventsApi:
+    """Combined tests which don't require API access."""
+
+    def test_known_event_from_memory(self) -> None:
+        """Check that known events don't trigger a request."""
+        ct_api = FakeChurchToolsApi()
+        api = PrefetchedEventsApi(ct_api=ct_api, events=[{"id": 1, "name": "local"}])
+
+        assert api.get_events(eventId=1) == [{"id": 1, "name": "local"}]
+        assert api.get_events(eventId="1") == [{"id": 1, "name": "local"}]
+        assert ct_api.requests == []
+
+    def test_unknown_event_forwarded(self) -> None:
+        """Check that unknown events and other attributes use the wrapped api."""
+        ct_api = FakeChurchToolsApi()
+        api = PrefetchedEventsApi(ct_api=ct_api, events=[{"id": 1, "name": "local"}])
+
+        assert api.get_events(eventId=2) == [{"id": 2, "name": "remote"}]
+        assert ct_api.requests == [{"eventId": 2}]
+        assert api.domain == ct_api.domain
+
+
+class TestEventChatSyncCandidates:
+    """Combined tests which don't require API access."""
+
+    group_names = {1: "Event 1", 2: "Event 2", 3: "Event 3"}
+    group_index = {"Event 2": 22, "Other": 99}
+
+    @pytest.mark.parametrize(
+        ("action", "expected_result"),
+        [("create", [1, 3]), ("delete", [2])],
+    )
+    def test_candidates(self, action: str, expected_result: list[int]) -> None:
+        """Check that only events without (create) or with (delete) group are used."""
+        assert (
+            get_event_chat_sync_candidates(
+                event_ids=[1, 2, 3],
+                group_names=self.group_names,
+                group_index=self.group_index,
+                action=action,
+            )
+            == expected_result
+        )
+
+    def test_unknown_action(self) -> None:
+        """Check that unsupported actions are rejected."""
+        with pytest.raises(ValueError, match="unsupported action"):
+            get_event_chat_sync_candidates(
+                event_ids=[1],
+                group_names=self.group_names,
+                group_index=self.group_index,
+                action="update",
+            )
@@ -0,0 +1,246 @@
+"""All tests in regards to ct_mirror.py."""
+
+import json
+import logging
+import logging.config
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from church_web_helper.ct_mirror import ChurchToolsMirror, MirroredApi, to_mirror_date
+from church_web_helper.helper import parse_ct_datetime
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+DOMAIN = "https://example.church.tools"
+
+
+class FakeChurchToolsApi:
+    """Minimal stand in with one event per day which records requests."""
+
+    domain = DOMAIN
+
+    def __init__(self) -> None:
+        """Init with events from 30 days ago until 30 days ahead."""
+        self.requests = []
+        self.failing = set()
+        today = datetime.combine(datetime.now().date(), datetime.min.time())
+        self.events = [
+            {
+                "id": offset + 100,
+                "appointmentId": offset + 200,
+                "name": f"Gottesdienst {offset}",
+                "startDate": to_mirror_date(today + timedelta(days=offset, hours=10)),
+                "calendar": {"domainIdentifier": "2"},
+                "eventServices": [{"serviceId": 1, "personId": 7, "name": "Muster"}],
+            }
+            for offset in range(-30, 30)
+        ]
+
+    def get_calendars(self) -> list[dict]:
+        """Single calendar."""
+        self.requests.append("get_calendars")
+        return [{"id": 2, "name": "Gottesdienste"}]
+
+    def get_calendar_appointments(
+        self,
+        calendar_ids: list[int],
+        **kwargs,  # noqa: ANN003
+    ) -> list[dict]:
+        """Appointment of each event within the range."""
+        self.requests.append("get_calendar_appointments")
+        return [
+            {
+                "id": event["appointmentId"],
+                "caption": event["name"],
+                "startDate": event["startDate"],
+                "endDate": event["startDate"],
+            }
+            for event in self.get_events_of_days(kwargs["from_"], kwargs["to_"])
+            if int(event["calendar"]["domainIdentifier"]) in calendar_ids
+        ]
+
+    def get_events_of_days(self, from_: datetime, to_: datetime) -> list[dict]:
+        """Events starting on the days of the range - dates are inclusive."""
+        return [
+            event
+            for event in self.events
+            if from_.date()
+            <= parse_ct_datetime(event["startDate"]).astimezone().date()
+            <= to_.date()
+        ]
+
+    def get_events(self, **kwargs) -> list[dict] | None:  # noqa: ANN003
+        """Events of the range - None if failing."""
+        self.requests.append("get_events")
+        if "get_events" in self.failing:
+            return None
+        return self.get_events_of_days(kwargs["from_"], kwargs["to_"])
+
+    def get_event_by_calendar_appointment(
+        self, appointment_id: int, start_date: datetime
+    ) -> dict:
+        """Record request only."""
+        self.requests.append("get_event_by_calendar_appointment")
+        return {"id": appointment_id, "startDate": start_date}
+
+    def get_groups(self, **kwargs) -> list[dict]:  # noqa: ANN003
+        """Single group."""
+        self.requests.append("get_groups")
+        return [{"id": 89, "name": "Pfarrer"}]
+
+    def get_persons(self, **kwargs) -> list[dict] | None:  # noqa: ANN003
+        """Single person - None if failing."""
+        self.requests.append("get_persons")
+        if "get_persons" in self.failing:
+            return None
+        return [{"id": 7, "firstName": "Max", "lastName": "Muster"}]
+
+
+class TestChurchToolsMirror:
+    """Combined tests which don't require API access."""
+
+    @pytest.fixture
+    def mirror(self, tmp_path: Path) -> ChurchToolsMirror:
+        """Mirror with 60 days of history and 60 days ahead."""
+        return ChurchToolsMirror(
+            path=tmp_path / "mirror.sqlite",
+            domain=DOMAIN,
+            history_days=60,
+            horizon_days=60,
+            recent_days=7,
+        )
+
+    def test_full_sync(self, mirror: ChurchToolsMirror) -> None:
+        """Check that all data is readable after the first sync."""
+        ct_api = FakeChurchToolsApi()
+        mirror.sync(ct_api)
+        today = datetime.now()
+
+        events = mirror.get_events(today - timedelta(days=60), today + timedelta(60))
+        assert events == ct_api.events
+        assert mirror.get_calendars() == [{"id": 2, "name": "Gottesdienste"}]
+        assert len(
+            mirror.get_calendar_appointments(
+                [2], today - timedelta(days=60), today + timedelta(60)
+            )
+        ) == len(ct_api.events)
+        assert mirror.get_calendar_appointments([3], today, today) == []
+        assert mirror.get_persons(ids=[7])[0]["lastName"] == "Muster"
+        assert (
+            mirror.get_event_by_calendar_appointment(
+                ct_api.events[0]["appointmentId"], ct_api.events[0]["startDate"]
+            )
+            == ct_api.events[0]
+        )
+
+    def test_incremental_sync(self, mirror: ChurchToolsMirror) -> None:
+        """Check that recent changes are synced without refetching masterdata."""
+        ct_api = FakeChurchToolsApi()
+        mirror.sync(ct_api)
+        ct_api.requests = []
+
+        deleted_old, deleted_recent = ct_api.events.pop(0), ct_api.events.pop(-2)
+        ct_api.events[-1]["name"] = "Changed"
+        mirror.sync(ct_api)
+        today = datetime.now()
+        events = mirror.get_events(today - timedelta(days=60), today + timedelta(60))
+
+        assert "get_persons" not in ct_api.requests
+        assert "get_groups" not in ct_api.requests
+        assert events[-1]["name"] == "Changed"
+        assert deleted_recent not in events
+        # older than recent_days is kept until the next full sync
+        assert deleted_old in events
+
+    @pytest.mark.parametrize("failing", ["get_events", "get_persons"])
+    def test_failed_sync(self, mirror: ChurchToolsMirror, failing: str) -> None:
+        """Check that a failed request keeps mirrored data and sync state."""
+        ct_api = FakeChurchToolsApi()
+        mirror.sync(ct_api)
+        last_sync = mirror.get_state("last_sync")
+        today = datetime.now()
+
+        ct_api.failing.add(failing)
+        mirror.sync(ct_api, full=True)
+        events = mirror.get_events(today - timedelta(days=60), today + timedelta(60))
+
+        assert events == ct_api.events
+        assert mirror.get_persons(ids=[7])[0]["lastName"] == "Muster"
+        assert mirror.get_state("last_sync") == last_sync
+
+    def test_whole_last_day(self, mirror: ChurchToolsMirror) -> None:
+        """Check that events later on the last day are included like by ChurchTools."""
+        ct_api = FakeChurchToolsApi()
+        mirror.sync(ct_api)
+        today = datetime.combine(datetime.now().date(), datetime.min.time())
+        to_ = today + timedelta(days=7)
+
+        assert mirror.get_events(today, to_) == ct_api.get_events(from_=today, to_=to_)
+        assert len(mirror.get_events(today, to_)) == 8  # noqa: PLR2004
+
+    def test_covers(self, mirror: ChurchToolsMirror) -> None:
+        """Check that only synced and fresh ranges are covered."""
+        today = datetime.now()
+        assert not mirror.covers(today, today)
+
+        mirror.sync(FakeChurchToolsApi())
+        assert mirror.covers(today - timedelta(days=30), today + timedelta(days=30))
+        assert not mirror.covers(today, today + timedelta(days=90))
+
+        mirror.max_age = -1
+        assert not mirror.covers(today, today)
+
+
+class TestMirroredApi:
+    """Combined tests which don't require API access."""
+
+    def test_reads_from_mirror(self, tmp_path: Path) -> None:
+        """Check that covered reads don't trigger requests."""
+        ct_api = FakeChurchToolsApi()
+        mirror = ChurchToolsMirror(path=tmp_path / "mirror.sqlite", domain=DOMAIN)
+        mirror.sync(ct_api)
+        ct_api.requests = []
+        api = MirroredApi(ct_api=ct_api, mirror=mirror)
+        today = datetime.now()
+
+        events = api.get_events(
+            from_=today, to_=today + timedelta(days=7), include="eventServices"
+        )
+        api.get_calendar_appointments(
+            calendar_ids=[2], from_=today, to_=today + timedelta(days=7)
+        )
+        api.get_event_by_calendar_appointment(999, today)
+        api.get_persons(ids=[7])
+
+        assert len(events) == 8  # noqa: PLR2004
+        assert ct_api.requests == []
+        assert api.domain == DOMAIN
+
+    def test_forwards_to_api(self, tmp_path: Path) -> None:
+        """Check that other domains, unknown ids or not synced mirrors use the api."""
+        ct_api = FakeChurchToolsApi()
+        mirror = ChurchToolsMirror(path=tmp_path / "mirror.sqlite", domain=DOMAIN)
+        api = MirroredApi(ct_api=ct_api, mirror=mirror)
+        today = datetime.now()
+
+        api.get_events(from_=today, to_=today)
+        assert ct_api.requests == ["get_events"]
+
+        mirror.sync(ct_api)
+        ct_api.requests = []
+        api.get_persons(ids=[7, 8])
+        assert ct_api.requests == ["get_persons"]
+
+        mirror.domain = "https://other.church.tools"
+        api.get_events(from_=today, to_=today)
+        assert ct_api.requests == ["get_persons", "get_events"]
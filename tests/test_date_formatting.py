@@ -0,0 +1,51 @@
+"""All tests in regards to date_formatting.py."""
+
+import json
+import logging
+import logging.config
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+
+from church_web_helper.date_formatting import format_date
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+
+class TestDateFormatting:
+    """Combined tests which don't require API access."""
+
+    @pytest.mark.parametrize(
+        ("value", "date_format", "expected"),
+        [
+            (datetime(2024, 1, 7, 10, 30), "%a %b %d\t%H:%M", "So Jan 07\t10:30"),
+            (datetime(2024, 3, 4, 9, 0), "%A %e.%m.%Y", "Montag  4.03.2024"),
+            (date(2024, 3, 6), "%a %d.%m", "Mi 06.03"),
+            (date(2024, 3, 6), "%Y_%B", "2024_März"),
+            (date(2024, 10, 5), "%b %B", "Okt Oktober"),
+            (date(2024, 12, 1), "%%a %%B", "%a %B"),
+        ],
+    )
+    def test_format_date(self, value: date, date_format: str, expected: str) -> None:
+        """Check German names and that other directives are unchanged."""
+        assert format_date(value, date_format) == expected
+
+    def test_format_date_threads(self) -> None:
+        """Check that concurrent formatting doesn't interfere."""
+        values = [date(2024, month, 1) for month in range(1, 13)] * 20
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            result = list(executor.map(lambda value: format_date(value, "%B"), values))
+
+        assert result == [format_date(value, "%B") for value in values]
+        assert result[:3] == ["Januar", "Februar", "März"]
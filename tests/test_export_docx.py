@@ -4,17 +4,25 @@ import json
 import logging
 import logging.config
 import os
+import time
 from datetime import datetime
 from pathlib import Path
 
 import docx
 import docx.table
 import pandas as pd
+import pytest
 import pytz
 from churchtools_api.churchtools_api import ChurchToolsApi
 from tzlocal import get_localzone
 
-from church_web_helper.export_docx import get_plan_months_docx
+from church_web_helper import export_docx
+from church_web_helper.cache import TTLCache
+from church_web_helper.export_docx import (
+    get_event_agenda_docx_bytes,
+    get_plan_months_docx,
+)
+from church_web_helper.helper import EVENT_AGENDA_CACHE
 
 logger = logging.getLogger(__name__)
 
@@ -104,8 +112,10 @@ def test_compare_docx_files():
     doc3 = docx.Document(FILENAME2)
     assert not compare_docx_files(doc1, doc3)[0]
 
+
 # Following methods assist with test cases
 
+
 def compare_docx_files(
     document1: docx.Document, document2: docx.Document
 ) -> tuple[bool, str]:
@@ -174,3 +184,117 @@ def compare_tables(tables1: docx.table, tables2: docx.table) -> (bool, str):
                 return False, f"row is different: {row1}, {row2}"
 
     return True, "identical"
+
+
+class FakeDocxApi:
+    """Minimal stand in for ChurchToolsApi rendering agendas as docx."""
+
+    def __init__(self) -> None:
+        """Init with empty request log."""
+        self.domain = "https://example.church.tools"
+        self.requests = []
+
+    def get_event_agenda_docx(
+        self,
+        agenda: dict,
+        serviceGroups: dict,  # noqa: N803
+        excludeBeforeEvent: bool,  # noqa: FBT001, N803
+    ) -> docx.Document:
+        """Document which only contains the agenda name."""
+        self.requests.append((agenda["id"], tuple(serviceGroups), excludeBeforeEvent))
+        document = docx.Document()
+        document.add_heading(agenda["name"])
+        return document
+
+
+@pytest.fixture
+def agenda_docx_cache(monkeypatch: pytest.MonkeyPatch) -> TTLCache:
+    """Small empty cache used instead of AGENDA_DOCX_CACHE."""
+    cache = TTLCache(maxsize=2)
+    monkeypatch.setattr(export_docx, "AGENDA_DOCX_CACHE", cache)
+    return cache
+
+
+class TestAgendaDocx:
+    """Combined tests which don't require API access."""
+
+    @pytest.mark.usefixtures("agenda_docx_cache")
+    def test_cache_key(self) -> None:
+        """Check that documents are cached per domain, user and agenda."""
+        ct_api = FakeDocxApi()
+        other_domain_api = FakeDocxApi()
+        other_domain_api.domain = "https://other.church.tools"
+        agenda = {"id": 1, "name": "Gottesdienst"}
+
+        first = get_event_agenda_docx_bytes(
+            ct_api=ct_api, agenda=agenda, service_groups={1: "Programm"}, user_id=1
+        )
+        cached = get_event_agenda_docx_bytes(
+            ct_api=ct_api, agenda=agenda, service_groups={1: "Programm"}, user_id=1
+        )
+        get_event_agenda_docx_bytes(
+            ct_api=ct_api, agenda=agenda, service_groups={1: "Programm"}, user_id=2
+        )
+        get_event_agenda_docx_bytes(
+            ct_api=other_domain_api,
+            agenda=agenda,
+            service_groups={1: "Programm"},
+            user_id=1,
+        )
+
+        assert first == cached
+        assert len(ct_api.requests) == 2  # noqa: PLR2004
+        assert len(other_domain_api.requests) == 1
+
+    @pytest.mark.usefixtures("agenda_docx_cache")
+    def test_changed_agenda(self) -> None:
+        """Check that changed agenda content or options are rendered again."""
+        ct_api = FakeDocxApi()
+
+        for agenda, exclude_before_event in [
+            ({"id": 1, "name": "Gottesdienst"}, False),
+            ({"id": 1, "name": "Gottesdienst"}, True),
+            ({"id": 1, "name": "Familiengottesdienst"}, False),
+        ]:
+            get_event_agenda_docx_bytes(
+                ct_api=ct_api,
+                agenda=agenda,
+                service_groups={},
+                user_id=1,
+                exclude_before_event=exclude_before_event,
+            )
+
+        assert len(ct_api.requests) == 3  # noqa: PLR2004
+
+    def test_maxsize_eviction(self, agenda_docx_cache: TTLCache) -> None:
+        """Check that the least recently used document is evicted."""
+        ct_api = FakeDocxApi()
+
+        for event_id in [1, 2, 3, 1]:
+            get_event_agenda_docx_bytes(
+                ct_api=ct_api,
+                agenda={"id": event_id, "name": f"Event {event_id}"},
+                service_groups={},
+                user_id=1,
+            )
+
+        assert [request[0] for request in ct_api.requests] == [1, 2, 3, 1]
+        assert len(agenda_docx_cache) == 2  # noqa: PLR2004
+
+    def test_expiry(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Check that documents expire like agendas of EVENT_AGENDA_CACHE."""
+        ct_api = FakeDocxApi()
+        agenda = {"id": 1, "name": "Gottesdienst"}
+        export_docx.AGENDA_DOCX_CACHE.clear()
+        start = time.monotonic()
+        now = start
+        monkeypatch.setattr(time, "monotonic", lambda: now)
+
+        for offset in [0, EVENT_AGENDA_CACHE.ttl - 1, EVENT_AGENDA_CACHE.ttl + 1]:
+            now = start + offset
+            get_event_agenda_docx_bytes(
+                ct_api=ct_api, agenda=agenda, service_groups={}, user_id=1
+            )
+        export_docx.AGENDA_DOCX_CACHE.clear()
+
+        assert len(ct_api.requests) == 2  # noqa: PLR2004
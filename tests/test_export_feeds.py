@@ -0,0 +1,112 @@
+"""All tests in regards to export_feeds.py."""
+
+import json
+import logging
+import logging.config
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+import pytz
+
+from church_web_helper.export_feeds import (
+    escape_text,
+    fold_line,
+    iter_calendar_ics,
+    iter_calendar_json,
+)
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+SAMPLE_ENTRIES = [
+    {
+        "id": 123,
+        "caption": "Gottesdienst, mit Abendmahl",
+        "start_date": datetime(year=2024, month=12, day=24, hour=16, tzinfo=pytz.UTC),
+        "end_date": datetime(year=2024, month=12, day=24, hour=17, tzinfo=pytz.UTC),
+        "all_day": False,
+        "special_day_name": "Christvesper",
+        "persons": "Pfarrer Muster",
+    },
+    {
+        "id": 456,
+        "caption": "Konfirmandenfreizeit",
+        "start_date": datetime(year=2024, month=12, day=27).astimezone(),
+        "end_date": datetime(year=2024, month=12, day=28).astimezone(),
+        "all_day": True,
+        "special_day_name": "",
+        "persons": None,
+    },
+]
+
+
+class TestExportFeeds:
+    """Combined tests which don't require API access."""
+
+    @pytest.mark.parametrize(
+        ("value", "expected_output"),
+        [
+            ("plain", "plain"),
+            ("a,b;c", "a\\,b\\;c"),
+            ("back\\slash", "back\\\\slash"),
+            ("two\nlines", "two\\nlines"),
+        ],
+    )
+    def test_escape_text(self, value: str, expected_output: str) -> None:
+        """Check that special characters are escaped."""
+        assert escape_text(value) == expected_output
+
+    def test_fold_line(self) -> None:
+        """Check that long lines are folded at 75 octets without splitting chars."""
+        line = "SUMMARY:" + "ä" * 100
+        result = fold_line(line)
+
+        assert result.endswith("\r\n")
+        parts = result[:-2].split("\r\n")
+        assert all(len(part.encode("utf-8")) <= 75 for part in parts)  # noqa: PLR2004
+        assert all(part.startswith(" ") for part in parts[1:])
+        assert "".join(part.removeprefix(" ") for part in parts) == line
+
+    def test_iter_calendar_ics(self) -> None:
+        """Check that entries are converted to VEVENTs."""
+        result = "".join(
+            iter_calendar_ics(
+                entries=SAMPLE_ENTRIES,
+                calendar_name="Gottesdienste",
+                uid_domain="example.church.tools",
+                generated=datetime(year=2024, month=12, day=1, tzinfo=pytz.UTC),
+            )
+        )
+
+        assert result.startswith("BEGIN:VCALENDAR\r\n")
+        assert result.endswith("END:VCALENDAR\r\n")
+        assert result.count("BEGIN:VEVENT") == 2  # noqa: PLR2004
+        assert "UID:123-20241224T160000Z@example.church.tools\r\n" in result
+        assert "DTSTART:20241224T160000Z\r\n" in result
+        assert "SUMMARY:Gottesdienst\\, mit Abendmahl\r\n" in result
+        assert "DESCRIPTION:Christvesper\\nPfarrer Muster\r\n" in result
+        assert "DTSTART;VALUE=DATE:20241227\r\n" in result
+        assert "DTEND;VALUE=DATE:20241229\r\n" in result
+
+    def test_iter_calendar_json(self) -> None:
+        """Check that streamed JSON parts combine to valid JSON."""
+        result = json.loads("".join(iter_calendar_json(entries=SAMPLE_ENTRIES)))
+
+        assert [item["id"] for item in result["appointments"]] == [123, 456]
+        assert result["appointments"][0]["specialDayName"] == "Christvesper"
+        assert result["appointments"][1]["persons"] is None
+        assert result["appointments"][1]["allDay"] is True
+
+    def test_iter_calendar_json_empty(self) -> None:
+        """Check that no entries result in an empty list."""
+        assert json.loads("".join(iter_calendar_json(entries=[]))) == {
+            "appointments": []
+        }
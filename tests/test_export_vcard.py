@@ -0,0 +1,305 @@
+"""All tests in regards to export_vcard.py."""
+
+import json
+import logging
+import logging.config
+from pathlib import Path
+
+import pytest
+import requests
+import vobject
+
+from church_web_helper.export_vcard import (
+    VCARD_PHONE_FIELDS,
+    ContactSyncStore,
+    format_person_vcard,
+    get_contact_changes,
+    iter_persons,
+    iter_vcards,
+)
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+SAMPLE_PERSONS = [
+    {
+        "id": 1,
+        "firstName": "Max",
+        "lastName": "Muster",
+        "phonePrivate": "07442 123",
+        "phoneWork": None,
+        "mobile": "0170 123",
+    },
+    {
+        "id": 2,
+        "firstName": "Erika",
+        "lastName": "Muster, geb. Beispiel",
+        "phonePrivate": None,
+        "phoneWork": "07442 456",
+        "mobile": None,
+    },
+]
+
+
+SPECIAL_PERSONS = [
+    {"firstName": "Jörg", "lastName": "Müller-Lüdenscheid" * 6, "mobile": "0170"},
+    {"firstName": "Back\\slash", "lastName": "Semi;colon", "phoneWork": "1,2"},
+    {"firstName": "Zeilen\numbruch", "lastName": "Carriage\r\nReturn"},
+    {"firstName": "Über", "lastName": "Emoji 🙂" * 30, "phonePrivate": " "},
+]
+
+
+def get_person_vcard_vobject(person: dict, uid: str | None = None) -> str:
+    """Reference serialization using vobject for the same fields."""
+    vcard = vobject.vCard()
+    if uid is not None:
+        vcard.add("uid")
+        vcard.uid.value = uid
+    vcard.add("fn")
+    vcard.fn.value = f"{person['firstName']} {person['lastName']}"
+    for field, tel_type in VCARD_PHONE_FIELDS.items():
+        if person.get(field):
+            tel = vcard.add("tel")
+            tel.value = person[field]
+            tel.type_param = tel_type
+    return vcard.serialize()
+
+
+def unfold(text: str) -> str:
+    """Remove line folding of a serialized vCard."""
+    return text.replace("\r\n ", "")
+
+
+class FakeResponse:
+    """Minimal stand in for requests.Response."""
+
+    def __init__(self, status_code: int, content: dict) -> None:
+        """Init with JSON content."""
+        self.status_code = status_code
+        self.content = json.dumps(content).encode("utf-8")
+
+
+class FakeSession:
+    """Minimal stand in for requests.Session serving paginated persons."""
+
+    def __init__(
+        self, persons: list[dict], failing_pages: set[int] | None = None
+    ) -> None:
+        """Init with persons to serve, pages which fail and empty request log."""
+        self.persons = persons
+        self.failing_pages = failing_pages or set()
+        self.requests = []
+
+    def get(self, url: str, params: dict, headers: dict) -> FakeResponse:  # noqa: ARG002
+        """Return the requested page - 502 for failing pages."""
+        self.requests.append(params)
+        page, limit = params["page"], params["limit"]
+        if page in self.failing_pages:
+            return FakeResponse(502, {"message": "Bad Gateway"})
+        return FakeResponse(
+            200,
+            {
+                "data": self.persons[(page - 1) * limit : page * limit],
+                "meta": {
+                    "pagination": {
+                        "total": len(self.persons),
+                        "current": page,
+                        "limit": limit,
+                        "lastPage": max(1, -(-len(self.persons) // limit)),
+                    }
+                },
+            },
+        )
+
+
+class FakeChurchToolsApi:
+    """Minimal stand in with a fake session."""
+
+    domain = "https://example.church.tools"
+
+    def __init__(
+        self, persons: list[dict], failing_pages: set[int] | None = None
+    ) -> None:
+        """Init session serving persons."""
+        self.session = FakeSession(persons, failing_pages)
+
+
+class TestExportVcard:
+    """Combined tests which don't require API access."""
+
+    def test_iter_persons(self) -> None:
+        """Check that all pages are requested lazily."""
+        persons = [{"id": number} for number in range(25)]
+        ct_api = FakeChurchToolsApi(persons)
+
+        result = iter_persons(ct_api=ct_api, page_size=10)
+        assert ct_api.session.requests == []
+        assert next(result) == {"id": 0}
+        assert len(ct_api.session.requests) == 1
+
+        assert [person["id"] for person in result] == list(range(1, 25))
+        assert [params["page"] for params in ct_api.session.requests] == [1, 2, 3]
+
+    def test_iter_persons_empty(self) -> None:
+        """Check that no persons result in a single request."""
+        ct_api = FakeChurchToolsApi([])
+
+        assert list(iter_persons(ct_api=ct_api)) == []
+        assert len(ct_api.session.requests) == 1
+
+    def test_iter_persons_failed_page(self) -> None:
+        """Check that a failed page raises instead of ending the list early."""
+        persons = [{"id": number} for number in range(25)]
+        ct_api = FakeChurchToolsApi(persons, failing_pages={2})
+
+        result = iter_persons(ct_api=ct_api, page_size=10)
+        assert [next(result)["id"] for _ in range(10)] == list(range(10))
+        with pytest.raises(requests.HTTPError, match="502"):
+            next(result)
+
+    @pytest.mark.parametrize("person", SAMPLE_PERSONS + SPECIAL_PERSONS)
+    def test_format_person_vcard(self, person: dict) -> None:
+        """Check that content equals vobject and lines are folded by octets.
+
+        vobject folds by number of characters only,
+        therefore the unfolded content is compared.
+        """
+        result = format_person_vcard(person)
+
+        assert unfold(result) == unfold(get_person_vcard_vobject(person))
+        assert all(
+            len(line.encode("utf-8")) <= 75  # noqa: PLR2004
+            for line in result.split("\r\n")
+        )
+
+        # line breaks are escaped as \n therefore CRLF can't be restored
+        parsed = vobject.readOne(result)
+        full_name = f"{person['firstName']} {person['lastName']}"
+        assert parsed.fn.value == full_name.replace("\r\n", "\n")
+
+    def test_format_person_vcard_skips_missing_numbers(self) -> None:
+        """Check that no empty TEL lines are created."""
+        result = format_person_vcard(SAMPLE_PERSONS[1])
+
+        assert result.count("TEL") == 1
+        assert "TEL;TYPE=WORK:07442 456\r\n" in result
+
+    def test_iter_vcards(self) -> None:
+        """Check that one vCard is created per person."""
+        result = list(iter_vcards(SAMPLE_PERSONS))
+
+        assert len(result) == len(SAMPLE_PERSONS)
+        assert result[0].startswith("BEGIN:VCARD\r\n")
+        assert "FN:Max Muster\r\n" in result[0]
+        assert "TEL;TYPE=HOME:07442 123\r\n" in result[0]
+        assert "FN:Erika Muster\\, geb. Beispiel\r\n" in result[1]
+
+    def test_iter_vcards_uid(self) -> None:
+        """Check that UIDs are added if a domain is given."""
+        result = list(iter_vcards(SAMPLE_PERSONS, uid_domain="example.church.tools"))
+
+        assert "UID:person-1@example.church.tools\r\n" in result[0]
+        assert unfold(result[0]) == unfold(
+            get_person_vcard_vobject(
+                SAMPLE_PERSONS[0], uid="person-1@example.church.tools"
+            )
+        )
+
+
+class TestContactSync:
+    """Combined tests which don't require API access."""
+
+    def test_get_contact_changes(self) -> None:
+        """Check that only new or changed vCards and removed UIDs are returned."""
+        _, previous_hashes, _ = get_contact_changes(
+            persons=SAMPLE_PERSONS, previous_hashes={}, uid_domain="example"
+        )
+        changed_person = {**SAMPLE_PERSONS[1], "mobile": "0171 999"}
+        new_person = {**SAMPLE_PERSONS[0], "id": 3}
+
+        vcards, hashes, removed = get_contact_changes(
+            persons=[changed_person, new_person],
+            previous_hashes=previous_hashes,
+            uid_domain="example",
+        )
+
+        assert len(vcards) == 2  # noqa: PLR2004
+        assert "TEL;TYPE=CELL:0171 999" in vcards[0]
+        assert set(hashes) == {"person-2@example", "person-3@example"}
+        assert removed == ["person-1@example"]
+
+    def test_get_contact_changes_unchanged(self) -> None:
+        """Check that unchanged persons don't result in vCards."""
+        _, previous_hashes, _ = get_contact_changes(
+            persons=SAMPLE_PERSONS, previous_hashes={}, uid_domain="example"
+        )
+        vcards, hashes, removed = get_contact_changes(
+            persons=SAMPLE_PERSONS,
+            previous_hashes=previous_hashes,
+            uid_domain="example",
+        )
+
+        assert vcards == []
+        assert hashes == previous_hashes
+        assert removed == []
+
+    def test_get_contact_changes_failed_page(self) -> None:
+        """Check that persons of a failed page are not reported as removed."""
+        persons = [
+            {"id": number, "firstName": "Max", "lastName": f"Muster {number}"}
+            for number in range(25)
+        ]
+        _, previous_hashes, _ = get_contact_changes(
+            persons=persons, previous_hashes={}, uid_domain="example"
+        )
+
+        with pytest.raises(requests.HTTPError):
+            get_contact_changes(
+                persons=iter_persons(
+                    ct_api=FakeChurchToolsApi(persons, failing_pages={2}),
+                    page_size=10,
+                ),
+                previous_hashes=previous_hashes,
+                uid_domain="example",
+            )
+
+    def test_contact_sync_store(self, tmp_path: Path) -> None:
+        """Check that tokens can be loaded and outdated tokens are removed."""
+        store = ContactSyncStore(
+            directory=tmp_path,
+            domain="https://example.church.tools",
+            user_id=1,
+            max_tokens=2,
+        )
+        tokens = [store.save({"uid": str(number)}) for number in range(3)]
+
+        assert store.load(tokens[0]) is None
+        assert store.load(tokens[2]) == {"uid": "2"}
+        assert store.load("../../etc/passwd") is None
+        assert store.load("") is None
+        assert len(list(store.directory.iterdir())) == 2  # noqa: PLR2004
+
+    def test_contact_sync_store_per_user(self, tmp_path: Path) -> None:
+        """Check that tokens are neither valid nor evicted for other users."""
+        stores = {
+            user_id: ContactSyncStore(
+                directory=tmp_path,
+                domain="https://example.church.tools",
+                user_id=user_id,
+                max_tokens=2,
+            )
+            for user_id in [1, 2]
+        }
+        token = stores[1].save({"uid": "1"})
+        for number in range(3):
+            stores[2].save({"uid": str(number)})
+
+        assert stores[1].load(token) == {"uid": "1"}
+        assert stores[2].load(token) is None
@@ -4,7 +4,8 @@ import json
 import logging
 import logging.config
 import os
-from datetime import datetime
+import time
+from datetime import date, datetime
 from pathlib import Path
 
 import pytest
@@ -12,9 +13,15 @@ import pytz
 from churchtools_api.churchtools_api import ChurchToolsApi
 
 from church_web_helper.helper import (
+    EVENT_AGENDA_CACHE,
+    EVENT_AGENDA_MISSING_TTL,
     extract_relevant_calendar_appointment_shortname,
+    get_event_agenda,
+    get_event_agendas,
     get_primary_resource,
     get_special_day_name,
+    get_special_day_names,
+    parse_ct_datetime,
 )
 
 logger = logging.getLogger(__name__)
@@ -118,6 +125,22 @@ class Test_Helper:
             == expected_output
         )
 
+    def test_get_special_day_names(self) -> None:
+        """Check that special day names of a range match single day lookup."""
+        special_name_calendar_ids = [52, 72]
+
+        result = get_special_day_names(
+            ct_api=self.ct_api,
+            special_name_calendar_ids=special_name_calendar_ids,
+            from_=datetime(year=2024, month=12, day=23),
+            to_=datetime(year=2024, month=12, day=26),
+        )
+
+        assert date(year=2024, month=12, day=23) not in result
+        assert result[date(year=2024, month=12, day=24)] == "Christvesper"
+        assert result[date(year=2024, month=12, day=25)] == "Christfest I"
+        assert result[date(year=2024, month=12, day=26)] == "Christfest II"
+
     def test_get_primary_resource(self) -> None:
         """Check if primary resource can be identified."""
         SAMPLE_EVENT_ID = 330754
@@ -135,3 +158,78 @@ class Test_Helper:
         )
 
         assert result == EXPECTED_RESULT
+
+
+class FakeAgendaApi:
+    """Minimal stand in for ChurchToolsApi serving agendas of some events."""
+
+    def __init__(self, agendas: dict[int, dict]) -> None:
+        """Init with agendas by event id and empty request log."""
+        self.domain = "https://example.church.tools"
+        self.agendas = agendas
+        self.requests = []
+
+    def get_event_agenda(self, event_id: int) -> dict | None:
+        """Agenda of the event or None like a failed request."""
+        self.requests.append(event_id)
+        return self.agendas.get(event_id)
+
+
+class TestHelperWithoutApi:
+    """Combined tests which don't require API access."""
+
+    def setup_method(self) -> None:
+        """Start each test with an empty agenda cache."""
+        EVENT_AGENDA_CACHE.clear()
+
+    def test_get_event_agenda_per_user(self) -> None:
+        """Check that agendas are cached per user."""
+        ct_api = FakeAgendaApi({1: {"id": 10, "name": "Gottesdienst"}})
+
+        for user_id in [1, 1, 2]:
+            result = get_event_agenda(ct_api=ct_api, event_id=1, user_id=user_id)
+
+        assert result == {"id": 10, "name": "Gottesdienst"}
+        assert ct_api.requests == [1, 1]
+
+    def test_get_event_agendas_none_cached_shortly(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Check that missing agendas are requested again after a short time."""
+        ct_api = FakeAgendaApi({1: {"id": 10, "name": "Gottesdienst"}})
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now)
+
+        for _ in range(2):
+            result = get_event_agendas(ct_api=ct_api, event_ids=[1, 2], user_id=1)
+        assert result == {1: {"id": 10, "name": "Gottesdienst"}, 2: None}
+        assert sorted(ct_api.requests) == [1, 2]
+
+        now += EVENT_AGENDA_MISSING_TTL + 1
+        get_event_agendas(ct_api=ct_api, event_ids=[1, 2], user_id=1)
+        assert sorted(ct_api.requests) == [1, 2, 2]
+
+    @pytest.mark.parametrize(
+        ("value", "expected_output"),
+        [
+            ("2024-12-24", datetime(year=2024, month=12, day=24).astimezone()),
+            (
+                "2024-12-24T09:00:00Z",
+                datetime(year=2024, month=12, day=24, hour=9, tzinfo=pytz.UTC),
+            ),
+            (
+                "2024-12-24T09:00:00z",
+                datetime(year=2024, month=12, day=24, hour=9, tzinfo=pytz.UTC),
+            ),
+            (
+                "2024-12-24T10:00:00+01:00",
+                datetime(year=2024, month=12, day=24, hour=9, tzinfo=pytz.UTC),
+            ),
+        ],
+    )
+    def test_parse_ct_datetime(self, value: str, expected_output: datetime) -> None:
+        """Check that ChurchTools dates are converted to aware datetimes."""
+        result = parse_ct_datetime(value)
+
+        assert result.tzinfo is not None
+        assert result == expected_output
@@ -0,0 +1,141 @@
+"""All tests in regards to masterdata.py."""
+
+import json
+import logging
+import logging.config
+from pathlib import Path
+
+from church_web_helper.cache import TTLCache
+from church_web_helper.masterdata import (
+    get_calendars,
+    get_event_masterdata,
+    get_resource_masterdata,
+)
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+CACHE_KEY = ("example.church.tools", 1)
+
+
+class FakeCTApi:
+    """Minimal stand in for ChurchToolsApi counting masterdata requests."""
+
+    def __init__(self) -> None:
+        """Init with empty request log."""
+        self.requests = []
+        self.failing = False
+
+    def get_calendars(self) -> list[dict] | None:
+        """Single calendar - None if failing."""
+        self.requests.append("get_calendars")
+        if self.failing:
+            return None
+        return [{"id": 2, "name": "Gottesdienste"}]
+
+    def get_resource_masterdata(self, resultClass: str) -> list[dict] | None:  # noqa: N803
+        """Single item of the requested kind - None if failing."""
+        self.requests.append(f"get_resource_masterdata {resultClass}")
+        if self.failing:
+            return None
+        return [{"id": 8, "name": resultClass}]
+
+    def get_event_masterdata(self) -> dict | None:
+        """Service groups and services - None if failing."""
+        self.requests.append("get_event_masterdata")
+        if self.failing:
+            return None
+        return {
+            "serviceGroups": [{"id": 1, "name": "Programm"}],
+            "services": [{"id": 1, "name": "Predigt", "serviceGroupId": 1}],
+        }
+
+
+class TestMasterdata:
+    """Combined tests which don't require API access."""
+
+    def test_get_calendars(self) -> None:
+        """Check that calendars are requested once per cache key."""
+        ct_api = FakeCTApi()
+        cache = TTLCache(maxsize=8)
+
+        for _ in range(2):
+            result = get_calendars(ct_api=ct_api, cache=cache, cache_key=CACHE_KEY)
+        get_calendars(ct_api=ct_api, cache=cache, cache_key=("other", 1))
+
+        assert result == [{"id": 2, "name": "Gottesdienste"}]
+        assert ct_api.requests == ["get_calendars", "get_calendars"]
+
+    def test_get_resource_masterdata(self) -> None:
+        """Check that each result class is cached separately."""
+        ct_api = FakeCTApi()
+        cache = TTLCache(maxsize=8)
+
+        for result_class in ["resources", "resourceTypes", "resources"]:
+            result = get_resource_masterdata(
+                ct_api=ct_api,
+                result_class=result_class,
+                cache=cache,
+                cache_key=CACHE_KEY,
+            )
+
+        assert result == [{"id": 8, "name": "resources"}]
+        assert len(ct_api.requests) == 2  # noqa: PLR2004
+
+    def test_get_event_masterdata(self) -> None:
+        """Check that all result classes are derived from a single request."""
+        ct_api = FakeCTApi()
+        cache = TTLCache(maxsize=8)
+
+        service_groups = get_event_masterdata(
+            ct_api=ct_api,
+            cache=cache,
+            cache_key=CACHE_KEY,
+            result_class="serviceGroups",
+            return_as_dict=True,
+        )
+        services = get_event_masterdata(
+            ct_api=ct_api, cache=cache, cache_key=CACHE_KEY, result_class="services"
+        )
+        event_masterdata = get_event_masterdata(
+            ct_api=ct_api, cache=cache, cache_key=CACHE_KEY
+        )
+
+        assert service_groups == {1: "Programm"}
+        assert services == [{"id": 1, "name": "Predigt", "serviceGroupId": 1}]
+        assert event_masterdata["services"] == services
+        assert ct_api.requests == ["get_event_masterdata"]
+
+    def test_failed_request_not_cached(self) -> None:
+        """Check that failed requests are requested again once available."""
+        ct_api = FakeCTApi()
+        ct_api.failing = True
+        cache = TTLCache(maxsize=8)
+
+        assert get_calendars(ct_api=ct_api, cache=cache, cache_key=CACHE_KEY) == []
+        assert (
+            get_resource_masterdata(
+                ct_api=ct_api,
+                result_class="resources",
+                cache=cache,
+                cache_key=CACHE_KEY,
+            )
+            == []
+        )
+        assert (
+            get_event_masterdata(ct_api=ct_api, cache=cache, cache_key=CACHE_KEY) == {}
+        )
+        assert len(cache) == 0
+
+        ct_api.failing = False
+        assert get_calendars(ct_api=ct_api, cache=cache, cache_key=CACHE_KEY) == [
+            {"id": 2, "name": "Gottesdienste"}
+        ]
+        assert ct_api.requests.count("get_calendars") == 2  # noqa: PLR2004
@@ -0,0 +1,296 @@
+"""All tests in regards to service_workload.py."""
+
+import json
+import logging
+import logging.config
+import random
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from church_web_helper.service_workload import (
+    collect_service_records,
+    compile_exclude_patterns,
+    filter_persons,
+    format_month_index,
+    get_chart_data,
+    get_cumulative_counts_by_date,
+    get_cumulative_monthly_counts,
+    get_monthly_counts,
+    get_service_type_counts,
+    get_weekly_heatmap,
+    prepare_service_data,
+)
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+SERVICE_NAMES = {1: "Predigt", 2: "Orgel", 9: "Posaunenchor"}
+
+EXCLUDE_PATTERNS = [
+    ".*ohnzimmer.*",
+    ".*chülergottesdienst.*",
+    ".*Trauung.*",
+]
+
+
+def generate_sample_events(number_of_events: int, seed: int = 1) -> list[dict]:
+    """Generate synthetic events with eventServices spanning multiple years.
+
+    Args:
+        number_of_events: number of events to generate
+        seed: used for reproducible random data
+
+    Returns:
+        list of events like returned by ChurchTools
+    """
+    randomizer = random.Random(seed)  # noqa: S311
+    event_names = ["Gottesdienst", "Wohnzimmer-Worship", "Trauung Muster", "Taufe"]
+    persons = [f"Person {number}" for number in range(40)] + [None]
+    start = datetime(year=2022, month=1, day=2, hour=9)
+
+    return [
+        {
+            "id": event_id,
+            "name": randomizer.choice(event_names),
+            "startDate": (
+                start + timedelta(days=event_id * 3, hours=randomizer.randint(0, 3))
+            ).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "calendar": {"domainIdentifier": str(randomizer.choice([2, 3, 4]))},
+            "eventServices": [
+                {
+                    "serviceId": randomizer.choice([1, 2, 9, 61]),
+                    "name": randomizer.choice(persons),
+                }
+                for _ in range(randomizer.randint(0, 6))
+            ],
+        }
+        for event_id in range(number_of_events)
+    ]
+
+
+def collect_service_records_loop(
+    events: list[dict], selected_calendars: list[int], exclude_patterns: list[str]
+) -> pd.DataFrame:
+    """Reference implementation iterating each service of each event."""
+    collected_data = []
+    for event in events:
+        if int(event["calendar"]["domainIdentifier"]) in selected_calendars:
+            for service in event["eventServices"]:
+                exclude = False
+                for pattern in exclude_patterns:
+                    if re.search(pattern, event["name"]):
+                        exclude = True
+                        break
+                if exclude:
+                    continue
+                collected_data.append(
+                    {
+                        "Datum": datetime.strptime(
+                            event["startDate"], "%Y-%m-%dT%H:%M:%SZ"
+                        ),
+                        "Eventname": event["name"],
+                        "Dienst": service["serviceId"],
+                        "Name": service["name"],
+                    }
+                )
+    return pd.DataFrame(collected_data)
+
+
+class TestServiceWorkload:
+    """Combined tests which don't require API access."""
+
+    def test_compile_exclude_patterns(self) -> None:
+        """Check that any of the patterns matches."""
+        pattern = compile_exclude_patterns(EXCLUDE_PATTERNS)
+
+        assert pattern.search("Wohnzimmer-Worship")
+        assert pattern.search("Trauung Muster")
+        assert not pattern.search("Gottesdienst")
+        assert compile_exclude_patterns([]) is None
+
+    @pytest.mark.parametrize(
+        ("selected_calendars", "exclude_patterns"),
+        [
+            ([2, 3], EXCLUDE_PATTERNS),
+            ([2, 3, 4], []),
+            ([4], [".*dienst.*"]),
+        ],
+    )
+    def test_collect_service_records(
+        self, selected_calendars: list[int], exclude_patterns: list[str]
+    ) -> None:
+        """Check that results are identical to iterating each service."""
+        events = generate_sample_events(number_of_events=500)
+
+        expected = collect_service_records_loop(
+            events=events,
+            selected_calendars=selected_calendars,
+            exclude_patterns=exclude_patterns,
+        )
+        result = collect_service_records(
+            events=events,
+            selected_calendars=selected_calendars,
+            exclude_patterns=exclude_patterns,
+        )
+
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_collect_service_records_empty(self) -> None:
+        """Check that no matching events result in an empty df with all columns."""
+        result = collect_service_records(
+            events=generate_sample_events(number_of_events=10),
+            selected_calendars=[],
+            exclude_patterns=EXCLUDE_PATTERNS,
+        )
+
+        assert len(result) == 0
+        assert list(result.columns) == ["Datum", "Eventname", "Dienst", "Name"]
+
+
+class TestWorkloadAnalytics:
+    """Combined tests which don't require API access."""
+
+    def setup_method(self) -> None:
+        """Prepare multi-year synthetic service data."""
+        self.service_data = prepare_service_data(
+            service_records=collect_service_records(
+                events=generate_sample_events(number_of_events=1000),
+                selected_calendars=[2, 3, 4],
+                exclude_patterns=EXCLUDE_PATTERNS,
+            ),
+            service_names=SERVICE_NAMES,
+            min_services_count=5,
+        )
+
+    def test_prepare_service_data(self) -> None:
+        """Check that unmapped services and rare persons are removed."""
+        assert set(self.service_data["Dienst"].unique()) <= set(SERVICE_NAMES.values())
+        assert isinstance(self.service_data["Name"].dtype, pd.CategoricalDtype)
+        assert (self.service_data["Name"].value_counts() > 5).all()  # noqa: PLR2004
+        assert "? noch offen" in self.service_data["Name"].cat.categories
+
+    def test_filter_persons(self) -> None:
+        """Check that unused person categories are removed."""
+        result = filter_persons(self.service_data, persons=["Person 1", "Person 2"])
+
+        assert list(result["Name"].cat.categories) == ["Person 1", "Person 2"]
+
+    def test_get_cumulative_counts_by_date(self) -> None:
+        """Check that cumsum is equal to rolling sum over all previous dates."""
+        result = get_cumulative_counts_by_date(self.service_data)
+
+        expected = (
+            self.service_data.astype({"Name": str})
+            .groupby("Name")["Datum"]
+            .value_counts()
+            .unstack()
+            .fillna(0)
+            .transpose()
+        )
+        expected = expected.rolling(window=len(expected), min_periods=1).sum()
+
+        result.columns = result.columns.astype(str)
+        pd.testing.assert_frame_equal(
+            result.astype(float), expected, check_names=False, check_index_type=False
+        )
+
+    def test_get_service_type_counts(self) -> None:
+        """Check that counts per person and service type add up to all services."""
+        result = get_service_type_counts(self.service_data)
+
+        assert result.to_numpy().sum() == len(self.service_data)
+        assert set(result.columns) <= set(SERVICE_NAMES.values())
+
+    def test_get_weekly_heatmap(self) -> None:
+        """Check that the matrix matches counting by ISO calendar week."""
+        result = get_weekly_heatmap(self.service_data)
+
+        iso_dates = self.service_data["Datum"].dt.isocalendar()
+        expected = (
+            self.service_data.assign(
+                Woche=iso_dates["year"].astype(str)
+                + "-W"
+                + iso_dates["week"].astype(str).str.zfill(2)
+            )
+            .groupby(["Name", "Woche"], observed=False)
+            .size()
+            .unstack(fill_value=0)
+        )
+        expected.index = expected.index.astype(str)
+
+        assert result.shape[0] == len(self.service_data["Name"].cat.categories)
+        assert result.columns.is_unique
+        assert list(result.columns) == sorted(result.columns)
+        assert result.to_numpy().sum() == len(self.service_data)
+        pd.testing.assert_frame_equal(
+            result[expected.columns], expected, check_dtype=False, check_names=False
+        )
+        assert (result.drop(columns=expected.columns).to_numpy() == 0).all()
+
+    def test_get_weekly_heatmap_year_boundary(self) -> None:
+        """Check ISO weeks belonging to the previous or next year."""
+        service_data = pd.DataFrame(
+            {
+                "Datum": pd.to_datetime(["2020-12-31", "2021-01-03", "2024-12-30"]),
+                "Name": pd.Categorical(["A", "A", "B"]),
+            }
+        )
+        result = get_weekly_heatmap(service_data)
+
+        assert result.loc["A", "2020-W53"] == 2  # noqa: PLR2004
+        assert result.loc["B", "2025-W01"] == 1
+        assert result.columns[1] == "2021-W01"
+
+    def test_get_monthly_counts(self) -> None:
+        """Check monthly periods are sorted chronologically across years."""
+        result = get_monthly_counts(self.service_data)
+
+        assert result.index.is_monotonic_increasing
+        assert result.index[0] == pd.Period("2022-01", freq="M")
+        assert len(result) == len(
+            pd.period_range(result.index[0], result.index[-1], freq="M")
+        )
+        assert result.to_numpy().sum() == len(self.service_data)
+
+        cumulative = get_cumulative_monthly_counts(result)
+        pd.testing.assert_series_equal(
+            cumulative.iloc[-1], result.sum(), check_names=False
+        )
+
+    def test_format_month_index(self) -> None:
+        """Check that month labels keep chronological order."""
+        result = format_month_index(get_monthly_counts(self.service_data))
+
+        assert result.index[0].startswith("2022-01 ")
+        assert list(result.index) == sorted(result.index)
+
+    def test_get_chart_data(self) -> None:
+        """Check that the compact payload matches the cumulative counts."""
+        result = get_chart_data(self.service_data)
+        expected = get_cumulative_counts_by_date(self.service_data)
+
+        assert len(result["dates"]) == len(expected)
+        assert result["persons"] == [str(person) for person in expected.columns]
+        assert [sum(counts) for counts in result["counts_by_date"]] == list(
+            expected.iloc[-1]
+        )
+        assert sum(map(sum, result["counts_by_service"])) == len(self.service_data)
+        json.dumps(result)
+
+    def test_get_chart_data_empty(self) -> None:
+        """Check that no services result in empty lists."""
+        result = get_chart_data(self.service_data.iloc[0:0])
+
+        assert result["dates"] == []
+        assert result["counts_by_date"] == []
@@ -0,0 +1,67 @@
+"""All tests in regards to snapshots.py."""
+
+import json
+import logging
+import logging.config
+from pathlib import Path
+
+import pytest
+
+from church_web_helper.snapshots import SnapshotPublisher, load_snapshot_variants
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+
+class TestSnapshots:
+    """Combined tests which don't require API access."""
+
+    def test_load_snapshot_variants(self, tmp_path: Path) -> None:
+        """Check that variant params are converted to GET param strings."""
+        config_path = tmp_path / "snapshots.json"
+        config_path.write_text(
+            json.dumps({"gottesdienste": {"calendar_id": 2, "services": "1,2"}})
+        )
+
+        assert load_snapshot_variants(config_path) == {
+            "gottesdienste": {"calendar_id": "2", "services": "1,2"}
+        }
+
+    def test_load_snapshot_variants_invalid_name(self, tmp_path: Path) -> None:
+        """Check that variant names which are no valid filenames are rejected."""
+        config_path = tmp_path / "snapshots.json"
+        config_path.write_text(json.dumps({"../secret": {}}))
+
+        with pytest.raises(ValueError, match="invalid snapshot variant name"):
+            load_snapshot_variants(config_path)
+
+    def test_refresh(self, tmp_path: Path) -> None:
+        """Check that snapshots are rendered once within the interval."""
+        rendered = []
+
+        def render(params: dict[str, str]) -> str:
+            rendered.append(params)
+            return f"<p>{params['days']}</p>"
+
+        publisher = SnapshotPublisher(
+            directory=tmp_path / "snapshots",
+            variants={"two_weeks": {"days": "14"}},
+            render=render,
+            interval=60,
+        )
+        publisher.refresh()
+        publisher.refresh()
+
+        assert publisher.get_path("two_weeks").read_text() == "<p>14</p>"
+        assert publisher.get_path("unknown") is None
+        assert len(rendered) == 1
+
+        publisher.refresh(force=True)
+        assert len(rendered) == 2  # noqa: PLR2004
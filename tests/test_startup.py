@@ -0,0 +1,50 @@
+"""All tests in regards to the import time of the app."""
+
+import json
+import logging
+import logging.config
+from pathlib import Path
+
+import pytest
+
+from benchmarks.bench_startup import APP_MODULE, get_import_times
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+# only imported by the routes and exporters which use them
+DEFERRED_MODULES = ["pandas", "numpy", "matplotlib", "docx", "xlsxwriter", "vobject"]
+
+
+@pytest.fixture(scope="module")
+def app_import_times() -> dict[str, int]:
+    """Import times of the app measured once for all tests."""
+    return get_import_times(APP_MODULE)
+
+
+class TestStartup:
+    """Combined tests which don't require API access."""
+
+    def test_app_import_time(self, app_import_times: dict[str, int]) -> None:
+        """Log the import time to track it across test runs."""
+        logger.info(
+            "importing %s took %sms for %s modules",
+            APP_MODULE,
+            app_import_times[APP_MODULE] // 1000,
+            len(app_import_times),
+        )
+        assert app_import_times[APP_MODULE] > 0
+
+    @pytest.mark.parametrize("module", DEFERRED_MODULES)
+    def test_deferred_modules(
+        self, app_import_times: dict[str, int], module: str
+    ) -> None:
+        """Check that heavy dependencies are not imported with the app."""
+        assert module not in app_import_times
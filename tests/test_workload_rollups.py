@@ -0,0 +1,191 @@
+"""All tests in regards to workload_rollups.py."""
+
+import json
+import logging
+import logging.config
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from church_web_helper.service_workload import (
+    collect_service_records,
+    get_monthly_counts,
+    get_service_type_counts,
+    prepare_service_data,
+)
+from church_web_helper.workload_rollups import (
+    WorkloadRollupStore,
+    build_monthly_rollups,
+    get_monthly_counts_from_rollups,
+)
+from tests.test_service_workload import (
+    EXCLUDE_PATTERNS,
+    SERVICE_NAMES,
+    generate_sample_events,
+)
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+DOMAIN = "https://example.church.tools"
+
+
+class FakeChurchToolsApi:
+    """Minimal stand in returning synthetic events which records requests."""
+
+    domain = DOMAIN
+
+    def __init__(self) -> None:
+        """Init with about two years of synthetic events."""
+        self.requests = []
+        self.events = generate_sample_events(number_of_events=250)
+        self.failing = False
+
+    def get_events(self, **kwargs) -> list[dict] | None:  # noqa: ANN003
+        """Events starting within the range - None if failing."""
+        self.requests.append((kwargs["from_"], kwargs["to_"]))
+        if self.failing:
+            return None
+        from_ = kwargs["from_"].strftime("%Y-%m-%dT%H:%M:%SZ")
+        to_ = kwargs["to_"].strftime("%Y-%m-%dT%H:%M:%SZ")
+        return [event for event in self.events if from_ <= event["startDate"] <= to_]
+
+
+class TestWorkloadRollups:
+    """Combined tests which don't require API access."""
+
+    def test_build_monthly_rollups(self) -> None:
+        """Check that counts of all months add up to the number of services."""
+        events = generate_sample_events(number_of_events=250)
+        rollups = build_monthly_rollups(events)
+
+        assert min(rollups) == pd.Period("2022-01", freq="M")
+        assert sum(df["count"].sum() for df in rollups.values()) == sum(
+            len(event["eventServices"]) for event in events
+        )
+
+    def test_save_load(self, tmp_path: Path) -> None:
+        """Check that rollups are unchanged after storing them."""
+        store = WorkloadRollupStore(directory=tmp_path, domain=DOMAIN, user_id=1)
+        month = pd.Period("2022-03", freq="M")
+        df_rollup = build_monthly_rollups(generate_sample_events(100))[month]
+
+        assert store.load(month) is None
+        store.save(month, df_rollup)
+
+        assert store.get_path(month).parent.name == "1"
+        assert store.get_path(month).parent.parent.name == "example.church.tools"
+        pd.testing.assert_frame_equal(store.load(month), df_rollup, check_dtype=False)
+
+    def test_get_rollups(self, tmp_path: Path) -> None:
+        """Check that closed months are only requested once."""
+        ct_api = FakeChurchToolsApi()
+        store = WorkloadRollupStore(directory=tmp_path, domain=DOMAIN, user_id=1)
+        today = datetime(year=2022, month=12, day=15)
+
+        first = store.get_rollups(
+            ct_api=ct_api,
+            from_month=pd.Period("2022-01", freq="M"),
+            to_month=pd.Period("2023-02", freq="M"),
+            today=today,
+        )
+        second = store.get_rollups(
+            ct_api=ct_api,
+            from_month=pd.Period("2022-01", freq="M"),
+            to_month=pd.Period("2023-02", freq="M"),
+            today=today,
+        )
+
+        assert ct_api.requests[1] == (
+            datetime(year=2022, month=12, day=1),
+            datetime(year=2023, month=2, day=28, hour=23, minute=59, second=59),
+        )
+        assert len(ct_api.requests) == 2  # noqa: PLR2004
+        assert len(list(store.directory.iterdir())) == 11  # noqa: PLR2004
+        pd.testing.assert_frame_equal(first, second, check_dtype=False)
+
+    def test_get_rollups_failed_request(self, tmp_path: Path) -> None:
+        """Check that nothing is stored if services can't be requested."""
+        ct_api = FakeChurchToolsApi()
+        store = WorkloadRollupStore(directory=tmp_path, domain=DOMAIN, user_id=1)
+        params = {
+            "from_month": pd.Period("2022-01", freq="M"),
+            "to_month": pd.Period("2022-06", freq="M"),
+            "today": datetime(year=2022, month=12, day=15),
+        }
+
+        ct_api.failing = True
+        assert store.get_rollups(ct_api=ct_api, **params) is None
+        assert not store.directory.exists()
+
+        ct_api.failing = False
+        df_rollups = store.get_rollups(ct_api=ct_api, **params)
+        assert df_rollups["count"].sum() > 0
+        assert len(ct_api.requests) == 2  # noqa: PLR2004
+
+    def test_store_per_user(self, tmp_path: Path) -> None:
+        """Check that users don't share rollups."""
+        ct_api = FakeChurchToolsApi()
+        params = {
+            "from_month": pd.Period("2022-01", freq="M"),
+            "to_month": pd.Period("2022-06", freq="M"),
+            "today": datetime(year=2022, month=12, day=15),
+        }
+
+        for user_id in [1, 2]:
+            WorkloadRollupStore(
+                directory=tmp_path, domain=DOMAIN, user_id=user_id
+            ).get_rollups(ct_api=ct_api, **params)
+
+        assert len(ct_api.requests) == 2  # noqa: PLR2004
+
+    def test_get_monthly_counts_from_rollups(self, tmp_path: Path) -> None:
+        """Check that results match the aggregation of single services."""
+        ct_api = FakeChurchToolsApi()
+        store = WorkloadRollupStore(directory=tmp_path, domain=DOMAIN, user_id=1)
+        df_rollups = store.get_rollups(
+            ct_api=ct_api,
+            from_month=pd.Period("2022-01", freq="M"),
+            to_month=pd.Period("2024-12", freq="M"),
+        )
+
+        df_monthly, df_service_types = get_monthly_counts_from_rollups(
+            df_rollups=df_rollups,
+            selected_calendars=[2, 3],
+            exclude_patterns=EXCLUDE_PATTERNS,
+            service_names=SERVICE_NAMES,
+            min_services_count=5,
+        )
+
+        service_data = prepare_service_data(
+            service_records=collect_service_records(
+                events=ct_api.events,
+                selected_calendars=[2, 3],
+                exclude_patterns=EXCLUDE_PATTERNS,
+            ),
+            service_names=SERVICE_NAMES,
+            min_services_count=5,
+        )
+        expected_monthly = get_monthly_counts(service_data)
+        expected_service_types = get_service_type_counts(service_data)
+        expected_monthly.columns = expected_monthly.columns.astype(str)
+        expected_service_types.columns = expected_service_types.columns.astype(str)
+        expected_service_types.index = expected_service_types.index.astype(str)
+
+        pd.testing.assert_frame_equal(
+            df_monthly, expected_monthly, check_dtype=False, check_names=False
+        )
+        pd.testing.assert_frame_equal(
+            df_service_types,
+            expected_service_types,
+            check_dtype=False,
+            check_names=False,
+        )